@@ -0,0 +1,213 @@
+import argparse
+import gc
+import tempfile
+import time
+import tracemalloc
+from typing import Annotated, Callable
+
+import numpy as np
+from loguru import logger
+from pydantic import AfterValidator, BaseModel
+
+from generate_data import Simulation, Street, StreetType
+
+from turing_holdem.cards import decode
+from turing_holdem.equity import adaptive_hand_strength
+from turing_holdem.logs import configure_logging
+from turing_holdem.poker import Poker
+from turing_holdem.ranges import cached_range_weights, preflop_tables, range_equity
+from turing_holdem.simulator import TableBatch, deal_decks
+from turing_holdem.utils import Action, Personalities
+
+
+def benchmark_simulator(hands: int, batch_size: int, seed: int) -> float:
+    rng = np.random.default_rng(seed)
+    personalities = Personalities().personalities
+    start = time.perf_counter()
+    for offset in range(0, hands, batch_size):
+        TableBatch(
+            deal_decks(min(batch_size, hands - offset), rng), personalities
+        ).play()
+    return hands / (time.perf_counter() - start)
+
+
+def benchmark_pokerkit(hands: int, seed: int) -> float:
+    decks = deal_decks(hands, np.random.default_rng(seed))
+    poker = Poker.new_rule_game()
+    logger.disable("turing_holdem")
+    start = time.perf_counter()
+    for deck in decks:
+        poker.hand(deck=deck.tolist())
+    seconds = time.perf_counter() - start
+    logger.enable("turing_holdem")
+    return hands / seconds
+
+
+LOGGING_SETUPS = {
+    "sync text": dict(background=False),
+    "background text": dict(background=True),
+    "background json": dict(background=True, json=True),
+    "background, 1% of actions": dict(background=True, action_sample=0.01),
+    "INFO level": dict(level="INFO", background=True),
+}
+
+
+def benchmark_logging(hands: int, seed: int, rounds: int = 3) -> dict[str, float]:
+    """
+    Milliseconds of logging per Poker.hand for each setup, measured against
+    the same decks with the package's logging disabled. Setups are
+    interleaved over ``rounds`` and the fastest round of each is kept, so
+    drift in machine load does not land on one setup.
+    """
+    decks = [deck.tolist() for deck in deal_decks(hands, np.random.default_rng(seed))]
+    poker = Poker.new_rule_game()
+
+    def per_hand() -> float:
+        start = time.perf_counter()
+        for deck in decks:
+            poker.hand(deck=deck)
+        return (time.perf_counter() - start) / hands * 1000
+
+    timings: dict[str, list[float]] = {}
+    with tempfile.TemporaryFile("w") as sink:
+        for _ in range(rounds):
+            configure_logging(sink=sink)
+            logger.disable("turing_holdem")
+            timings.setdefault("disabled", []).append(per_hand())
+            logger.enable("turing_holdem")
+            for name, setup in LOGGING_SETUPS.items():
+                configure_logging(sink=sink, **setup)
+                timings.setdefault(name, []).append(per_hand())
+    configure_logging()
+
+    baseline = min(timings.pop("disabled"))
+    return {name: min(values) - baseline for name, values in timings.items()}
+
+
+class ModelStreet(BaseModel):
+    """
+    The pydantic form ``Street`` had before it became a dataclass.
+    """
+
+    street: StreetType
+    board: str
+    hand_strength: Annotated[float, AfterValidator(lambda x: x if x > 0.0 else 0.0)]
+    action: Action
+
+
+class ModelSimulation(BaseModel):
+    personality: str
+    hole_cards: str
+    preflop: ModelStreet
+    flop: ModelStreet
+    turn: ModelStreet
+    river: ModelStreet
+
+
+def build_simulation(street: Callable, simulation: Callable, idx: int):
+    streets = [
+        street(
+            street=street_type,
+            board="(Ah, Kd, 7c)",
+            hand_strength=(idx % 100) / 100,
+            action=Action.CALL,
+        )
+        for street_type in StreetType
+    ]
+    return simulation(
+        personality="nine_percent",
+        hole_cards="(Kh, 9h)",
+        preflop=streets[0],
+        flop=streets[1],
+        turn=streets[2],
+        river=streets[3],
+    )
+
+
+def benchmark_records(count: int) -> dict[str, tuple[float, float]]:
+    """
+    Microseconds to build one simulation (four streets and the simulation
+    itself) and bytes held per simulation, for the pydantic models and the
+    slotted dataclasses.
+    """
+    results = {}
+    for name, street, simulation in (
+        ("pydantic", ModelStreet, ModelSimulation),
+        ("dataclass", Street, Simulation),
+    ):
+        build_simulation(street, simulation, 0)
+        gc.collect()
+        start = time.perf_counter()
+        records = [build_simulation(street, simulation, idx) for idx in range(count)]
+        seconds = time.perf_counter() - start
+        del records
+
+        gc.collect()
+        tracemalloc.start()
+        records = [build_simulation(street, simulation, idx) for idx in range(count)]
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del records
+        results[name] = (seconds / count * 1e6, size / count)
+    return results
+
+
+def benchmark_equity(spots: int, seed: int) -> dict[str, dict[str, float]]:
+    """
+    Milliseconds per hand-strength call on each street, six-handed: the
+    adaptive Monte-Carlo estimate against random hands (serial, no cache)
+    and the equity against the other five personalities' ranges.
+    """
+    preflop_tables()
+    personalities = Personalities().personalities
+    ranges = [cached_range_weights(personality) for personality in personalities[1:]]
+    decks = deal_decks(spots, np.random.default_rng(seed))
+    results: dict[str, dict[str, float]] = {"monte carlo": {}, "ranges": {}}
+    for street, board_count in (("preflop", 0), ("flop", 3), ("turn", 4), ("river", 5)):
+        start = time.perf_counter()
+        for deck in decks:
+            adaptive_hand_strength(
+                6, decode(deck[:2]), decode(deck[2 : 2 + board_count]), 2, 5
+            )
+        results["monte carlo"][street] = (time.perf_counter() - start) / spots * 1000
+        start = time.perf_counter()
+        for deck in decks:
+            range_equity(deck[:2], deck[2 : 2 + board_count], ranges)
+        results["ranges"][street] = (time.perf_counter() - start) / spots * 1000
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure rule-policy hand throughput")
+    parser.add_argument("--hands", type=int, default=200_000)
+    parser.add_argument("--batch-size", type=int, default=100_000)
+    parser.add_argument(
+        "--pokerkit-hands",
+        type=int,
+        default=500,
+        help="Hands replayed through Poker.hand for the baseline",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--records", type=int, default=200_000, help="Simulation records to build"
+    )
+    parser.add_argument(
+        "--equity-spots", type=int, default=20, help="Hands timed per street"
+    )
+    args = parser.parse_args()
+
+    simulator = benchmark_simulator(args.hands, args.batch_size, args.seed)
+    pokerkit = benchmark_pokerkit(args.pokerkit_hands, args.seed)
+    logger.info(f"Simulator: {simulator:,.0f} hands/s")
+    logger.info(f"Poker.hand: {pokerkit:,.0f} hands/s")
+    logger.info(f"Speedup: {simulator / pokerkit:,.0f}x")
+
+    for name, cost in benchmark_logging(args.pokerkit_hands, args.seed).items():
+        logger.info(f"Logging ({name}): {cost:.3f} ms/hand")
+
+    for name, (micros, size) in benchmark_records(args.records).items():
+        logger.info(f"Records ({name}): {micros:.2f} us, {size:.0f} B per simulation")
+
+    for name, streets in benchmark_equity(args.equity_spots, args.seed).items():
+        timings = ", ".join(f"{street} {ms:.1f}" for street, ms in streets.items())
+        logger.info(f"Equity ({name}): {timings} ms")
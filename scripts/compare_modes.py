@@ -0,0 +1,121 @@
+import argparse
+import time
+import uuid
+from pathlib import Path
+
+import dspy
+import pandas as pd
+from loguru import logger
+
+from dspy_optimize import get_datasets
+from turing_holdem.dspy_modules import (
+    STREETS,
+    InferenceMode,
+    get_dspy_lm,
+    load_dspy_program,
+)
+
+dspy.configure_cache(
+    enable_disk_cache=False,
+    enable_memory_cache=False,
+)
+
+
+def compare(
+    data: list[Path], limit: int | None, seed: int, tolerance: float
+) -> pd.DataFrame:
+    """
+    Time every street decision of the test split under each inference mode
+    and score it against the generated action.
+    """
+    get_dspy_lm()
+    rows = []
+    for path in data:
+        personality = path.stem
+        _, _, test_set = get_datasets(str(path), seed=seed)
+        test_set = test_set[:limit]
+        for mode in InferenceMode:
+            program = load_dspy_program(
+                Path(f"programs/gepa_{personality}.json"),
+                dict.fromkeys(STREETS, mode),
+            )
+            logger.info(f"{personality}: {mode.value} on {len(test_set)} hands")
+            for example in test_set:
+                for street in STREETS:
+                    start = time.perf_counter()
+                    try:
+                        action = getattr(program, f"{street}_module")(
+                            personality=example.personality,
+                            hole_cards=example.hole_cards,
+                            board=example[f"{street}_board"],
+                            street=example[f"{street}_street"],
+                        ).action
+                    except Exception as e:
+                        logger.warning(f"{mode.value} failed on {street}: {e}")
+                        action = None
+                    rows.append(
+                        {
+                            "personality": personality,
+                            "street": street,
+                            "mode": mode.value,
+                            "correct": action == example[f"{street}_action"],
+                            "seconds": time.perf_counter() - start,
+                        }
+                    )
+
+    results = pd.DataFrame(rows)
+    summary = (
+        results.groupby(["street", "mode"])
+        .agg(
+            accuracy=("correct", "mean"),
+            mean_seconds=("seconds", "mean"),
+            p95_seconds=("seconds", lambda s: s.quantile(0.95)),
+            decisions=("correct", "size"),
+        )
+        .reset_index()
+    )
+
+    # The cheapest mode whose accuracy is within ``tolerance`` of the best.
+    for street, group in summary.groupby("street"):
+        eligible = group[group.accuracy >= group.accuracy.max() - tolerance]
+        choice = eligible.sort_values("mean_seconds").iloc[0]
+        logger.info(
+            f"{street}: use {choice['mode']} "
+            f"({choice.accuracy:.1%} in {choice.mean_seconds * 1000:.0f} ms)"
+        )
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare accuracy and latency of the street inference modes"
+    )
+    parser.add_argument(
+        "data",
+        type=Path,
+        nargs="*",
+        help="Personality data files, all of data/ by default",
+    )
+    parser.add_argument(
+        "--limit", type=int, default=None, help="Test hands per personality"
+    )
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the split")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.01,
+        help="Accuracy a cheaper mode may give up and still be chosen",
+    )
+    args = parser.parse_args()
+
+    data = args.data or [
+        path
+        for path in sorted(Path("data").glob("*.json"))
+        if Path(f"programs/gepa_{path.stem}.json").exists()
+    ]
+    summary = compare(data, args.limit, args.seed, args.tolerance)
+    print(summary.to_string(index=False))
+
+    reports_dir = Path("reports")
+    reports_dir.mkdir(parents=True, exist_ok=True)
+    summary.to_csv(reports_dir / f"modes_{str(uuid.uuid4())[:10]}.csv", index=False)
@@ -0,0 +1,154 @@
+import argparse
+import time
+import uuid
+from pathlib import Path
+
+import dspy
+import pandas as pd
+from loguru import logger
+
+from dspy_optimize import get_datasets
+from turing_holdem.dspy_modules import STREETS, load_dspy_program, parse_modes
+from turing_holdem.routing import Route, Router, RoutingTable, parse_route
+
+dspy.configure_cache(
+    enable_disk_cache=False,
+    enable_memory_cache=False,
+)
+
+
+def compare(
+    data: list[Path],
+    candidates: list[Route],
+    mode: str,
+    limit: int | None,
+    seed: int,
+) -> pd.DataFrame:
+    """
+    Time every street decision of the test split on each candidate route
+    and score it against the generated action.
+    """
+    router = Router(RoutingTable())
+    rows = []
+    for path in data:
+        personality = path.stem
+        _, _, test_set = get_datasets(str(path), seed=seed)
+        test_set = test_set[:limit]
+        program = load_dspy_program(
+            Path(f"programs/gepa_{personality}.json"), parse_modes(mode)
+        )
+        for route in candidates:
+            router.table = RoutingTable(routes={personality: route})
+            logger.info(f"{personality}: {route.name} on {len(test_set)} hands")
+            for example in test_set:
+                for street in STREETS:
+                    start = time.perf_counter()
+                    try:
+                        with router.context(personality, street):
+                            action = getattr(program, f"{street}_module")(
+                                personality=example.personality,
+                                hole_cards=example.hole_cards,
+                                board=example[f"{street}_board"],
+                                street=example[f"{street}_street"],
+                            ).action
+                    except Exception as e:
+                        logger.warning(f"{route.name} failed on {street}: {e}")
+                        action = None
+                    rows.append(
+                        {
+                            "personality": personality,
+                            "street": street,
+                            "route": route.name,
+                            "correct": action == example[f"{street}_action"],
+                            "seconds": time.perf_counter() - start,
+                        }
+                    )
+    return pd.DataFrame(rows)
+
+
+def summarise(
+    results: pd.DataFrame, per_personality: bool, tolerance: float
+) -> tuple[pd.DataFrame, RoutingTable]:
+    """
+    Accuracy and latency per route, and a routing table that picks, for
+    each street (and personality), the fastest route whose accuracy is
+    within ``tolerance`` of the best.
+    """
+    keys = ["personality", "street"] if per_personality else ["street"]
+    summary = (
+        results.groupby([*keys, "route"])
+        .agg(
+            accuracy=("correct", "mean"),
+            mean_seconds=("seconds", "mean"),
+            p95_seconds=("seconds", lambda s: s.quantile(0.95)),
+            decisions=("correct", "size"),
+        )
+        .reset_index()
+    )
+
+    routes = {}
+    for key, group in summary.groupby(keys):
+        eligible = group[group.accuracy >= group.accuracy.max() - tolerance]
+        choice = eligible.sort_values("mean_seconds").iloc[0]
+        name = ".".join(key)
+        logger.info(
+            f"{name}: use {choice.route} "
+            f"({choice.accuracy:.1%} in {choice.mean_seconds * 1000:.0f} ms)"
+        )
+        routes[name] = parse_route(choice.route)
+    return summary, RoutingTable(routes=routes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare accuracy and latency of LM routes per street"
+    )
+    parser.add_argument(
+        "data",
+        type=Path,
+        nargs="*",
+        help="Personality data files, all of data/ by default",
+    )
+    parser.add_argument(
+        "--candidates",
+        type=lambda text: [parse_route(route) for route in text.split(",")],
+        required=True,
+        help="Comma-separated routes to compare, as model or model@api_base",
+    )
+    parser.add_argument(
+        "--mode", default="cot", help="Inference modes, as for `poker play`"
+    )
+    parser.add_argument(
+        "--limit", type=int, default=None, help="Test hands per personality"
+    )
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the split")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.01,
+        help="Accuracy a faster route may give up and still be chosen",
+    )
+    parser.add_argument(
+        "--per-personality",
+        action="store_true",
+        help="Choose routes per personality and street",
+    )
+    args = parser.parse_args()
+
+    data = args.data or [
+        path
+        for path in sorted(Path("data").glob("*.json"))
+        if Path(f"programs/gepa_{path.stem}.json").exists()
+    ]
+    results = compare(data, args.candidates, args.mode, args.limit, args.seed)
+    summary, table = summarise(results, args.per_personality, args.tolerance)
+    print(summary.to_string(index=False))
+
+    reports_dir = Path("reports")
+    reports_dir.mkdir(parents=True, exist_ok=True)
+    report_id = str(uuid.uuid4())[:10]
+    summary.to_csv(reports_dir / f"routes_{report_id}.csv", index=False)
+    (reports_dir / f"routes_{report_id}.json").write_text(
+        table.model_dump_json(indent=2)
+    )
+    logger.info(f"Wrote reports/routes_{report_id}.json; pass it to --routes to use it")
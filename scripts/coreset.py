@@ -0,0 +1,57 @@
+import argparse
+import json
+from pathlib import Path
+
+from loguru import logger
+
+from turing_holdem.coreset import coreset
+
+
+def write_coreset(
+    data: list[Path], size: int, output: Path, seed: int, buckets: int
+) -> None:
+    """
+    Write a coreset of the simulations in ``data`` in the same format as
+    the data files, with each simulation's weight added to it.
+    """
+    simulations = [
+        simulation
+        for path in data
+        for simulation in json.loads(path.read_text())["simulations"]
+    ]
+    picked, summary = coreset(simulations, size, seed=seed, buckets=buckets)
+    logger.info(
+        f"{summary.simulations} simulations, {summary.unique} unique up to suits, "
+        f"{summary.strata} strata; kept {summary.size} covering {summary.covered} "
+        "strata"
+    )
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(
+            {
+                "name": output.stem,
+                "simulations": [
+                    {**item.simulation, "weight": round(item.weight, 4)}
+                    for item in picked
+                ],
+            },
+            file,
+        )
+    logger.info(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Deduplicate simulations up to suits and keep a stratified coreset"
+    )
+    parser.add_argument("data", type=Path, nargs="+", help="Generated data files")
+    parser.add_argument("--size", type=int, default=64, help="Simulations to keep")
+    parser.add_argument("--output", type=Path, required=True, help="Coreset file")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--buckets", type=int, default=5, help="Preflop hand-strength buckets"
+    )
+    args = parser.parse_args()
+
+    write_coreset(args.data, args.size, args.output, args.seed, args.buckets)
@@ -1,13 +1,15 @@
 import glob
+import json
+
 import pandas as pd
 
 
 def count() -> None:
     total = pd.DataFrame()
-    paths = glob.glob("reports/*")
+    paths = glob.glob("reports/data_*.json")
     for path in paths:
         with open(path, "r") as file:
-            counts = pd.read_json(file)
+            counts = pd.DataFrame({"winners": json.load(file)["winners"]})
             total = pd.concat([total, counts])
 
     print(len(total))
@@ -1,92 +1,70 @@
 import argparse
 import random
 from pathlib import Path
-from typing import Literal
 
 import dspy
 from datasets import DatasetDict, load_dataset
 
+from turing_holdem.cards import format_cards, parse_cards
+from turing_holdem.coreset import canonical_spot
+from turing_holdem.dspy_modules import DEFAULT_MODEL, PokerModule, get_dspy_lm
+from turing_holdem.evaluation import ResultStore, evaluate, program_key
+
 dspy.configure_cache(
     enable_disk_cache=False,
 )
 
 
-class PokerAnalyzer(dspy.Signature):
-    """
-    Review the folling Poker Hand and determine the best action.
-    """
-
-    personality: str = dspy.InputField()
-    hole_cards: str = dspy.InputField()
-    street: str = dspy.InputField()
-    board: str = dspy.InputField()
-
-    action: Literal["fold", "check", "call", "raise", "all_in"] = dspy.OutputField()
-
-
-class PokerModule(dspy.Module):
-    def __init__(self):
-        self.preflop_module = dspy.ChainOfThought(PokerAnalyzer)
-        self.flop_module = dspy.ChainOfThought(PokerAnalyzer)
-        self.turn_module = dspy.ChainOfThought(PokerAnalyzer)
-        self.river_module = dspy.ChainOfThought(PokerAnalyzer)
-
-    def forward(
-        self,
-        personality: str,
-        hole_cards: str,
-        preflop_board: str,
-        preflop_street: str,
-        flop_board: str,
-        flop_street: str,
-        turn_board: str,
-        turn_street: str,
-        river_board: str,
-        river_street: str,
-    ):
-        preflop_pred = self.preflop_module(
-            personality=personality,
-            hole_cards=hole_cards,
-            board=preflop_board,
-            street=preflop_street,
-        )
-        flop_pred = self.flop_module(
-            personality=personality,
-            hole_cards=hole_cards,
-            board=flop_board,
-            street=flop_street,
-        )
-        turn_pred = self.turn_module(
-            personality=personality,
-            hole_cards=hole_cards,
-            board=turn_board,
-            street=turn_street,
-        )
-        river_pred = self.river_module(
-            personality=personality,
-            hole_cards=hole_cards,
-            board=river_board,
-            street=river_street,
-        )
-
-        return dspy.Prediction(
-            preflop=preflop_pred.action,
-            flop=flop_pred.action,
-            turn=turn_pred.action,
-            river=river_pred.action,
-        )
+def to_example(d: dict) -> dspy.Example:
+    # Coreset simulations carry the weight of the hands they stand for.
+    weight = {"weight": d["weight"]} if d.get("weight") is not None else {}
+    return dspy.Example(
+        {
+            **weight,
+            "personality": d["personality"],
+            "hole_cards": format_cards(parse_cards(d["hole_cards"])),
+            "preflop_board": format_cards(parse_cards(d["preflop.board"])),
+            "preflop_street": d["preflop.street"],
+            "flop_board": format_cards(parse_cards(d["flop.board"])),
+            "flop_street": d["flop.street"],
+            "turn_board": format_cards(parse_cards(d["turn.board"])),
+            "turn_street": d["turn.street"],
+            "river_board": format_cards(parse_cards(d["river.board"])),
+            "river_street": d["river.street"],
+            "preflop_action": d["preflop.action"],
+            "flop_action": d["flop.action"],
+            "turn_action": d["turn.action"],
+            "river_action": d["river.action"],
+        }
+    ).with_inputs(
+        "personality",
+        "hole_cards",
+        "preflop_board",
+        "preflop_street",
+        "flop_board",
+        "flop_street",
+        "turn_board",
+        "turn_street",
+        "river_board",
+        "river_street",
+    )
 
 
 def get_datasets(
     data: str,
+    seed: int | None = None,
 ) -> tuple[list[dspy.Example], list[dspy.Example], list[dspy.Example]]:
     dataset = load_dataset("json", data_files=data, field="simulations")
 
     if not isinstance(dataset, DatasetDict):
         raise TypeError(f"Expected 'DatasetDict', got {type(dataset)}")
 
-    train_test_valid = dataset["train"].train_test_split(test_size=0.4, shuffle=True)
-    test_valid = train_test_valid["test"].train_test_split(test_size=0.5, shuffle=True)
+    train_test_valid = dataset["train"].train_test_split(
+        test_size=0.4, shuffle=True, seed=seed
+    )
+    test_valid = train_test_valid["test"].train_test_split(
+        test_size=0.5, shuffle=True, seed=seed
+    )
 
     dataset = DatasetDict(
         {
@@ -97,108 +75,37 @@ def get_datasets(
     )
 
     dspy_train_dataset = [
-        dspy.Example(
-            {
-                "personality": d["personality"],
-                "hole_cards": d["hole_cards"],
-                "preflop_board": d["preflop.board"],
-                "preflop_street": d["preflop.street"],
-                "flop_board": d["flop.board"],
-                "flop_street": d["flop.street"],
-                "turn_board": d["turn.board"],
-                "turn_street": d["turn.street"],
-                "river_board": d["river.board"],
-                "river_street": d["river.street"],
-                "preflop_action": d["preflop.action"],
-                "flop_action": d["flop.action"],
-                "turn_action": d["turn.action"],
-                "river_action": d["river.action"],
-            }
-        ).with_inputs(
-            "personality",
-            "hole_cards",
-            "preflop_board",
-            "preflop_street",
-            "flop_board",
-            "flop_street",
-            "turn_board",
-            "turn_street",
-            "river_board",
-            "river_street",
-        )
-        for d in dataset["train"]
-        if isinstance(d, dict)
+        to_example(d) for d in dataset["train"] if isinstance(d, dict)
     ]
+    dspy_dev_dataset = [to_example(d) for d in dataset["dev"] if isinstance(d, dict)]
+    dspy_test_dataset = [to_example(d) for d in dataset["test"] if isinstance(d, dict)]
 
-    dspy_dev_dataset = [
-        dspy.Example(
-            {
-                "personality": d["personality"],
-                "hole_cards": d["hole_cards"],
-                "preflop_board": d["preflop.board"],
-                "preflop_street": d["preflop.street"],
-                "flop_board": d["flop.board"],
-                "flop_street": d["flop.street"],
-                "turn_board": d["turn.board"],
-                "turn_street": d["turn.street"],
-                "river_board": d["river.board"],
-                "river_street": d["river.street"],
-                "preflop_action": d["preflop.action"],
-                "flop_action": d["flop.action"],
-                "turn_action": d["turn.action"],
-                "river_action": d["river.action"],
-            }
-        ).with_inputs(
-            "personality",
-            "hole_cards",
-            "preflop_board",
-            "preflop_street",
-            "flop_board",
-            "flop_street",
-            "turn_board",
-            "turn_street",
-            "river_board",
-            "river_street",
-        )
-        for d in dataset["dev"]
-        if isinstance(d, dict)
-    ]
+    return dspy_train_dataset, dspy_dev_dataset, dspy_test_dataset
 
-    dspy_test_dataset = [
-        dspy.Example(
-            {
-                "personality": d["personality"],
-                "hole_cards": d["hole_cards"],
-                "preflop_board": d["preflop.board"],
-                "preflop_street": d["preflop.street"],
-                "flop_board": d["flop.board"],
-                "flop_street": d["flop.street"],
-                "turn_board": d["turn.board"],
-                "turn_street": d["turn.street"],
-                "river_board": d["river.board"],
-                "river_street": d["river.street"],
-                "preflop_action": d["preflop.action"],
-                "flop_action": d["flop.action"],
-                "turn_action": d["turn.action"],
-                "river_action": d["river.action"],
-            }
-        ).with_inputs(
-            "personality",
-            "hole_cards",
-            "preflop_board",
-            "preflop_street",
-            "flop_board",
-            "flop_street",
-            "turn_board",
-            "turn_street",
-            "river_board",
-            "river_street",
-        )
-        for d in dataset["test"]
-        if isinstance(d, dict)
-    ]
 
-    return dspy_train_dataset, dspy_dev_dataset, dspy_test_dataset
+def get_examples(data: str) -> list[dspy.Example]:
+    dataset = load_dataset("json", data_files=data, field="simulations")
+
+    if not isinstance(dataset, DatasetDict):
+        raise TypeError(f"Expected 'DatasetDict', got {type(dataset)}")
+
+    examples = [
+        to_example(d) for d in dataset["train"].flatten() if isinstance(d, dict)
+    ]
+    # Coreset weights scaled to a mean of one, so a mean score is the
+    # weighted mean over the hands the coreset stands for.
+    if examples and "weight" in examples[0]:
+        mean_weight = sum(example.weight for example in examples) / len(examples)
+        for example in examples:
+            example["weight"] = example.weight / mean_weight
+    return examples
+
+
+def example_key(example: dspy.Example) -> tuple:
+    return example.personality, canonical_spot(
+        example.hole_cards,
+        (example.flop_board, example.turn_board, example.river_board),
+    )
 
 
 def score(gold: str, pred: str) -> tuple[str, float]:
@@ -216,7 +123,8 @@ def score(gold: str, pred: str) -> tuple[str, float]:
 def metric(example, pred, trace=None, pred_name=None, pred_trace=None):
     """
     Computes a score based on agreement between prediction and
-    gold standard for preflop, flop, turn and river.
+    gold standard for preflop, flop, turn and river, scaled by the
+    example's weight when it has one.
     Returns the score (float).
     """
     preflop_gold = example["preflop_action"]
@@ -231,6 +139,7 @@ def metric(example, pred, trace=None, pred_name=None, pred_trace=None):
     river_feedback, score_river = score(river_gold, pred.river)
 
     total = (score_preflop + score_flop + score_turn + score_river) / 4
+    total *= example.get("weight", 1.0)
 
     if pred_name is None:
         return total
@@ -248,19 +157,21 @@ def metric(example, pred, trace=None, pred_name=None, pred_trace=None):
     return dspy.Prediction(score=total, feedback=feedback)
 
 
-def optimize(data: Path) -> None:
+def optimize(
+    data: Path, endpoints: list[str] | None = None, valset: Path | None = None
+) -> None:
     random.seed(42)
 
-    lm = dspy.LM(
-        "openai/meta-llama/Llama-3.1-8B-Instruct",
-        api_base="http://localhost:8000/v1",
-        temperature=0.2,
-        api_key="NONE",
-        max_tokens=2048,
-    )
-    dspy.configure(lm=lm)
+    lm = get_dspy_lm(endpoints=endpoints)
 
     train_set, dev_set, test_set = get_datasets(str(data))
+    if valset is not None:
+        # A coreset from scripts/coreset.py replaces the dev split, and its
+        # hands are kept out of training and testing.
+        dev_set = get_examples(str(valset))
+        held_out = {example_key(example) for example in dev_set}
+        train_set = [e for e in train_set if example_key(e) not in held_out]
+        test_set = [e for e in test_set if example_key(e) not in held_out]
 
     program = PokerModule()
 
@@ -279,22 +190,25 @@ def optimize(data: Path) -> None:
         valset=dev_set,
     )
 
-    evaluate = dspy.Evaluate(
-        devset=test_set,
-        metric=metric,
-        num_threads=16,
-        display_table=True,
-        display_progress=True,
-    )
-
-    evaluate(optimized_program)
     print(optimized_program.detailed_results)
 
     personality = str(data).replace("data/", "").replace(".json", "")
     path = Path("./programs/")
     path.mkdir(parents=True, exist_ok=True)
-    program = optimized_program
-    optimized_program.save(f"{path}/gepa_{personality}.json")
+    program_path = path / f"gepa_{personality}.json"
+    optimized_program.save(str(program_path))
+
+    # Test-split scores land in the evaluation store, where
+    # scripts/evaluate.py can compare them with other programs.
+    with ResultStore() as store:
+        (summary,) = evaluate(
+            store,
+            {program_key(program_path, "cot", DEFAULT_MODEL): optimized_program},
+            test_set,
+            metric,
+            num_threads=16,
+        )
+    print(summary)
 
 
 if __name__ == "__main__":
@@ -304,6 +218,20 @@ if __name__ == "__main__":
         "data", type=Path, help="The path to the generated personality data"
     )
 
+    parser.add_argument(
+        "--endpoints",
+        type=lambda text: text.split(","),
+        default=None,
+        help="Comma-separated OpenAI-compatible API bases to spread calls over",
+    )
+
+    parser.add_argument(
+        "--valset",
+        type=Path,
+        default=None,
+        help="A coreset from scripts/coreset.py to validate on instead of the dev split",
+    )
+
     args = parser.parse_args()
 
-    optimize(data=args.data)
+    optimize(data=args.data, endpoints=args.endpoints, valset=args.valset)
@@ -0,0 +1,114 @@
+import argparse
+import uuid
+from pathlib import Path
+
+import dspy
+import pandas as pd
+
+from dspy_optimize import get_datasets, get_examples, metric
+from turing_holdem.dspy_modules import (
+    DEFAULT_MODEL,
+    get_dspy_lm,
+    load_dspy_program,
+    parse_modes,
+)
+from turing_holdem.evaluation import (
+    DEFAULT_STORE_PATH,
+    ResultStore,
+    evaluate,
+    program_key,
+)
+
+dspy.configure_cache(
+    enable_disk_cache=False,
+    enable_memory_cache=False,
+)
+
+SPLITS = ("train", "dev", "test", "all")
+
+
+def examples_for(
+    program: Path, data: Path | None, split: str, seed: int, limit: int | None
+) -> list[dspy.Example]:
+    """
+    The split of ``data``, or of the personality data the program was
+    optimised on.
+    """
+    data = data or Path("data") / f"{program.stem.removeprefix('gepa_')}.json"
+    if split == "all":
+        examples = get_examples(str(data))
+    else:
+        examples = get_datasets(str(data), seed=seed)[SPLITS.index(split)]
+    return examples[:limit]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Score programs on a dataset split, resuming from the "
+        "per-example results of earlier runs"
+    )
+    parser.add_argument(
+        "programs",
+        type=Path,
+        nargs="*",
+        help="Program files, all of programs/ by default",
+    )
+    parser.add_argument(
+        "--data",
+        type=Path,
+        default=None,
+        help="Data to score every program on, instead of each program's own",
+    )
+    parser.add_argument("--split", choices=SPLITS, default="test")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the split")
+    parser.add_argument("--limit", type=int, default=None, help="Examples per program")
+    parser.add_argument(
+        "--mode", default="cot", help="Inference modes, as for `poker play`"
+    )
+    parser.add_argument(
+        "--endpoints",
+        type=lambda text: text.split(","),
+        default=None,
+        help="Comma-separated OpenAI-compatible API bases to spread calls over",
+    )
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--num-threads", type=int, default=16)
+    parser.add_argument(
+        "--store",
+        type=Path,
+        default=DEFAULT_STORE_PATH,
+        help="SQLite file of per-example results",
+    )
+    args = parser.parse_args()
+
+    get_dspy_lm(args.model, args.endpoints)
+    programs = args.programs or sorted(Path("programs").glob("*.json"))
+
+    summaries = []
+    with ResultStore(args.store) as store:
+        # Programs scored on the same examples share one pool.
+        groups: dict[Path, dict[str, dspy.Module]] = {}
+        examples: dict[Path, list[dspy.Example]] = {}
+        for path in programs:
+            data = args.data or path
+            if data not in examples:
+                examples[data] = examples_for(
+                    path, args.data, args.split, args.seed, args.limit
+                )
+            key = program_key(path, args.mode, args.model)
+            groups.setdefault(data, {})[key] = load_dspy_program(
+                path, parse_modes(args.mode)
+            )
+        for group, group_programs in groups.items():
+            summaries += evaluate(
+                store, group_programs, examples[group], metric, args.num_threads
+            )
+
+    summary = pd.DataFrame([score.model_dump() for score in summaries])
+    print(summary.to_string(index=False))
+
+    reports_dir = Path("reports")
+    reports_dir.mkdir(parents=True, exist_ok=True)
+    summary.to_csv(
+        reports_dir / f"evaluation_{str(uuid.uuid4())[:10]}.csv", index=False
+    )
@@ -1,22 +1,32 @@
+import argparse
+import uuid
+from dataclasses import asdict, dataclass
 from enum import Enum
-from typing import Annotated
+from pathlib import Path
+from typing import Annotated, Any, Callable
+import numpy as np
 from pokerkit import (
-    Card,
-    calculate_hand_strength,
     Automation,
+    Card,
     NoLimitTexasHoldem,
-    Deck,
-    StandardHighHand,
 )
-from concurrent.futures import ProcessPoolExecutor
-from pydantic import AfterValidator, BaseModel
-from turing_holdem.utils import Action, Personalities
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pydantic import AfterValidator, BaseModel, ConfigDict
+from turing_holdem.cache import EquityCache
+from turing_holdem.cards import encode, format_cards
+from turing_holdem.equity import Estimate, StopReason, adaptive_hand_strength
+from turing_holdem.logs import configure_logging, log_action
+from turing_holdem.policy import RANGE_LABEL_WEIGHTS
+from turing_holdem.ranges import cached_range_weights, range_equity
+from turing_holdem.utils import Action, Personalities, Personality
+from turing_holdem.work_queue import WorkQueue, run_worker
 from loguru import logger
 
 
 class Stats(BaseModel):
     count: int
     averages: dict[str, float]
+    samples: dict[str, int] = {}
 
 
 class StreetType(str, Enum):
@@ -26,14 +36,19 @@ class StreetType(str, Enum):
     RIVER = "River"
 
 
-class Street(BaseModel):
+# Streets and simulations are built in the inner loop, so they are plain
+# slotted dataclasses; pydantic validates them only when ``Data`` is built
+# from them or read from a file.
+@dataclass(slots=True)
+class Street:
     street: StreetType
     board: str
     hand_strength: Annotated[float, AfterValidator(lambda x: x if x > 0.0 else 0.0)]
     action: Action
 
 
-class Simulation(BaseModel):
+@dataclass(slots=True)
+class Simulation:
     personality: str
     hole_cards: str
     preflop: Street
@@ -43,198 +58,373 @@ class Simulation(BaseModel):
 
 
 class Data(BaseModel):
+    # Validate (and clamp) the simulations handed in as dataclasses too.
+    model_config = ConfigDict(revalidate_instances="always")
+
     name: str
     simulations: list[Simulation] = []
 
 
-def normalize_frozenset(frozen: str) -> str:
-    return frozen.replace("frozenset", "").replace("{", "").replace("}", "")
+PLAYER_COUNT = 6
+STARTING_STACK = 2000
+BLINDS = (25, 50)
+MIN_BET = 50
+SIMULATIONS = 1024
+
+
+def opponent_ranges(personality: Personality) -> list[np.ndarray]:
+    """
+    The weighted ranges of the other personalities at the table.
+    """
+    return [
+        cached_range_weights(opponent, RANGE_LABEL_WEIGHTS)
+        for opponent in Personalities().personalities
+        if opponent.name != personality.name
+    ]
+
+
+def estimate(
+    hole_cards: list[Card],
+    board: list[Card],
+    hole_dealing_count: int,
+    board_dealing_count: int,
+    personality: Personality,
+    executor: Executor,
+    cache: EquityCache,
+    ranges: list[np.ndarray] | None,
+) -> Estimate:
+    """
+    Hand strength by Monte Carlo against random hands or, with ``ranges``,
+    the equity against one opponent holding each range.
+    """
+    if ranges is None:
+        return adaptive_hand_strength(
+            PLAYER_COUNT,
+            hole_cards,
+            board,
+            hole_dealing_count,
+            board_dealing_count,
+            bias=personality.bias,
+            executor=executor,
+            cache=cache,
+        )
+    return Estimate(
+        strength=range_equity(encode(hole_cards), encode(board), ranges),
+        samples=0,
+        stderr=0.0,
+        reason=StopReason.RANGE,
+    )
+
+
+def simulate(
+    personality: Personality,
+    executor: Executor,
+    cache: EquityCache,
+    ranges: list[np.ndarray] | None = None,
+) -> tuple[Simulation, dict[str, int]]:
+    """
+    Deal one hand and record the personality's action on every street,
+    with the Monte-Carlo samples each street needed (none against
+    ``ranges``).
+    """
+    state = NoLimitTexasHoldem.create_state(
+        (  # pyright: ignore
+            Automation.ANTE_POSTING,
+            Automation.BET_COLLECTION,
+            Automation.BLIND_OR_STRADDLE_POSTING,
+            Automation.CARD_BURNING,
+            Automation.HOLE_DEALING,
+            Automation.HOLE_CARDS_SHOWING_OR_MUCKING,
+            Automation.HAND_KILLING,
+            Automation.CHIPS_PULLING,
+            Automation.RUNOUT_COUNT_SELECTION,  # Cash-game only
+        ),
+        True,  # Uniform antes?
+        0,  # Antes
+        BLINDS,  # Blinds or straddles
+        MIN_BET,  # Min-bet
+        tuple([STARTING_STACK for _ in range(PLAYER_COUNT)]),  # Starting stacks
+        PLAYER_COUNT,  # Number of players
+    )
 
+    board = [cards[0] for cards in state.board_cards]
+    preflop_estimate = estimate(
+        state.hole_cards[0],
+        board,
+        2,
+        5,
+        personality,
+        executor,
+        cache,
+        ranges,
+    )
+    hand_strength = preflop_estimate.strength + personality.bias
+    preflop: Street = Street(
+        street=StreetType.PREFLOP,
+        board=format_cards(encode(board)),
+        hand_strength=round(hand_strength, 2),
+        action=personality.act(hand_strength),
+    )
 
-def generate_data() -> None:
-    PLAYER_COUNT = 6
-    STARTING_STACK = 2000
-    BLINDS = (25, 50)
-    MIN_BET = 50
+    [state.check_or_call() for _ in range(PLAYER_COUNT)]
+    state.deal_board()
+    board = [cards[0] for cards in state.board_cards]
+    flop_estimate = estimate(
+        state.hole_cards[0],
+        board,
+        PLAYER_COUNT,
+        len(state.board_cards),
+        personality,
+        executor,
+        cache,
+        ranges,
+    )
+    hand_strength = flop_estimate.strength + personality.bias
+    flop: Street = Street(
+        street=StreetType.FLOP,
+        board=format_cards(encode(board)),
+        hand_strength=round(hand_strength, 2),
+        action=personality.act(hand_strength),
+    )
+
+    [state.check_or_call() for _ in range(PLAYER_COUNT)]
+    state.deal_board()
+    board = [cards[0] for cards in state.board_cards]
+    turn_estimate = estimate(
+        state.hole_cards[0],
+        board,
+        2,
+        5,
+        personality,
+        executor,
+        cache,
+        ranges,
+    )
+    hand_strength = turn_estimate.strength + personality.bias
+    turn: Street = Street(
+        street=StreetType.TURN,
+        board=format_cards(encode(board)),
+        hand_strength=round(hand_strength, 2),
+        action=personality.act(hand_strength),
+    )
+
+    [state.check_or_call() for _ in range(PLAYER_COUNT)]
+    state.deal_board()
+    board = [cards[0] for cards in state.board_cards]
+    river_estimate = estimate(
+        state.hole_cards[0],
+        board,
+        2,
+        5,
+        personality,
+        executor,
+        cache,
+        ranges,
+    )
+    hand_strength = river_estimate.strength + personality.bias
+    river: Street = Street(
+        street=StreetType.RIVER,
+        board=format_cards(encode(board)),
+        hand_strength=round(hand_strength, 2),
+        action=personality.act(hand_strength),
+    )
+    simulation = Simulation(
+        personality=personality.name,
+        hole_cards=format_cards(encode(state.hole_cards[0])),
+        preflop=preflop,
+        flop=flop,
+        turn=turn,
+        river=river,
+    )
+    samples = {
+        "preflop": preflop_estimate.samples,
+        "flop": flop_estimate.samples,
+        "turn": turn_estimate.samples,
+        "river": river_estimate.samples,
+    }
+    log_action(
+        "Samples: preflop={preflop} ({preflop_reason}), flop={flop} ({flop_reason}), "
+        "turn={turn} ({turn_reason}), river={river} ({river_reason})",
+        preflop_reason=preflop_estimate.reason.value,
+        flop_reason=flop_estimate.reason.value,
+        turn_reason=turn_estimate.reason.value,
+        river_reason=river_estimate.reason.value,
+        **samples,
+    )
+    return simulation, samples
+
+
+def write_data(data: Data, samples: dict[str, int]) -> None:
+    with open(f"data/{data.name}.json", "w") as file:
+        file.write(data.model_dump_json())
+
+    count = len(data.simulations)
+    preflop_sum: float = 0.0
+    flop_sum: float = 0.0
+    turn_sum: float = 0.0
+    river_sum: float = 0.0
+    for simulation in data.simulations:
+        preflop_sum += simulation.preflop.hand_strength
+        flop_sum += simulation.flop.hand_strength
+        turn_sum += simulation.turn.hand_strength
+        river_sum += simulation.river.hand_strength
+
+    stats = Stats(
+        count=count,
+        averages={
+            "preflop_avg": preflop_sum / count,
+            "flop_avg": flop_sum / count,
+            "turn_avg": turn_sum / count,
+            "river_avg": river_sum / count,
+        },
+        samples=samples,
+    )
+
+    with open(f"data/{data.name}_summary.json", "w") as file:
+        file.write(stats.model_dump_json())
+
+
+def generate_data(use_ranges: bool = False) -> None:
+    cache = EquityCache()
 
     for personality in Personalities().personalities:
         logger.info("")
         logger.info(f"Generating data for {personality.name}")
         logger.info("")
 
-        data = Data(name=personality.name)
+        simulations: list[Simulation] = []
+        samples: dict[str, int] = {}
 
         with ProcessPoolExecutor() as executor:
-            for idx in range(1024):
-                logger.info(f"Simulation {idx + 1} [{personality.name}]")
-                state = NoLimitTexasHoldem.create_state(
-                    (  # pyright: ignore
-                        Automation.ANTE_POSTING,
-                        Automation.BET_COLLECTION,
-                        Automation.BLIND_OR_STRADDLE_POSTING,
-                        Automation.CARD_BURNING,
-                        Automation.HOLE_DEALING,
-                        Automation.HOLE_CARDS_SHOWING_OR_MUCKING,
-                        Automation.HAND_KILLING,
-                        Automation.CHIPS_PULLING,
-                        Automation.RUNOUT_COUNT_SELECTION,  # Cash-game only
-                    ),
-                    True,  # Uniform antes?
-                    0,  # Antes
-                    BLINDS,  # Blinds or straddles
-                    MIN_BET,  # Min-bet
-                    tuple(
-                        [STARTING_STACK for _ in range(PLAYER_COUNT)]
-                    ),  # Starting stacks
-                    PLAYER_COUNT,  # Number of players
-                )
-
-                board = frozenset(
-                    Card.parse(
-                        "".join([str(card[0])[-3:-1] for card in state.board_cards])
-                    )
-                )
-                hand_strength = (
-                    calculate_hand_strength(
-                        player_count=PLAYER_COUNT,
-                        hole_range=[[card for card in state.hole_cards[0]]],
-                        board_cards=board,
-                        hole_dealing_count=2,
-                        board_dealing_count=5,
-                        deck=Deck.STANDARD,  # pyright: ignore
-                        hand_types=(StandardHighHand,),
-                        sample_count=100,
-                        executor=executor,
-                    )
-                    + personality.bias
+            for idx in range(SIMULATIONS):
+                log_action(
+                    "Simulation {simulation} [{personality}]",
+                    simulation=idx + 1,
+                    personality=personality.name,
                 )
-                preflop: Street = Street(
-                    street=StreetType.PREFLOP,
-                    board=normalize_frozenset(str(board)),
-                    hand_strength=round(hand_strength, 2),
-                    action=personality.act(hand_strength),
+                simulation, hand_samples = simulate(
+                    personality,
+                    executor,
+                    cache,
+                    opponent_ranges(personality) if use_ranges else None,
                 )
+                simulations.append(simulation)
+                for street, count in hand_samples.items():
+                    samples[street] = samples.get(street, 0) + count
+        write_data(Data(name=personality.name, simulations=simulations), samples)
 
-                [state.check_or_call() for _ in range(PLAYER_COUNT)]
-                state.deal_board()
-                board = frozenset(
-                    Card.parse(
-                        "".join([str(card[0])[-3:-1] for card in state.board_cards])
-                    )
-                )
-                hand_strength = (
-                    calculate_hand_strength(
-                        player_count=PLAYER_COUNT,
-                        hole_range=[[card for card in state.hole_cards[0]]],
-                        board_cards=board,
-                        hole_dealing_count=PLAYER_COUNT,
-                        board_dealing_count=len(state.board_cards),
-                        deck=Deck.STANDARD,  # pyright: ignore
-                        hand_types=(StandardHighHand,),
-                        sample_count=100,
-                        executor=executor,
-                    )
-                    + personality.bias
-                )
-                flop: Street = Street(
-                    street=StreetType.FLOP,
-                    board=normalize_frozenset(str(board)),
-                    hand_strength=round(hand_strength, 2),
-                    action=personality.act(hand_strength),
-                )
+    cache.close()
 
-                [state.check_or_call() for _ in range(PLAYER_COUNT)]
-                state.deal_board()
-                board = frozenset(
-                    Card.parse(
-                        "".join([str(card[0])[-3:-1] for card in state.board_cards])
-                    )
-                )
-                hand_strength = (
-                    calculate_hand_strength(
-                        player_count=PLAYER_COUNT,
-                        hole_range=[[card for card in state.hole_cards[0]]],
-                        board_cards=board,
-                        hole_dealing_count=2,
-                        board_dealing_count=5,
-                        deck=Deck.STANDARD,  # pyright: ignore
-                        hand_types=(StandardHighHand,),
-                        sample_count=100,
-                        executor=executor,
-                    )
-                    + personality.bias
-                )
-                turn: Street = Street(
-                    street=StreetType.TURN,
-                    board=normalize_frozenset(str(board)),
-                    hand_strength=round(hand_strength, 2),
-                    action=personality.act(hand_strength),
-                )
 
-                [state.check_or_call() for _ in range(PLAYER_COUNT)]
-                state.deal_board()
-                board = frozenset(
-                    Card.parse(
-                        "".join([str(card[0])[-3:-1] for card in state.board_cards])
-                    )
-                )
-                hand_strength = (
-                    calculate_hand_strength(
-                        player_count=PLAYER_COUNT,
-                        hole_range=[[card for card in state.hole_cards[0]]],
-                        board_cards=board,
-                        hole_dealing_count=2,
-                        board_dealing_count=5,
-                        deck=Deck.STANDARD,  # pyright: ignore
-                        hand_types=(StandardHighHand,),
-                        sample_count=100,
-                        executor=executor,
-                    )
-                ) + personality.bias
-                river: Street = Street(
-                    street=StreetType.RIVER,
-                    board=normalize_frozenset(str(board)),
-                    hand_strength=round(hand_strength, 2),
-                    action=personality.act(hand_strength),
-                )
-                simulation = Simulation(
-                    personality=personality.name,
-                    hole_cards=str(state.hole_cards[0])
-                    .replace("[", "(")
-                    .replace("]", ")"),
-                    preflop=preflop,
-                    flop=flop,
-                    turn=turn,
-                    river=river,
-                )
-                data.simulations.append(simulation)
-        with open(f"data/{personality.name}.json", "w") as file:
-            file.write(data.model_dump_json())
-
-        count = len(data.simulations)
-        preflop_sum: float = 0.0
-        flop_sum: float = 0.0
-        turn_sum: float = 0.0
-        river_sum: float = 0.0
-        for simulation in data.simulations:
-            preflop_sum += simulation.preflop.hand_strength
-            flop_sum += simulation.flop.hand_strength
-            turn_sum += simulation.turn.hand_strength
-            river_sum += simulation.river.hand_strength
-
-        stats = Stats(
-            count=count,
-            averages={
-                "preflop_avg": preflop_sum / count,
-                "flop_avg": flop_sum / count,
-                "turn_avg": turn_sum / count,
-                "river_avg": river_sum / count,
-            },
+def simulate_range(payload: dict, heartbeat: Callable[[], Any]) -> dict:
+    """
+    Work-queue handler: ``count`` simulations for one personality.
+    """
+    personality = next(
+        p for p in Personalities().personalities if p.name == payload["personality"]
+    )
+    ranges = opponent_ranges(personality) if payload.get("ranges") else None
+    simulations = []
+    samples: dict[str, int] = {}
+    with EquityCache() as cache, ProcessPoolExecutor() as executor:
+        for idx in range(payload["count"]):
+            log_action(
+                "Simulation {simulation} [{personality}]",
+                simulation=payload["start"] + idx + 1,
+                personality=personality.name,
+            )
+            simulation, hand_samples = simulate(personality, executor, cache, ranges)
+            simulations.append(asdict(simulation))
+            for street, count in hand_samples.items():
+                samples[street] = samples.get(street, 0) + count
+            heartbeat()
+    return {
+        "personality": personality.name,
+        "simulations": simulations,
+        "samples": samples,
+    }
+
+
+def coordinate(queue_path: Path, chunk: int, use_ranges: bool = False) -> None:
+    """
+    Queue every personality's simulations in chunks, wait for the workers
+    and write the merged data files.
+    """
+    job = f"data_{str(uuid.uuid4())[:10]}"
+    with WorkQueue(queue_path) as queue:
+        queue.submit(
+            job,
+            "simulations",
+            [
+                {
+                    "personality": personality.name,
+                    "start": start,
+                    "count": min(chunk, SIMULATIONS - start),
+                    "ranges": use_ranges,
+                }
+                for personality in Personalities().personalities
+                for start in range(0, SIMULATIONS, chunk)
+            ],
         )
+        logger.info(f"Queued job {job} in {queue_path}")
+        queue.wait(job)
+        results = queue.results(job)
 
-        with open(f"data/{personality.name}_summary.json", "w") as file:
-            file.write(stats.model_dump_json())
+    for personality in Personalities().personalities:
+        simulations: list[dict[str, Any]] = []
+        samples: dict[str, int] = {}
+        for result in results:
+            if result["personality"] != personality.name:
+                continue
+            simulations.extend(result["simulations"])
+            for street, count in result["samples"].items():
+                samples[street] = samples.get(street, 0) + count
+        data = Data.model_validate(
+            {"name": personality.name, "simulations": simulations}
+        )
+        if data.simulations:
+            write_data(data, samples)
 
 
 if __name__ == "__main__":
-    generate_data()
+    parser = argparse.ArgumentParser(
+        description="Generate personality training data from simulated hands"
+    )
+    parser.add_argument(
+        "--coordinate",
+        type=Path,
+        metavar="QUEUE",
+        help="Queue the simulations for workers and merge their results",
+    )
+    parser.add_argument(
+        "--work",
+        type=Path,
+        metavar="QUEUE",
+        help="Run queued simulations until the queue is drained",
+    )
+    parser.add_argument(
+        "--chunk", type=int, default=64, help="Simulations per queued task"
+    )
+    parser.add_argument(
+        "--ranges",
+        action="store_true",
+        help="Label hands by equity against the other personalities' ranges "
+        "instead of against random hands",
+    )
+    parser.add_argument(
+        "--log-level", default="ACTION", help="INFO hides per-simulation lines"
+    )
+    parser.add_argument(
+        "--log-json", action="store_true", help="Write JSON log records"
+    )
+    args = parser.parse_args()
+
+    configure_logging(args.log_level, args.log_json)
+
+    if args.coordinate:
+        coordinate(args.coordinate, args.chunk, args.ranges)
+    elif args.work:
+        with WorkQueue(args.work) as queue:
+            run_worker(queue, {"simulations": simulate_range})
+    else:
+        generate_data(args.ranges)
@@ -0,0 +1,196 @@
+import argparse
+import http.client
+import json
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import dspy
+import pandas as pd
+from loguru import logger
+
+from dspy_optimize import get_datasets
+from turing_holdem.dspy_modules import (
+    DEFAULT_ENDPOINT,
+    DEFAULT_MODEL,
+    STREETS,
+    InferenceMode,
+    PrefixCacheChatAdapter,
+    load_dspy_program,
+)
+
+LAYOUTS = {"default": dspy.ChatAdapter(), "prefix": PrefixCacheChatAdapter()}
+
+
+def shared_prefix(first: str, second: str) -> int:
+    length = 0
+    for a, b in zip(first, second):
+        if a != b:
+            break
+        length += 1
+    return length
+
+
+def prompts(
+    data: list[Path], mode: InferenceMode, limit: int | None, seed: int
+) -> dict[str, list[tuple[str, str]]]:
+    """
+    The system and user text of every street request over the test split,
+    in playing order, under each layout.
+    """
+    requests: dict[str, list[tuple[str, str]]] = {layout: [] for layout in LAYOUTS}
+    for path in data:
+        personality = path.stem
+        _, _, test_set = get_datasets(str(path), seed=seed)
+        program = load_dspy_program(Path(f"programs/gepa_{personality}.json"))
+        for example in test_set[:limit]:
+            for street in STREETS:
+                predict = getattr(program, f"{street}_module").predict
+                signature = predict.signature
+                if mode == InferenceMode.DIRECT:
+                    signature = signature.delete("reasoning")
+                inputs = {
+                    "personality": example.personality,
+                    "hole_cards": example.hole_cards,
+                    "street": example[f"{street}_street"],
+                    "board": example[f"{street}_board"],
+                }
+                for layout, adapter in LAYOUTS.items():
+                    messages = adapter.format(signature, predict.demos, inputs)
+                    requests[layout].append(
+                        (messages[0]["content"], messages[-1]["content"])
+                    )
+    return requests
+
+
+def first_token(
+    endpoint: str, model: str, system: str, user: str
+) -> tuple[float, dict]:
+    """
+    Seconds until the first streamed chunk of a one-token completion, and
+    the usage the server reports for it.
+    """
+    parts = urlsplit(endpoint)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=600)
+    body = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user},
+        ],
+        "max_tokens": 1,
+        "temperature": 0.0,
+        "stream": True,
+        "stream_options": {"include_usage": True},
+    }
+    start = time.perf_counter()
+    connection.request(
+        "POST",
+        f"{parts.path.rstrip('/')}/chat/completions",
+        json.dumps(body),
+        {"Content-Type": "application/json"},
+    )
+    response = connection.getresponse()
+    ttft = None
+    usage: dict = {}
+    for line in response:
+        line = line.strip()
+        if not line:
+            continue
+        if ttft is None:
+            ttft = time.perf_counter() - start
+        payload = line.removeprefix(b"data: ")
+        if payload == b"[DONE]":
+            break
+        # Servers that ignore ``stream`` answer with one JSON body.
+        usage = json.loads(payload).get("usage") or usage
+    connection.close()
+    return ttft or time.perf_counter() - start, usage
+
+
+def measure(
+    requests: dict[str, list[tuple[str, str]]],
+    endpoint: str | None,
+    model: str,
+) -> pd.DataFrame:
+    rows = []
+    for layout, texts in requests.items():
+        logger.info(f"{layout}: {len(texts)} requests")
+        previous: dict[int, str] = {}
+        for idx, (system, user) in enumerate(texts):
+            prompt = system + user
+            # Requests to the same street module share a system message.
+            street = idx % len(STREETS)
+            row = {
+                "layout": layout,
+                "street": STREETS[street],
+                "prompt_chars": len(prompt),
+                "shared_prefix_chars": shared_prefix(previous.get(street, ""), prompt),
+            }
+            previous[street] = prompt
+            if endpoint is not None:
+                ttft, usage = first_token(endpoint, model, system, user)
+                details = usage.get("prompt_tokens_details") or {}
+                row |= {
+                    "ttft_seconds": ttft,
+                    "prompt_tokens": usage.get("prompt_tokens"),
+                    "cached_tokens": details.get("cached_tokens"),
+                }
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare prompt prefixes and time to first token of the "
+        "default and prefix-cache prompt layouts"
+    )
+    parser.add_argument(
+        "data",
+        type=Path,
+        nargs="*",
+        help="Personality data files, all of data/ by default",
+    )
+    parser.add_argument(
+        "--mode",
+        type=InferenceMode,
+        default=InferenceMode.COT,
+        help="cot or direct prompts",
+    )
+    parser.add_argument(
+        "--limit", type=int, default=50, help="Test hands per personality"
+    )
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the split")
+    parser.add_argument("--endpoint", default=DEFAULT_ENDPOINT)
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Only compare the prompts, without sending them",
+    )
+    args = parser.parse_args()
+
+    data = args.data or [
+        path
+        for path in sorted(Path("data").glob("*.json"))
+        if Path(f"programs/gepa_{path.stem}.json").exists()
+    ]
+    results = measure(
+        prompts(data, args.mode, args.limit, args.seed),
+        None if args.offline else args.endpoint,
+        args.model,
+    )
+    columns = [c for c in results.columns if c not in ("layout", "street")]
+    summary = results.groupby("layout")[columns].agg(["mean", "median"])
+    if "ttft_seconds" in results:
+        summary[("ttft_seconds", "p95")] = results.groupby("layout")[
+            "ttft_seconds"
+        ].quantile(0.95)
+    print(summary.to_string())
+
+    reports_dir = Path("reports")
+    reports_dir.mkdir(parents=True, exist_ok=True)
+    results.to_csv(
+        reports_dir / f"prefix_cache_{str(uuid.uuid4())[:10]}.csv", index=False
+    )
@@ -12,4 +12,4 @@ export UV_CACHE_DIR=/data/matthewflynn/.cache/uv
 
 uv sync
 
-uv run poker --hands $1
+uv run poker play --hands $1
@@ -0,0 +1,169 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from pokerkit import Card
+
+from .cards import canonicalize, encode
+
+MAGIC = b"THEQ0001"
+HEADER = struct.Struct("<8sI")
+# key, strength, samples, referenced, used, clock hand (first way only)
+SLOT = struct.Struct("<16sdIBBBx")
+KEY_SIZE = 16
+REFERENCED = 28
+USED = 29
+HAND = 30
+WAYS = 8
+
+DEFAULT_CACHE_PATH = Path(".cache/equity.bin")
+
+
+def canonical_key(
+    hole_cards: Iterable[Card],
+    board_cards: Iterable[Card],
+    player_count: int,
+    hole_dealing_count: int,
+    board_dealing_count: int,
+) -> bytes:
+    """
+    Encode a spot so that every suit relabelling of it maps to the same key,
+    since equity against random hands does not depend on which suit is which.
+    """
+    hole, board = canonicalize(encode(hole_cards), encode(board_cards))
+
+    key = bytes(
+        [
+            player_count,
+            hole_dealing_count,
+            board_dealing_count,
+            len(hole),
+            len(board),
+            *hole,
+            *board,
+        ]
+    )
+    return key.ljust(KEY_SIZE, b"\xff")
+
+
+class EquityCache:
+    """
+    Fixed-size equity table in an mmap'd file.
+
+    The table is set-associative: a key hashes to a set of ``WAYS`` slots
+    and a full set evicts with the clock algorithm. Every process that
+    opens the same file reads and fills the same table, with ``flock``
+    guarding writes, and the file persists between runs.
+    """
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, slots: int = 1 << 16):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        size = HEADER.size + slots * SLOT.size
+
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        with self._lock(fcntl.LOCK_EX):
+            if os.fstat(self._fd).st_size == 0:
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, HEADER.pack(MAGIC, slots), 0)
+            magic, slots = HEADER.unpack(os.pread(self._fd, HEADER.size, 0))
+            if magic != MAGIC:
+                raise ValueError(f"Not an equity cache: {self.path}")
+
+        self.slots = slots
+        self.sets = max(slots // WAYS, 1)
+        self._map = mmap.mmap(self._fd, HEADER.size + slots * SLOT.size)
+
+    def __reduce__(self):
+        return (EquityCache, (self.path, self.slots))
+
+    def __enter__(self) -> "EquityCache":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._map.flush()
+        self._map.close()
+        os.close(self._fd)
+
+    @contextmanager
+    def _lock(self, operation: int) -> Iterator[None]:
+        fcntl.flock(self._fd, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _offsets(self, key: bytes) -> list[int]:
+        digest = hashlib.blake2b(key, digest_size=8).digest()
+        first = (int.from_bytes(digest, "little") % self.sets) * WAYS
+        return [HEADER.size + (first + way) * SLOT.size for way in range(WAYS)]
+
+    def get(self, key: bytes) -> tuple[float, int] | None:
+        with self._lock(fcntl.LOCK_SH):
+            for offset in self._offsets(key):
+                stored, strength, samples, _, used, _ = SLOT.unpack_from(
+                    self._map, offset
+                )
+                if used and stored == key:
+                    # Setting the reference bit is a single byte, so a racing
+                    # reader can at worst lose one clock tick.
+                    self._map[offset + REFERENCED] = 1
+                    return strength, samples
+        return None
+
+    def add(self, key: bytes, strength: float, samples: int) -> tuple[float, int]:
+        """
+        Merge ``samples`` new samples averaging ``strength`` into the entry
+        for ``key`` and return the combined estimate.
+        """
+        with self._lock(fcntl.LOCK_EX):
+            offsets = self._offsets(key)
+            victim: int | None = None
+            for offset in offsets:
+                stored, old_strength, old_samples, _, used, _ = SLOT.unpack_from(
+                    self._map, offset
+                )
+                if used and stored == key:
+                    total = old_samples + samples
+                    strength = (old_strength * old_samples + strength * samples) / total
+                    self._write(offset, key, strength, total)
+                    return strength, total
+                if not used and victim is None:
+                    victim = offset
+
+            if victim is None:
+                victim = self._evict(offsets)
+            self._write(victim, key, strength, samples)
+            return strength, samples
+
+    def _write(self, offset: int, key: bytes, strength: float, samples: int) -> None:
+        self._map[offset : offset + HAND] = SLOT.pack(key, strength, samples, 1, 1, 0)[
+            :HAND
+        ]
+
+    def _evict(self, offsets: list[int]) -> int:
+        hand_offset = offsets[0] + HAND
+        hand = self._map[hand_offset]
+        while True:
+            offset = offsets[hand]
+            hand = (hand + 1) % WAYS
+            if self._map[offset + REFERENCED]:
+                self._map[offset + REFERENCED] = 0
+            else:
+                self._map[hand_offset] = hand
+                return offset
+
+    def __len__(self) -> int:
+        with self._lock(fcntl.LOCK_SH):
+            return sum(
+                self._map[HEADER.size + idx * SLOT.size + USED]
+                for idx in range(self.slots)
+            )
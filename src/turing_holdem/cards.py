@@ -0,0 +1,75 @@
+import re
+from itertools import permutations
+from typing import Iterable
+
+from pokerkit import Card
+
+# Cards are encoded as ``rank * 4 + suit`` so that ``card // 4`` is the rank
+# (deuce is 0, ace is 12) and ``card % 4`` is the suit.
+RANKS = "23456789TJQKA"
+SUITS = "cdhs"
+
+CARD_STRINGS: tuple[str, ...] = tuple(rank + suit for rank in RANKS for suit in SUITS)
+CARDS: tuple[Card, ...] = tuple(
+    card for text in CARD_STRINGS for card in Card.parse(text)
+)
+CARD_INDEX: dict[Card, int] = {card: idx for idx, card in enumerate(CARDS)}
+STRING_INDEX: dict[str, int] = {text: idx for idx, text in enumerate(CARD_STRINGS)}
+
+SUIT_PERMUTATIONS: tuple[tuple[int, ...], ...] = tuple(permutations(range(4)))
+
+_CARD_PATTERN = re.compile(r"[2-9TJQKA][cdhs]")
+
+
+def encode(cards: Iterable[Card]) -> tuple[int, ...]:
+    return tuple(CARD_INDEX[card] for card in cards)
+
+
+def decode(cards: Iterable[int]) -> tuple[Card, ...]:
+    return tuple(CARDS[card] for card in cards)
+
+
+def to_mask(cards: Iterable[int]) -> int:
+    mask = 0
+    for card in cards:
+        mask |= 1 << card
+    return mask
+
+
+def from_mask(mask: int) -> tuple[int, ...]:
+    return tuple(card for card in range(52) if mask >> card & 1)
+
+
+def parse_cards(text: str) -> tuple[int, ...]:
+    """
+    Parse cards from any of the string forms used in the data, e.g.
+    ``"(Kh, 9h)"``, ``"Kh9h"`` or ``"()"``.
+    """
+    return tuple(STRING_INDEX[card] for card in _CARD_PATTERN.findall(text))
+
+
+def format_cards(cards: Iterable[int]) -> str:
+    """
+    Render cards the way the datasets and prompts show them: ``"(Kh, 9h)"``.
+    """
+    return "(" + ", ".join(CARD_STRINGS[card] for card in cards) + ")"
+
+
+def canonicalize(
+    hole_cards: Iterable[int], board_cards: Iterable[int]
+) -> tuple[tuple[int, ...], tuple[int, ...]]:
+    """
+    Relabel suits so that every suit-isomorphic spot maps to the same sorted
+    hole and board cards. All 24 suit permutations are tried and the
+    smallest result wins.
+    """
+    hole = tuple(hole_cards)
+    board = tuple(board_cards)
+
+    return min(
+        (
+            tuple(sorted(card - card % 4 + perm[card % 4] for card in hole)),
+            tuple(sorted(card - card % 4 + perm[card % 4] for card in board)),
+        )
+        for perm in SUIT_PERMUTATIONS
+    )
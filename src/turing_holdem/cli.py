@@ -1,19 +1,43 @@
+import json
+import uuid
+from functools import cache
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, Any, Callable
 import typer
 
+from loguru import logger
+
+from turing_holdem.decision_service import (
+    DEFAULT_DECISION_PORT,
+    DecisionServer,
+    DecisionService,
+)
+from turing_holdem.dspy_modules import get_dspy_lm, parse_modes
+from turing_holdem.hedging import HedgePolicy
+from turing_holdem.logs import ACTION, configure_logging
 from turing_holdem.poker import Poker
+from turing_holdem.routing import Router, parse_routes
+from turing_holdem.simulator import simulate as simulate_hands, whole_decks
+from turing_holdem.stats import StoppingRule
+from turing_holdem.work_queue import DEFAULT_QUEUE_PATH, WorkQueue, run_worker
 
 app = typer.Typer(pretty_exceptions_enable=False)
 
-PROGRAMS = [
-    "programs/gepa_fifteen_percent.json",
-    "programs/gepa_fifty_percent.json",
-    "programs/gepa_nine_percent.json",
-    "programs/gepa_thirty_five_percent.json",
-    "programs/gepa_twenty_five_percent.json",
-    "programs/gepa_twenty_percent.json",
-]
+
+@app.callback()
+def main(
+    log_level: Annotated[
+        str, typer.Option(help="INFO hides the per-street and per-action lines")
+    ] = ACTION,
+    log_json: Annotated[bool, typer.Option(help="Write JSON log records")] = False,
+    action_sample: Annotated[
+        float, typer.Option(help="Fraction of per-action lines to keep")
+    ] = 1.0,
+    log_sync: Annotated[
+        bool, typer.Option(help="Write logs on the caller's thread")
+    ] = False,
+):
+    configure_logging(log_level, log_json, not log_sync, action_sample)
 
 
 @app.command()
@@ -21,8 +45,325 @@ def play(
     hands: Annotated[
         int, typer.Option(prompt="The number of hands to play in this simulation")
     ] = 100,
+    duplicate: Annotated[
+        bool,
+        typer.Option(
+            help="Replay each deck from every seat rotation (hands // 6 decks)"
+        ),
+    ] = False,
+    early_stop: Annotated[
+        bool,
+        typer.Option(
+            help="Stop before the hand budget once the leader is separated "
+            "or the intervals are narrow enough"
+        ),
+    ] = False,
+    confidence: Annotated[
+        float, typer.Option(help="Confidence level of the stopping intervals")
+    ] = 0.99,
+    half_width: Annotated[
+        float | None,
+        typer.Option(help="Also stop once every interval is this narrow"),
+    ] = None,
+    mode: Annotated[
+        str,
+        typer.Option(
+            help="Inference mode (cot, capped or direct) for every street, "
+            "or per street as e.g. preflop=direct,flop=capped"
+        ),
+    ] = "cot",
+    endpoints: Annotated[
+        str | None,
+        typer.Option(
+            help="Comma-separated OpenAI-compatible API bases to spread decisions over"
+        ),
+    ] = None,
+    decision_server: Annotated[
+        str | None,
+        typer.Option(
+            help="URL of a `poker serve` process to ask for decisions instead "
+            "of loading the programs"
+        ),
+    ] = None,
+    routes: Annotated[
+        str | None,
+        typer.Option(
+            help="LM per street or personality, as e.g. "
+            "preflop=small-model@http://gpu1:8000/v1,river=large-model, "
+            "or a JSON routing table file"
+        ),
+    ] = None,
+    deadline: Annotated[
+        float | None,
+        typer.Option(
+            help="Seconds an LM decision may take before the personality's "
+            "rule policy answers instead"
+        ),
+    ] = None,
+    hedge_percentile: Annotated[
+        float | None,
+        typer.Option(
+            help="Send a duplicate request once a decision is slower than this "
+            "percentile of recent ones, e.g. 0.95; not with --decision-server"
+        ),
+    ] = None,
+    prefix_cache: Annotated[
+        bool,
+        typer.Option(
+            help="Lay prompts out so the static part is a stable prefix for "
+            "the server's prefix cache"
+        ),
+    ] = False,
+    range_fallback: Annotated[
+        bool,
+        typer.Option(
+            help="Fall back on equity against the other players' ranges "
+            "instead of the rule strengths; needs --deadline or --hedge-percentile"
+        ),
+    ] = False,
+):
+    rule = (
+        StoppingRule(confidence=confidence, half_width=half_width)
+        if early_stop
+        else None
+    )
+    hedging = _hedge_policy(deadline, hedge_percentile)
+    _check_hedging(hedging, range_fallback, decision_server)
+    Poker.new_game(
+        modes=parse_modes(mode),
+        endpoints=endpoints.split(",") if endpoints else None,
+        decision_server=decision_server,
+        routes=parse_routes(routes) if routes else None,
+        hedging=hedging,
+        prefix_cache=prefix_cache,
+        range_fallback=range_fallback,
+    ).play(hands, duplicate, rule)
+
+
+def _hedge_policy(
+    deadline: float | None, hedge_percentile: float | None
+) -> HedgePolicy | None:
+    if deadline is None and hedge_percentile is None:
+        return None
+    return HedgePolicy(deadline=deadline, hedge_percentile=hedge_percentile)
+
+
+def _check_hedging(
+    hedging: HedgePolicy | None, range_fallback: bool, decision_server: str | None
+) -> None:
+    # The fallback only answers for decisions that miss a deadline or hedge.
+    if range_fallback and hedging is None:
+        raise typer.BadParameter(
+            "needs --deadline or --hedge-percentile", param_hint="--range-fallback"
+        )
+    # The server merges a hedge into the request it duplicates, so it can
+    # never answer sooner.
+    if decision_server is not None and hedging and hedging.hedge_percentile:
+        raise typer.BadParameter(
+            "cannot be used with --decision-server", param_hint="--hedge-percentile"
+        )
+
+
+@app.command()
+def simulate(
+    hands: Annotated[
+        int, typer.Option(help="The number of hands to simulate")
+    ] = 100_000,
+    batch_size: Annotated[int, typer.Option(help="Tables played per batch")] = 100_000,
+    seed: Annotated[int | None, typer.Option(help="Seed for the deck shuffles")] = None,
+    duplicate: Annotated[
+        bool, typer.Option(help="Replay each deck from every seat rotation")
+    ] = False,
+):
+    """
+    Play rule-policy hands on the vectorised simulator, without an LLM.
+    """
+    report = simulate_hands(hands, batch_size, seed, duplicate=duplicate)
+    logger.info(
+        f"Simulated {report.hands} hands in {report.seconds:.2f}s "
+        f"({report.hands / report.seconds:,.0f} hands/s)"
+    )
+    for name, interval in report.intervals.items():
+        logger.info(
+            f"{name}: {interval.estimate:.2%} [{interval.low:.2%}, {interval.high:.2%}]"
+        )
+
+
+@cache
+def _worker_game(config: str) -> Poker:
+    settings = json.loads(config)
+    if settings["rules"]:
+        return Poker.new_rule_game()
+    return Poker.new_game(
+        modes=parse_modes(settings["mode"]),
+        endpoints=settings["endpoints"],
+        decision_server=settings.get("decision_server"),
+        routes=parse_routes(settings["routes"]) if settings.get("routes") else None,
+        hedging=_hedge_policy(
+            settings.get("deadline"), settings.get("hedge_percentile")
+        ),
+        prefix_cache=settings.get("prefix_cache", False),
+        range_fallback=settings.get("range_fallback", False),
+    )
+
+
+def play_hands(payload: dict[str, Any], heartbeat: Callable[[], Any]) -> dict:
+    game = _worker_game(json.dumps(payload["game"], sort_keys=True))
+    return game.play_batch(payload["hands"], payload["duplicate"], heartbeat)
+
+
+@app.command()
+def coordinate(
+    hands: Annotated[int, typer.Option(help="Total hands to play")] = 1000,
+    batch_size: Annotated[int, typer.Option(help="Hands per queued task")] = 60,
+    duplicate: Annotated[
+        bool, typer.Option(help="Replay each deck from every seat rotation")
+    ] = False,
+    rules: Annotated[
+        bool, typer.Option(help="Seat the rule policies instead of the programs")
+    ] = False,
+    mode: Annotated[str, typer.Option(help="Inference mode, as for play")] = "cot",
+    endpoints: Annotated[
+        str | None, typer.Option(help="Comma-separated API bases, as for play")
+    ] = None,
+    decision_server: Annotated[
+        str | None, typer.Option(help="Decision server URL, as for play")
+    ] = None,
+    routes: Annotated[str | None, typer.Option(help="LM routes, as for play")] = None,
+    deadline: Annotated[
+        float | None, typer.Option(help="Decision deadline, as for play")
+    ] = None,
+    hedge_percentile: Annotated[
+        float | None, typer.Option(help="Hedging percentile, as for play")
+    ] = None,
+    prefix_cache: Annotated[
+        bool, typer.Option(help="Prefix-cache prompt layout, as for play")
+    ] = False,
+    range_fallback: Annotated[
+        bool, typer.Option(help="Range-equity fallback, as for play")
+    ] = False,
+    queue: Annotated[Path, typer.Option(help="SQLite queue file")] = DEFAULT_QUEUE_PATH,
+    job: Annotated[
+        str | None, typer.Option(help="Collect an existing job instead")
+    ] = None,
+):
+    """
+    Queue a run as batches of hands for `poker work` processes, wait for
+    them and write one merged report.
+    """
+    _check_hedging(
+        _hedge_policy(deadline, hedge_percentile), range_fallback, decision_server
+    )
+    with WorkQueue(queue) as work_queue:
+        if job is None:
+            job = str(uuid.uuid4())[:10]
+            game = {
+                "rules": rules,
+                "mode": mode,
+                "endpoints": endpoints.split(",") if endpoints else None,
+                "decision_server": decision_server,
+                "routes": routes,
+                "deadline": deadline,
+                "hedge_percentile": hedge_percentile,
+                "prefix_cache": prefix_cache,
+                "range_fallback": range_fallback,
+            }
+            if duplicate:
+                hands, batch_size = whole_decks(hands, batch_size)
+            work_queue.submit(
+                job,
+                "hands",
+                [
+                    {
+                        "game": game,
+                        "hands": min(batch_size, hands - offset),
+                        "duplicate": duplicate,
+                    }
+                    for offset in range(0, hands, batch_size)
+                ],
+            )
+            logger.info(f"Queued job {job} in {queue}")
+        else:
+            # Collect the job as it was submitted, whatever --duplicate says now.
+            duplicate = any(
+                payload["duplicate"] for payload in work_queue.payloads(job)
+            )
+
+        progress = work_queue.wait(job)
+        if progress.get("failed"):
+            logger.warning(f"Job {job}: {progress['failed']} tasks failed")
+        results = work_queue.results(job)
+
+    poker = Poker.new_rule_game()
+    poker.merge(results, duplicate)
+    poker.report()
+
+
+@app.command()
+def work(
+    queue: Annotated[Path, typer.Option(help="SQLite queue file")] = DEFAULT_QUEUE_PATH,
+    lease: Annotated[
+        float, typer.Option(help="Seconds a task stays claimed without a heartbeat")
+    ] = 600.0,
+    forever: Annotated[
+        bool, typer.Option(help="Keep polling when the queue is empty")
+    ] = False,
+):
+    """
+    Claim and play queued batches of hands.
+    """
+    with WorkQueue(queue) as work_queue:
+        completed = run_worker(
+            work_queue,
+            {"hands": play_hands},
+            lease_seconds=lease,
+            exit_when_idle=not forever,
+        )
+    logger.info(f"Completed {completed} tasks")
+
+
+@app.command()
+def serve(
+    port: Annotated[
+        int, typer.Option(help="Port to listen on")
+    ] = DEFAULT_DECISION_PORT,
+    host: Annotated[str, typer.Option(help="Address to listen on")] = "127.0.0.1",
+    mode: Annotated[str, typer.Option(help="Inference mode, as for play")] = "cot",
+    endpoints: Annotated[
+        str | None, typer.Option(help="Comma-separated API bases, as for play")
+    ] = None,
+    max_concurrency: Annotated[
+        int, typer.Option(help="LM calls in flight at once")
+    ] = 8,
+    cache_size: Annotated[
+        int, typer.Option(help="Decisions kept for repeats")
+    ] = 65_536,
+    routes: Annotated[str | None, typer.Option(help="LM routes, as for play")] = None,
+    prefix_cache: Annotated[
+        bool, typer.Option(help="Prefix-cache prompt layout, as for play")
+    ] = False,
 ):
-    Poker.new_game([Path(program) for program in PROGRAMS]).play(hands)
+    """
+    Host the programs and answer decisions for any number of local clients,
+    merging identical requests and serving repeats from a cache.
+    """
+    api_bases = endpoints.split(",") if endpoints else None
+    service = DecisionService(
+        get_dspy_lm(endpoints=api_bases, prefix_cache=prefix_cache),
+        modes=parse_modes(mode),
+        max_concurrency=max_concurrency,
+        cache_size=cache_size,
+        router=Router(parse_routes(routes), api_bases) if routes else None,
+    )
+    server = DecisionServer(service, host, port)
+    logger.info(f"Serving decisions on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.info(f"Decision service: {service.stats()}")
 
 
 def cli() -> None:
@@ -0,0 +1,179 @@
+import random
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+from pydantic import BaseModel
+
+from .cards import SUIT_PERMUTATIONS, parse_cards
+from .utils import STREETS
+
+Spot = tuple[tuple[int, ...], ...]
+Stratum = tuple[str, str, int]
+
+
+@dataclass(slots=True)
+class WeightedSimulation:
+    """
+    One simulation (as stored in ``data/*.json``) standing in for ``weight``
+    simulations of the original data.
+    """
+
+    simulation: dict[str, Any]
+    weight: float
+
+
+class CoresetSummary(BaseModel):
+    simulations: int
+    unique: int
+    strata: int
+    covered: int
+    size: int
+
+
+def canonical_spot(hole_cards: str, boards: Iterable[str]) -> Spot:
+    """
+    Hole cards and each street's board as sorted cards with the suits
+    relabelled, so every suit-isomorphic hand gives the same spot. The
+    same relabelling is applied to all streets, and the smallest of the 24
+    wins.
+    """
+    cards = [parse_cards(hole_cards), *(parse_cards(board) for board in boards)]
+    return min(
+        tuple(
+            tuple(sorted(card - card % 4 + perm[card % 4] for card in street))
+            for street in cards
+        )
+        for perm in SUIT_PERMUTATIONS
+    )
+
+
+def simulation_spot(simulation: dict[str, Any]) -> Spot:
+    return canonical_spot(
+        simulation["hole_cards"],
+        (simulation[street]["board"] for street in STREETS[1:]),
+    )
+
+
+def action_pattern(simulation: dict[str, Any]) -> str:
+    return "/".join(simulation[street]["action"] for street in STREETS)
+
+
+def strength_bucket(simulation: dict[str, Any], buckets: int = 5) -> int:
+    strength = min(max(simulation["preflop"]["hand_strength"], 0.0), 1.0)
+    return min(int(strength * buckets), buckets - 1)
+
+
+def stratum(simulation: dict[str, Any], buckets: int = 5) -> Stratum:
+    return (
+        simulation["personality"],
+        action_pattern(simulation),
+        strength_bucket(simulation, buckets),
+    )
+
+
+def deduplicate(simulations: Iterable[dict[str, Any]]) -> list[WeightedSimulation]:
+    """
+    Collapse simulations of the same personality that are the same hand up
+    to suits and were labelled with the same actions. The first one is
+    kept, weighted by the number collapsed, with its hand strengths
+    averaged over them. Hands whose labels differ stay separate.
+    """
+    groups: dict[tuple, list[dict[str, Any]]] = {}
+    for simulation in simulations:
+        key = (
+            simulation["personality"],
+            simulation_spot(simulation),
+            action_pattern(simulation),
+        )
+        groups.setdefault(key, []).append(simulation)
+
+    weighted = []
+    for group in groups.values():
+        simulation = {
+            **group[0],
+            **{
+                street: {
+                    **group[0][street],
+                    "hand_strength": round(
+                        sum(s[street]["hand_strength"] for s in group) / len(group), 2
+                    ),
+                }
+                for street in STREETS
+            },
+        }
+        weighted.append(WeightedSimulation(simulation=simulation, weight=len(group)))
+    return weighted
+
+
+def allocate(
+    weights: dict[Stratum, float], available: dict[Stratum, int], size: int
+) -> dict[Stratum, int]:
+    """
+    Split ``size`` picks over strata: one each (heaviest first, if there
+    are more strata than picks), then the rest in proportion to weight by
+    largest remainder, passing over strata that have run out of hands.
+    """
+    order = sorted(weights, key=lambda s: (-weights[s], s))
+    size = min(size, sum(available.values()))
+    if size <= len(order):
+        return dict.fromkeys(order[:size], 1)
+
+    counts = dict.fromkeys(order, 1)
+    while (spare := size - sum(counts.values())) > 0:
+        open_strata = [s for s in order if counts[s] < available[s]]
+        total = sum(weights[s] for s in open_strata)
+        shares = {s: spare * weights[s] / total for s in open_strata}
+        for s in open_strata:
+            counts[s] = min(available[s], counts[s] + int(shares[s]))
+        spare = size - sum(counts.values())
+        for s in sorted(open_strata, key=lambda s: (int(shares[s]) - shares[s], s)):
+            if spare and counts[s] < available[s]:
+                counts[s] += 1
+                spare -= 1
+    return counts
+
+
+def coreset(
+    simulations: Iterable[dict[str, Any]],
+    size: int,
+    seed: int | None = None,
+    buckets: int = 5,
+) -> tuple[list[WeightedSimulation], CoresetSummary]:
+    """
+    Deduplicate ``simulations`` and pick ``size`` of them stratified over
+    (personality, action pattern, preflop strength bucket).
+
+    Each stratum gets picks in proportion to the number of simulations in
+    it, with every stratum represented when ``size`` allows. A pick's
+    weight is its share of its stratum's simulations, so weights over the
+    coreset sum to the simulations of the strata it covers.
+    """
+    simulations = list(simulations)
+    unique = deduplicate(simulations)
+    strata: dict[Stratum, list[WeightedSimulation]] = {}
+    for item in unique:
+        strata.setdefault(stratum(item.simulation, buckets), []).append(item)
+
+    weights = {s: sum(item.weight for item in items) for s, items in strata.items()}
+    rng = random.Random(seed)
+    picked = []
+    available = {s: len(items) for s, items in strata.items()}
+    for s, count in allocate(weights, available, size).items():
+        chosen = rng.sample(strata[s], count)
+        chosen_weight = sum(item.weight for item in chosen)
+        picked.extend(
+            WeightedSimulation(
+                simulation=item.simulation,
+                weight=weights[s] * item.weight / chosen_weight,
+            )
+            for item in chosen
+        )
+
+    summary = CoresetSummary(
+        simulations=len(simulations),
+        unique=len(unique),
+        strata=len(strata),
+        covered=len({stratum(item.simulation, buckets) for item in picked}),
+        size=len(picked),
+    )
+    return picked, summary
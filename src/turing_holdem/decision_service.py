@@ -0,0 +1,263 @@
+import http.client
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import dspy
+from loguru import logger
+from pydantic import BaseModel, ValidationError
+
+from .cards import format_cards, parse_cards
+from .dspy_modules import InferenceMode
+from .registry import ProgramRegistry, default_registry
+from .routing import Router
+from .utils import STREETS, Action, Personalities
+
+DEFAULT_DECISION_PORT = 8765
+
+
+class Decision(BaseModel):
+    personality: str
+    hole_cards: str
+    # "Preflop", "Flop", "Turn" or "River", as in the prompts.
+    street: str
+    board: str
+
+
+class DecisionResult(BaseModel):
+    action: Action
+    # "lm", "cache" or "coalesced".
+    source: str
+
+
+class ServiceStats(BaseModel):
+    requests: int
+    lm_calls: int
+    cache_hits: int
+    coalesced: int
+    errors: int
+    in_flight: int
+    cached: int
+
+
+class DecisionService:
+    """
+    Street decisions from the optimised programs, shared by every client
+    of one process.
+
+    Requests are keyed by personality, street and the normalised cards. A
+    key already answered is served from an LRU cache of ``cache_size``
+    entries, and a request whose key is already being answered waits for
+    that answer instead of making its own LM call. At most
+    ``max_concurrency`` LM calls run at once. With a ``router``, decisions
+    that have a route use its LM instead of ``lm``.
+    """
+
+    def __init__(
+        self,
+        lm: dspy.BaseLM,
+        registry: ProgramRegistry | None = None,
+        modes: dict[str, InferenceMode] | None = None,
+        max_concurrency: int = 8,
+        cache_size: int = 65_536,
+        router: Router | None = None,
+    ):
+        self.lm = lm
+        self.router = router
+        self.registry = registry or default_registry()
+        self.modes = modes
+        self.cache_size = cache_size
+        self.personalities = {p.name for p in Personalities().personalities}
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[tuple, Action] = OrderedDict()
+        self._pending: dict[tuple, Future[Action]] = {}
+        self._counts = dict.fromkeys(
+            ("requests", "lm_calls", "cache_hits", "coalesced", "errors"), 0
+        )
+
+    def decide(self, decision: Decision) -> DecisionResult:
+        key = self._key(decision)
+        with self._lock:
+            self._counts["requests"] += 1
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self._counts["cache_hits"] += 1
+                return DecisionResult(action=self._cache[key], source="cache")
+            future = self._pending.get(key)
+            owner = future is None
+            if owner:
+                future = self._pending[key] = Future()
+            else:
+                self._counts["coalesced"] += 1
+        if not owner:
+            return DecisionResult(action=future.result(), source="coalesced")
+
+        try:
+            with self._slots:
+                action = self._call(decision)
+        except Exception as e:
+            with self._lock:
+                self._counts["errors"] += 1
+                del self._pending[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._counts["lm_calls"] += 1
+            self._cache[key] = action
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            del self._pending[key]
+        future.set_result(action)
+        return DecisionResult(action=action, source="lm")
+
+    def stats(self) -> ServiceStats:
+        with self._lock:
+            return ServiceStats(
+                **self._counts, in_flight=len(self._pending), cached=len(self._cache)
+            )
+
+    def _key(self, decision: Decision) -> tuple:
+        street = decision.street.lower()
+        if street not in STREETS:
+            raise ValueError(f"Unknown street: {decision.street}")
+        if decision.personality not in self.personalities:
+            raise ValueError(f"Unknown personality: {decision.personality}")
+        return (
+            decision.personality,
+            street,
+            format_cards(parse_cards(decision.hole_cards)),
+            format_cards(parse_cards(decision.board)),
+        )
+
+    def _call(self, decision: Decision) -> Action:
+        self.registry.refresh()
+        program = self.registry.get(
+            self.registry.path_for(decision.personality), self.modes
+        )
+        _, street, hole_cards, board = self._key(decision)
+        lm = self.router and self.router.lm_for(decision.personality, street)
+        with dspy.context(lm=lm or self.lm):
+            prediction = getattr(program, f"{street}_module")(
+                personality=decision.personality,
+                hole_cards=hole_cards,
+                board=board,
+                street=street.title(),
+            )
+        return Action.from_str(prediction.action)
+
+
+class DecisionServer(ThreadingHTTPServer):
+    """
+    Serves a ``DecisionService`` over localhost HTTP: ``POST /decide`` with
+    a ``Decision`` and ``GET /stats``.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        service: DecisionService,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_DECISION_PORT,
+    ):
+        super().__init__((host, port), _DecisionHandler)
+        self.service = service
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class _DecisionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: DecisionServer
+
+    def do_POST(self) -> None:
+        if self.path != "/decide":
+            self._send(404, {"error": f"Unknown path {self.path}"})
+            return
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        try:
+            result = self.server.service.decide(Decision.model_validate_json(body))
+        except (ValidationError, ValueError) as e:
+            self._send(400, {"error": str(e)})
+            return
+        except Exception as e:
+            logger.warning(f"Decision failed: {e}")
+            self._send(502, {"error": str(e)})
+            return
+        self._send(200, result.model_dump(mode="json"))
+
+    def do_GET(self) -> None:
+        if self.path != "/stats":
+            self._send(404, {"error": f"Unknown path {self.path}"})
+            return
+        self._send(200, self.server.service.stats().model_dump())
+
+    def _send(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class DecisionClient:
+    """
+    Asks a ``DecisionServer`` for decisions, keeping one connection alive
+    per thread.
+    """
+
+    def __init__(self, url: str, timeout: float = 600.0):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or DEFAULT_DECISION_PORT
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def decide(self, decision: Decision) -> DecisionResult:
+        return DecisionResult.model_validate(
+            self._request("POST", "/decide", decision.model_dump_json())
+        )
+
+    def stats(self) -> ServiceStats:
+        return ServiceStats.model_validate(self._request("GET", "/stats"))
+
+    def _request(self, method: str, path: str, body: str | None = None) -> dict:
+        for attempt in range(2):
+            connection = self._connection()
+            try:
+                connection.request(
+                    method, path, body, {"Content-Type": "application/json"}
+                )
+                response = connection.getresponse()
+                payload = json.loads(response.read())
+                break
+            except (ConnectionError, http.client.HTTPException):
+                # The server closed a kept-alive connection; reconnect once.
+                connection.close()
+                self._local.connection = None
+                if attempt:
+                    raise
+        if response.status != 200:
+            raise RuntimeError(f"Decision server: {payload['error']}")
+        return payload
+
+    def _connection(self) -> http.client.HTTPConnection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = http.client.HTTPConnection(
+                self.host, self.port, timeout=self.timeout
+            )
+            self._local.connection = connection
+        return connection
@@ -1,7 +1,13 @@
+from enum import Enum
 from pathlib import Path
 import dspy
+from dspy.utils.exceptions import AdapterParseError
 from typing import Literal
 
+from .lm_pool import LMPool
+from .metering import MeteredLM
+from .utils import STREETS
+
 
 class PokerAnalyzer(dspy.Signature):
     """
@@ -16,12 +22,147 @@ class PokerAnalyzer(dspy.Signature):
     action: Literal["fold", "check", "call", "raise", "all_in"] = dspy.OutputField()
 
 
+ACTIONS = ("fold", "check", "call", "raise", "all_in")
+
+# The exact reply the chat adapter parses for a bare action, used as a
+# guided decoding pattern so the server can only emit one of the actions.
+ACTION_PATTERN = (
+    r"\[\[ ## action ## \]\]\n(" + "|".join(ACTIONS) + r")\n\n\[\[ ## completed ## \]\]"
+)
+# Tokens for the action field and its markers, with room to spare.
+ANSWER_TOKENS = 32
+
+
+class StrictChatAdapter(dspy.ChatAdapter):
+    """
+    Chat adapter that raises on unparseable replies instead of retrying the
+    call with the JSON adapter.
+    """
+
+    def __call__(self, lm, lm_kwargs, signature, demos, inputs):
+        return dspy.Adapter.__call__(self, lm, lm_kwargs, signature, demos, inputs)
+
+
+# Inputs that are the same for every request a street module makes come
+# first, then the board (shared by the table), then the hole cards.
+PREFIX_FIELD_ORDER = ("personality", "street", "board", "hole_cards")
+
+
+def prefix_cache_signature(signature: type[dspy.Signature]) -> type[dspy.Signature]:
+    """
+    ``signature`` with its inputs in ``PREFIX_FIELD_ORDER``; instructions,
+    outputs and any other inputs are unchanged.
+    """
+    for name in PREFIX_FIELD_ORDER:
+        if name in signature.input_fields:
+            field = signature.input_fields[name]
+            signature = signature.delete(name).append(name, field, field.annotation)
+    return signature
+
+
+class PrefixCacheChatAdapter(dspy.ChatAdapter):
+    """
+    Chat adapter that lays prompts out for server-side prefix caching: the
+    system message and the static inputs form a byte-identical prefix
+    across requests, and the inputs that vary per hand come last. The
+    output format reminder, which the chat adapter puts after the inputs,
+    moves to the end of the system message.
+    """
+
+    def format(self, signature, demos, inputs):
+        return super().format(prefix_cache_signature(signature), demos, inputs)
+
+    def format_task_description(self, signature):
+        return (
+            super().format_task_description(signature)
+            + "\n\n"
+            + self.user_message_output_requirements(signature)
+        )
+
+    def format_user_message_content(
+        self, signature, inputs, prefix="", suffix="", main_request=False
+    ):
+        return super().format_user_message_content(signature, inputs, prefix, suffix)
+
+
+class StrictPrefixCacheChatAdapter(StrictChatAdapter, PrefixCacheChatAdapter):
+    pass
+
+
+class InferenceMode(str, Enum):
+    COT = "cot"
+    CAPPED = "capped"
+    DIRECT = "direct"
+
+
+class StreetModule(dspy.Module):
+    """
+    Chain of thought over ``PokerAnalyzer`` that can also answer with a
+    capped reasoning budget or with no reasoning at all. A capped call may
+    spend ``reasoning_tokens`` on its reasoning, plus ``ANSWER_TOKENS`` for
+    the action.
+
+    All modes share the one ``predict`` predictor, so programs saved from
+    ``dspy.ChainOfThought`` load unchanged and optimised instructions apply
+    to every mode.
+    """
+
+    def __init__(
+        self,
+        mode: InferenceMode = InferenceMode.COT,
+        reasoning_tokens: int = 256,
+        guided: bool = True,
+    ):
+        self.predict = dspy.ChainOfThought(PokerAnalyzer).predict
+        self.mode = mode
+        self.reasoning_tokens = reasoning_tokens
+        # Guided decoding needs an OpenAI-compatible server that accepts
+        # vLLM's ``guided_regex``.
+        self.guided = guided
+
+    def forward(self, **kwargs):
+        match self.mode:
+            case InferenceMode.COT:
+                return self.predict(**kwargs)
+            case InferenceMode.CAPPED:
+                # A truncated trace cannot be parsed, so answer directly
+                # instead of retrying with the JSON adapter.
+                strict = (
+                    StrictPrefixCacheChatAdapter()
+                    if isinstance(dspy.settings.adapter, PrefixCacheChatAdapter)
+                    else StrictChatAdapter()
+                )
+                try:
+                    with dspy.context(adapter=strict):
+                        return self.predict(
+                            **kwargs,
+                            config={
+                                "max_tokens": self.reasoning_tokens + ANSWER_TOKENS
+                            },
+                        )
+                except AdapterParseError:
+                    return self._direct(**kwargs)
+            case InferenceMode.DIRECT:
+                return self._direct(**kwargs)
+
+    def _direct(self, **kwargs):
+        config: dict = {"max_tokens": ANSWER_TOKENS}
+        if self.guided:
+            config["extra_body"] = {"guided_regex": ACTION_PATTERN}
+        return self.predict(
+            **kwargs,
+            signature=self.predict.signature.delete("reasoning"),
+            config=config,
+        )
+
+
 class PokerModule(dspy.Module):
-    def __init__(self):
-        self.preflop_module = dspy.ChainOfThought(PokerAnalyzer)
-        self.flop_module = dspy.ChainOfThought(PokerAnalyzer)
-        self.turn_module = dspy.ChainOfThought(PokerAnalyzer)
-        self.river_module = dspy.ChainOfThought(PokerAnalyzer)
+    def __init__(self, modes: dict[str, InferenceMode] | None = None):
+        modes = modes or {}
+        self.preflop_module = StreetModule(modes.get("preflop", InferenceMode.COT))
+        self.flop_module = StreetModule(modes.get("flop", InferenceMode.COT))
+        self.turn_module = StreetModule(modes.get("turn", InferenceMode.COT))
+        self.river_module = StreetModule(modes.get("river", InferenceMode.COT))
 
     def forward(
         self,
@@ -69,20 +210,73 @@ class PokerModule(dspy.Module):
         )
 
 
-def load_dspy_program(path: Path) -> PokerModule:
-    program = PokerModule()
+def parse_modes(text: str) -> dict[str, InferenceMode]:
+    """
+    Parse per-street modes such as ``"direct"`` (every street) or
+    ``"preflop=direct,flop=capped"`` (unlisted streets keep chain of thought).
+    """
+    if "=" not in text:
+        return dict.fromkeys(STREETS, InferenceMode(text))
+
+    modes = {}
+    for item in text.split(","):
+        street, mode = item.split("=")
+        if street not in STREETS:
+            raise ValueError(f"Invalid street: {street}")
+        modes[street] = InferenceMode(mode)
+    return modes
+
+
+def load_dspy_program(
+    path: Path, modes: dict[str, InferenceMode] | None = None
+) -> PokerModule:
+    program = PokerModule(modes)
     program.load(path=path)
 
     return program
 
 
-def get_dspy_lm(model: str = "meta-llama/Llama-3.1-8B-Instruct") -> dspy.LM:
-    lm = dspy.LM(
+DEFAULT_ENDPOINT = "http://localhost:8000/v1"
+
+
+DEFAULT_MODEL = "meta-llama/Llama-3.1-8B-Instruct"
+
+
+def new_dspy_lm(
+    model: str = DEFAULT_MODEL,
+    endpoints: list[str] | None = None,
+) -> dspy.BaseLM:
+    """
+    The model served at ``endpoints``, pooled across them when there is
+    more than one.
+    """
+    endpoints = endpoints or [DEFAULT_ENDPOINT]
+    if len(endpoints) == 1:
+        return MeteredLM(
+            f"openai/{model}",
+            api_base=endpoints[0],
+            temperature=0.2,
+            api_key="NONE",
+            max_tokens=2048,
+        )
+    return LMPool(
         f"openai/{model}",
-        api_base="http://localhost:8000/v1",
+        endpoints,
         temperature=0.2,
         api_key="NONE",
         max_tokens=2048,
     )
-    dspy.configure(lm=lm)
+
+
+def get_dspy_lm(
+    model: str = DEFAULT_MODEL,
+    endpoints: list[str] | None = None,
+    prefix_cache: bool = False,
+) -> dspy.BaseLM:
+    """
+    Configure DSPy with the model served at ``endpoints``, laying prompts
+    out for prefix caching with ``prefix_cache``.
+    """
+    lm = new_dspy_lm(model, endpoints)
+    dspy.configure(lm=lm, adapter=PrefixCacheChatAdapter() if prefix_cache else None)
     return lm
@@ -0,0 +1,136 @@
+from concurrent.futures import Executor
+from enum import Enum
+from math import sqrt
+from typing import Iterable
+
+from pokerkit import Card, Deck, StandardHighHand, calculate_hand_strength
+from pydantic import BaseModel
+
+from .cache import EquityCache, canonical_key
+from .utils import ACTION_THRESHOLDS
+
+
+class StopReason(str, Enum):
+    PRECISION = "precision"
+    DECIDED = "decided"
+    BUDGET = "budget"
+    # Computed against opponent ranges rather than sampled.
+    RANGE = "range"
+
+
+class Estimate(BaseModel):
+    strength: float
+    # Samples drawn for this call; cached samples are not counted.
+    samples: int
+    stderr: float
+    reason: StopReason
+
+
+def standard_error(strength: float, samples: int) -> float:
+    """
+    Conservative standard error of a Monte-Carlo equity estimate.
+
+    Each sample is a pot share in [0, 1], so its variance is at most
+    p * (1 - p). The Agresti-Coull style adjustment keeps the bound away
+    from zero when every sample so far agrees.
+    """
+    adjusted = (strength * samples + 2) / (samples + 4)
+    return sqrt(adjusted * (1 - adjusted) / (samples + 4))
+
+
+def is_decided(
+    strength: float,
+    stderr: float,
+    thresholds: Iterable[float],
+    z: float = 1.96,
+) -> bool:
+    """
+    True when the confidence interval around the strength does not cross
+    any action threshold, so more samples could not change the label.
+    """
+    low, high = strength - z * stderr, strength + z * stderr
+    return not any(low <= threshold <= high for threshold in thresholds)
+
+
+def adaptive_hand_strength(
+    player_count: int,
+    hole_cards: Iterable[Card],
+    board_cards: Iterable[Card],
+    hole_dealing_count: int,
+    board_dealing_count: int,
+    *,
+    bias: float = 0.0,
+    target_stderr: float = 0.025,
+    z: float = 1.96,
+    batch_size: int = 50,
+    max_samples: int = 400,
+    executor: Executor | None = None,
+    cache: EquityCache | None = None,
+) -> Estimate:
+    """
+    Estimate hand strength in batches, stopping as soon as the estimate is
+    precise enough or its action label (after adding the personality bias)
+    is settled.
+
+    With a cache, sampling resumes from whatever any process has already
+    stored for the suit-equivalent spot, and new samples are merged back.
+    """
+    hole_range = [list(hole_cards)]
+    board = list(board_cards)
+    thresholds = [threshold for threshold, _ in ACTION_THRESHOLDS]
+
+    key = None
+    cached_strength, cached_samples = 0.0, 0
+    if cache is not None:
+        key = canonical_key(
+            hole_range[0],
+            board,
+            player_count,
+            hole_dealing_count,
+            board_dealing_count,
+        )
+        cached_strength, cached_samples = cache.get(key) or (0.0, 0)
+
+    total = 0.0
+    samples = 0
+    while True:
+        if cached_samples + samples > 0:
+            strength = (cached_strength * cached_samples + total) / (
+                cached_samples + samples
+            )
+            stderr = standard_error(strength, cached_samples + samples)
+            if stderr <= target_stderr:
+                reason = StopReason.PRECISION
+            elif is_decided(strength + bias, stderr, thresholds, z):
+                reason = StopReason.DECIDED
+            elif cached_samples + samples >= max_samples:
+                reason = StopReason.BUDGET
+            else:
+                reason = None
+
+            if reason is not None:
+                if cache is not None and key is not None and samples > 0:
+                    cache.add(key, total / samples, samples)
+                return Estimate(
+                    strength=strength,
+                    samples=samples,
+                    stderr=stderr,
+                    reason=reason,
+                )
+
+        batch = min(batch_size, max_samples - cached_samples - samples)
+        total += (
+            calculate_hand_strength(
+                player_count=player_count,
+                hole_range=hole_range,
+                board_cards=board,
+                hole_dealing_count=hole_dealing_count,
+                board_dealing_count=board_dealing_count,
+                deck=Deck.STANDARD,  # pyright: ignore
+                hand_types=(StandardHighHand,),
+                sample_count=batch,
+                executor=executor,
+            )
+            * batch
+        )
+        samples += batch
@@ -0,0 +1,213 @@
+import hashlib
+import json
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Collection
+
+import dspy
+from loguru import logger
+from pydantic import BaseModel
+
+from .utils import submit_in_context
+
+DEFAULT_STORE_PATH = Path("runs/evaluations.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    program TEXT NOT NULL,
+    example TEXT NOT NULL,
+    prediction TEXT,
+    score REAL,
+    seconds REAL NOT NULL,
+    error TEXT,
+    recorded REAL NOT NULL,
+    PRIMARY KEY (program, example)
+);
+"""
+
+# Scores a program's prediction for an example, as ``dspy.Evaluate`` metrics do.
+Metric = Callable[[dspy.Example, dspy.Prediction], Any]
+
+
+class EvaluationResult(BaseModel):
+    program: str
+    example: str
+    prediction: dict[str, Any] | None = None
+    score: float | None = None
+    seconds: float
+    error: str | None = None
+
+
+class ProgramScore(BaseModel):
+    program: str
+    examples: int
+    score: float
+    errors: int
+    mean_seconds: float
+    p95_seconds: float
+
+
+def program_key(path: Path, *parts: str) -> str:
+    """
+    Name a program by its file and a digest of its contents, so a program
+    re-optimised into the same file is scored afresh. ``parts`` (such as
+    the inference mode and model) distinguish runs of the same file.
+    """
+    digest = hashlib.sha256(Path(path).read_bytes()).hexdigest()[:12]
+    return "/".join([f"{Path(path).stem}@{digest}", *parts])
+
+
+def example_key(example: dspy.Example) -> str:
+    return hashlib.sha256(
+        json.dumps(example.toDict(), sort_keys=True, default=str).encode()
+    ).hexdigest()[:16]
+
+
+class ResultStore:
+    """
+    Per-example evaluation results in one SQLite file, keyed by program and
+    example. Each result is committed as it arrives, so an interrupted
+    evaluation resumes from the last one.
+    """
+
+    def __init__(self, path: Path = DEFAULT_STORE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.path, timeout=60.0, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self) -> "ResultStore":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def put(self, result: EvaluationResult) -> None:
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO results "
+                "(program, example, prediction, score, seconds, error, recorded) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    result.program,
+                    result.example,
+                    json.dumps(result.prediction),
+                    result.score,
+                    result.seconds,
+                    result.error,
+                    time.time(),
+                ),
+            )
+
+    def scored(self, program: str) -> set[str]:
+        """
+        Examples with a result for ``program``. Failed calls are not
+        counted, so they are retried.
+        """
+        rows = self.connection.execute(
+            "SELECT example FROM results WHERE program = ? AND error IS NULL",
+            (program,),
+        ).fetchall()
+        return {example for (example,) in rows}
+
+    def results(self, program: str) -> list[EvaluationResult]:
+        rows = self.connection.execute(
+            "SELECT program, example, prediction, score, seconds, error "
+            "FROM results WHERE program = ? ORDER BY recorded",
+            (program,),
+        ).fetchall()
+        return [
+            EvaluationResult(
+                program=program,
+                example=example,
+                prediction=json.loads(prediction),
+                score=score,
+                seconds=seconds,
+                error=error,
+            )
+            for program, example, prediction, score, seconds, error in rows
+        ]
+
+
+def _run(program: dspy.Module, example: dspy.Example, metric: Metric) -> dict:
+    start = time.perf_counter()
+    try:
+        prediction = program(**example.inputs())
+        score = metric(example, prediction)
+    except Exception as e:
+        return {"seconds": time.perf_counter() - start, "error": repr(e)}
+    return {
+        "prediction": json.loads(json.dumps(prediction.toDict(), default=str)),
+        "score": float(getattr(score, "score", score)),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def evaluate(
+    store: ResultStore,
+    programs: dict[str, dspy.Module],
+    examples: list[dspy.Example],
+    metric: Metric,
+    num_threads: int = 16,
+) -> list[ProgramScore]:
+    """
+    Score every program on every example, running only the (program,
+    example) pairs ``store`` has no result for, on ``num_threads`` workers.
+    A failed call is stored with its error and scored 0, as
+    ``dspy.Evaluate`` does.
+    """
+    keys = {example_key(example): example for example in examples}
+    pairs = []
+    for name in programs:
+        scored = store.scored(name)
+        pairs += [(name, key) for key in keys if key not in scored]
+    logger.info(
+        f"Evaluating {len(pairs)} of {len(programs) * len(keys)} "
+        "(program, example) pairs"
+    )
+
+    executor = ThreadPoolExecutor(num_threads, thread_name_prefix="evaluate")
+    try:
+        futures = {}
+        for name, key in pairs:
+            args = programs[name], keys[key], metric
+            futures[submit_in_context(executor, _run, *args)] = name, key
+        for done, future in enumerate(as_completed(futures), 1):
+            name, key = futures[future]
+            result = EvaluationResult(program=name, example=key, **future.result())
+            if result.error is not None:
+                logger.warning(f"{name} failed on {key}: {result.error}")
+            store.put(result)
+            if done % 100 == 0:
+                logger.info(f"Evaluated {done}/{len(pairs)} pairs")
+    finally:
+        # On an interrupt, drop the queued pairs; the next run picks them up.
+        executor.shutdown(cancel_futures=True)
+
+    return [summarise(name, store.results(name), keys.keys()) for name in programs]
+
+
+def summarise(
+    program: str, results: list[EvaluationResult], examples: Collection[str]
+) -> ProgramScore:
+    """
+    Aggregate a program's stored results over ``examples``.
+    """
+    results = [result for result in results if result.example in examples]
+    seconds = sorted(result.seconds for result in results)
+    return ProgramScore(
+        program=program,
+        examples=len(results),
+        score=sum(result.score or 0.0 for result in results) / max(len(results), 1),
+        errors=sum(result.error is not None for result in results),
+        mean_seconds=sum(seconds) / max(len(seconds), 1),
+        p95_seconds=seconds[min(len(seconds) - 1, int(0.95 * len(seconds)))]
+        if seconds
+        else 0.0,
+    )
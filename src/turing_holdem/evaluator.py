@@ -0,0 +1,126 @@
+from enum import IntEnum
+
+import numpy as np
+
+
+class Category(IntEnum):
+    HIGH_CARD = 0
+    PAIR = 1
+    TWO_PAIR = 2
+    TRIPS = 3
+    STRAIGHT = 4
+    FLUSH = 5
+    FULL_HOUSE = 6
+    QUADS = 7
+    STRAIGHT_FLUSH = 8
+
+
+def _build_tables() -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Lookup tables over 13-bit rank masks: the highest rank, the five
+    highest ranks packed as nibbles, the top rank of the best straight and
+    the number of ranks set. Missing entries are -1 (or 0 when packed).
+    """
+    high = np.full(1 << 13, -1, dtype=np.int64)
+    packed = np.zeros(1 << 13, dtype=np.int64)
+    straight = np.full(1 << 13, -1, dtype=np.int64)
+    popcount = np.zeros(1 << 13, dtype=np.int64)
+
+    for mask in range(1, 1 << 13):
+        ranks = [rank for rank in range(12, -1, -1) if mask >> rank & 1]
+        high[mask] = ranks[0]
+        popcount[mask] = len(ranks)
+        for idx, rank in enumerate(ranks[:5]):
+            packed[mask] |= rank << (16 - 4 * idx)
+
+        # Shift up one so the ace can also sit below the deuce.
+        extended = mask << 1 | mask >> 12
+        for top in range(13, 3, -1):
+            if extended >> (top - 4) & 0b11111 == 0b11111:
+                straight[mask] = top - 1
+                break
+
+    return high, packed, straight, popcount
+
+
+HIGH, PACKED, STRAIGHT, POPCOUNT = _build_tables()
+
+
+def _bit(rank: np.ndarray) -> np.ndarray:
+    return np.where(rank >= 0, 1 << np.maximum(rank, 0), 0)
+
+
+def _kickers(mask: np.ndarray, leading: int, count: int) -> np.ndarray:
+    """
+    The ``count`` highest ranks of ``mask`` packed into the nibbles after
+    ``leading`` ranks that are already placed.
+    """
+    nibbles = ((1 << (4 * count)) - 1) << (4 * (5 - leading - count))
+    return (PACKED[mask] >> (4 * leading)) & nibbles
+
+
+def evaluate(cards: np.ndarray) -> np.ndarray:
+    """
+    Score a batch of hands given as rows of codec card indices, with -1
+    marking an empty slot. Higher scores are better hands, equal scores
+    split, and ``score >> 20`` is the ``Category``. Rows may hold fewer than
+    seven cards, in which case the best hand made so far is scored.
+    """
+    cards = np.asarray(cards, dtype=np.int64)
+    # One 13-bit rank mask per suit, packed 16 bits apart.
+    combined = np.zeros(cards.shape[0], dtype=np.int64)
+    for column in cards.T:
+        combined |= np.where(column >= 0, 1 << (column // 4 + 16 * (column % 4)), 0)
+    suits = [combined >> (16 * suit) & 0x1FFF for suit in range(4)]
+    clubs, diamonds, hearts, spades = suits
+
+    held = clubs | diamonds | hearts | spades
+    paired = (
+        (clubs & (diamonds | hearts | spades))
+        | (diamonds & (hearts | spades))
+        | (hearts & spades)
+    )
+    tripled = (clubs & diamonds & (hearts | spades)) | (
+        hearts & spades & (clubs | diamonds)
+    )
+    quadrupled = clubs & diamonds & hearts & spades
+    flush = np.zeros_like(held)
+    for suit in suits:
+        flush = np.where(POPCOUNT[suit] >= 5, suit, flush)
+
+    quads = HIGH[quadrupled]
+    trips = HIGH[tripled]
+    first_pair = HIGH[paired]
+    second_pair = HIGH[paired & ~_bit(first_pair)]
+    full_house_pair = HIGH[paired & ~_bit(trips)]
+    straight_flush = STRAIGHT[flush]
+    straight = STRAIGHT[held]
+
+    return np.select(
+        [
+            straight_flush >= 0,
+            quads >= 0,
+            (trips >= 0) & (full_house_pair >= 0),
+            flush > 0,
+            straight >= 0,
+            trips >= 0,
+            second_pair >= 0,
+            first_pair >= 0,
+        ],
+        [
+            Category.STRAIGHT_FLUSH << 20 | straight_flush << 16,
+            Category.QUADS << 20 | quads << 16 | _kickers(held & ~_bit(quads), 1, 1),
+            Category.FULL_HOUSE << 20 | trips << 16 | full_house_pair << 12,
+            Category.FLUSH << 20 | PACKED[flush],
+            Category.STRAIGHT << 20 | straight << 16,
+            Category.TRIPS << 20 | trips << 16 | _kickers(held & ~_bit(trips), 1, 2),
+            Category.TWO_PAIR << 20
+            | first_pair << 16
+            | second_pair << 12
+            | _kickers(held & ~_bit(first_pair) & ~_bit(second_pair), 2, 1),
+            Category.PAIR << 20
+            | first_pair << 16
+            | _kickers(held & ~_bit(first_pair), 1, 3),
+        ],
+        Category.HIGH_CARD << 20 | PACKED[held],
+    )
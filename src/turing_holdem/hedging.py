@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, TypeVar
+
+from loguru import logger
+from pydantic import BaseModel
+
+from .utils import submit_in_context
+
+T = TypeVar("T")
+
+
+class HedgePolicy(BaseModel):
+    # Seconds a decision may take before the fallback answers it.
+    deadline: float | None = None
+    # A duplicate request is sent once a decision has run longer than this
+    # percentile of recent decision latencies.
+    hedge_percentile: float | None = None
+    # Latencies needed before the percentile is trusted; until then, hedge
+    # after ``initial_hedge`` seconds (or not at all).
+    min_samples: int = 20
+    initial_hedge: float | None = None
+    window: int = 1000
+
+
+class HedgeStats(BaseModel):
+    decisions: int = 0
+    hedges: int = 0
+    # Decisions answered by the hedge rather than the first request.
+    hedge_wins: int = 0
+    timeouts: int = 0
+    errors: int = 0
+    fallbacks: int = 0
+
+
+class Hedger:
+    """
+    Runs decisions on worker threads so the caller can stop waiting.
+
+    A decision still running after the hedge delay gets one duplicate
+    request, and the first answer wins; one that fails is retried the same
+    way. A decision with no answer by the deadline, or whose requests all
+    failed, is answered by ``fallback``. Abandoned requests keep a worker
+    until the LM call returns, so the pool is sized well above the number
+    of tables sharing it.
+    """
+
+    def __init__(self, policy: HedgePolicy, workers: int = 32):
+        self.policy = policy
+        self.stats = HedgeStats()
+        self._latencies: deque[float] = deque(maxlen=policy.window)
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="hedge")
+        self._lock = threading.Lock()
+
+    def hedge_delay(self) -> float | None:
+        if self.policy.hedge_percentile is None:
+            return None
+        with self._lock:
+            if len(self._latencies) < self.policy.min_samples:
+                return self.policy.initial_hedge
+            latencies = sorted(self._latencies)
+        idx = min(
+            len(latencies) - 1, int(self.policy.hedge_percentile * len(latencies))
+        )
+        return latencies[idx]
+
+    def call(self, decide: Callable[[], T], fallback: Callable[[], T]) -> T:
+        start = time.perf_counter()
+        delay = self.hedge_delay()
+        deadline = start + self.policy.deadline if self.policy.deadline else None
+        hedge_at = start + delay if delay is not None else None
+
+        first = self._submit(decide)
+        pending: set[Future] = {first}
+        hedged = timed_out = False
+        while True:
+            wake = [
+                t for t in (deadline, None if hedged else hedge_at) if t is not None
+            ]
+            timeout = max(0.0, min(wake) - time.perf_counter()) if wake else None
+            done, pending = wait(pending, timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self._record(time.perf_counter() - start, future is not first)
+                    return future.result()
+                logger.warning(f"Decision request failed: {future.exception()}")
+
+            now = time.perf_counter()
+            if deadline is not None and now >= deadline:
+                timed_out = True
+                break
+            if not hedged and (
+                not pending or (hedge_at is not None and now >= hedge_at)
+            ):
+                hedged = True
+                pending.add(self._submit(decide))
+                with self._lock:
+                    self.stats.hedges += 1
+            elif not pending:
+                break
+
+        with self._lock:
+            self.stats.decisions += 1
+            self.stats.fallbacks += 1
+            if timed_out:
+                self.stats.timeouts += 1
+                # At least this slow, so the hedge delay sees the tail too.
+                self._latencies.append(time.perf_counter() - start)
+            else:
+                self.stats.errors += 1
+        reason = "timed out" if timed_out else "failed"
+        logger.warning(f"Decision {reason}, using the fallback policy")
+        return fallback()
+
+    def snapshot(self) -> HedgeStats:
+        with self._lock:
+            return self.stats.model_copy()
+
+    def _submit(self, decide: Callable[[], T]) -> Future:
+        return submit_in_context(self._executor, decide)
+
+    def _record(self, seconds: float, by_hedge: bool) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+            self.stats.decisions += 1
+            if by_hedge:
+                self.stats.hedge_wins += 1
+
+
+def log_hedge_stats(stats: HedgeStats) -> None:
+    logger.info(
+        f"Decisions: {stats.decisions}, hedged {stats.hedges} "
+        f"(hedge answered {stats.hedge_wins}), {stats.timeouts} timed out, "
+        f"{stats.errors} failed, {stats.fallbacks} fallbacks"
+    )
@@ -0,0 +1,195 @@
+import threading
+import time
+from typing import Any
+
+import dspy
+from loguru import logger
+from pydantic import BaseModel
+
+from .metering import PromptMeter
+
+
+class EndpointStats(BaseModel):
+    api_base: str
+    requests: int
+    errors: int
+    in_flight: int
+    healthy: bool
+    mean_seconds: float
+    requests_per_second: float
+
+
+class Endpoint:
+    def __init__(self, api_base: str, lm: dspy.LM):
+        self.api_base = api_base
+        self.lm = lm
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.busy_seconds = 0.0
+        self.first_request: float | None = None
+        self.last_request = 0.0
+
+    def stats(self, now: float) -> EndpointStats:
+        elapsed = now - self.first_request if self.first_request is not None else 0.0
+        return EndpointStats(
+            api_base=self.api_base,
+            requests=self.requests,
+            errors=self.errors,
+            in_flight=self.in_flight,
+            healthy=self.ejected_until <= now,
+            mean_seconds=self.busy_seconds / self.requests if self.requests else 0.0,
+            requests_per_second=self.requests / elapsed if elapsed > 0 else 0.0,
+        )
+
+
+class LMPool(dspy.BaseLM):
+    """
+    One DSPy LM spread over several OpenAI-compatible replicas.
+
+    Each request goes to the healthy endpoint with the fewest requests in
+    flight. An endpoint that fails ``max_failures`` times in a row is
+    ejected for ``cooldown`` seconds, after which the next request routed to
+    it acts as a probe: success re-admits it, failure ejects it again. A
+    failed request is retried once on every other endpoint before the error
+    is raised.
+
+    Every endpoint keeps its own ``dspy.LM``, and LiteLLM reuses one HTTP
+    client per endpoint, so connections stay alive between decisions.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        endpoints: list[str],
+        *,
+        max_failures: int = 2,
+        cooldown: float = 30.0,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        cache: bool = True,
+        **kwargs: Any,
+    ):
+        if not endpoints:
+            raise ValueError("An LM pool needs at least one endpoint")
+        super().__init__(
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            cache=cache,
+            **kwargs,
+        )
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        # Failover replaces LiteLLM's own retries against the same replica.
+        self.endpoints = [
+            Endpoint(
+                api_base,
+                dspy.LM(
+                    model,
+                    api_base=api_base,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    cache=cache,
+                    num_retries=0,
+                    **kwargs,
+                ),
+            )
+            for api_base in endpoints
+        ]
+        self._lock = threading.Lock()
+        self.meter = PromptMeter()
+
+    def forward(self, prompt=None, messages=None, **kwargs):
+        error: Exception | None = None
+        tried: set[int] = set()
+        for _ in self.endpoints:
+            endpoint = self._acquire(tried)
+            start = time.perf_counter()
+            try:
+                response = endpoint.lm.forward(prompt, messages, **kwargs)
+            except Exception as e:
+                self._release(endpoint, start, e)
+                error = e
+                continue
+            self._release(endpoint, start)
+            self.meter.record(response)
+            return response
+        raise error  # pyright: ignore
+
+    async def aforward(self, prompt=None, messages=None, **kwargs):
+        error: Exception | None = None
+        tried: set[int] = set()
+        for _ in self.endpoints:
+            endpoint = self._acquire(tried)
+            start = time.perf_counter()
+            try:
+                response = await endpoint.lm.aforward(prompt, messages, **kwargs)
+            except Exception as e:
+                self._release(endpoint, start, e)
+                error = e
+                continue
+            self._release(endpoint, start)
+            self.meter.record(response)
+            return response
+        raise error  # pyright: ignore
+
+    def stats(self) -> list[EndpointStats]:
+        now = time.perf_counter()
+        with self._lock:
+            return [endpoint.stats(now) for endpoint in self.endpoints]
+
+    def log_stats(self) -> None:
+        for stats in self.stats():
+            logger.info(
+                f"{stats.api_base}: {stats.requests} requests, {stats.errors} errors, "
+                f"{stats.requests_per_second:.2f} req/s, "
+                f"{stats.mean_seconds * 1000:.0f} ms mean"
+                + ("" if stats.healthy else " (ejected)")
+            )
+
+    def _acquire(self, tried: set[int]) -> Endpoint:
+        """
+        Pick an endpoint this request has not tried yet, recording it in
+        ``tried``.
+        """
+        now = time.perf_counter()
+        with self._lock:
+            untried = [e for e in self.endpoints if id(e) not in tried]
+            healthy = [e for e in untried if e.ejected_until <= now]
+            if healthy:
+                endpoint = min(healthy, key=lambda e: (e.in_flight, e.last_request))
+            else:
+                # Everything left is ejected, so try whichever comes back first.
+                endpoint = min(untried, key=lambda e: e.ejected_until)
+            tried.add(id(endpoint))
+            endpoint.in_flight += 1
+            endpoint.last_request = now
+            if endpoint.first_request is None:
+                endpoint.first_request = now
+            return endpoint
+
+    def _release(
+        self, endpoint: Endpoint, start: float, error: Exception | None = None
+    ) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            endpoint.in_flight -= 1
+            endpoint.requests += 1
+            endpoint.busy_seconds += now - start
+            if error is None:
+                if endpoint.failures >= self.max_failures:
+                    logger.info(f"LM endpoint {endpoint.api_base} is back")
+                endpoint.failures = 0
+                return
+
+            endpoint.errors += 1
+            endpoint.failures += 1
+            if endpoint.failures >= self.max_failures:
+                endpoint.ejected_until = now + self.cooldown
+                logger.warning(
+                    f"Ejecting LM endpoint {endpoint.api_base} for "
+                    f"{self.cooldown:.0f}s after {endpoint.failures} failures: {error}"
+                )
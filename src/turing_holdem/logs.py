@@ -0,0 +1,142 @@
+import atexit
+import queue
+import sys
+import threading
+from pathlib import Path
+from typing import Any, TextIO
+
+from loguru import logger
+
+# Per-street and per-action lines sit between DEBUG and INFO, so they can be
+# hidden without losing the per-hand progress.
+ACTION = "ACTION"
+try:
+    logger.level(ACTION, no=15, color="<cyan>")
+except TypeError:
+    pass
+
+
+class _Sampler:
+    """
+    Keeps every ``stride``-th action line, checked before the message is
+    built so dropped lines cost a counter increment.
+    """
+
+    def __init__(self) -> None:
+        self.stride = 1
+        self.count = 0
+
+    def keep(self) -> bool:
+        if self.stride == 1:
+            return True
+        self.count += 1
+        return self.count % self.stride == 0
+
+
+_sampler = _Sampler()
+
+
+def log_action(message: str, **fields: Any) -> None:
+    """
+    Log a hot-path line at the ``ACTION`` level. ``message`` is a
+    ``str.format`` template over ``fields``, which is only filled in if a
+    sink will receive the line; the fields are also kept as structured
+    ``extra`` values for JSON output.
+    """
+    if _sampler.keep():
+        logger.log(ACTION, message, **fields)
+
+
+class BackgroundSink:
+    """
+    A loguru sink that hands formatted lines to a writer thread, which
+    writes and flushes them in batches, so callers never wait on the
+    stream. Unlike loguru's ``enqueue`` it stays in-process and does not
+    pickle records.
+    """
+
+    def __init__(self, stream: TextIO, batch: int = 1024):
+        self.stream = stream
+        self.batch = batch
+        self.queue: queue.SimpleQueue[str | None] = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def __call__(self, message: str) -> None:
+        self.queue.put(message)
+
+    def stop(self) -> None:
+        self.queue.put(None)
+        self.thread.join()
+
+    def _run(self) -> None:
+        while True:
+            lines = [self.queue.get()]
+            while lines[-1] is not None and len(lines) < self.batch:
+                try:
+                    lines.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            done = lines[-1] is None
+            # The stream can be closed under us at interpreter exit.
+            if not self.stream.closed:
+                self.stream.write("".join(line for line in lines if line is not None))
+                self.stream.flush()
+            if done:
+                return
+
+
+_background: BackgroundSink | None = None
+# A log file opened by ``configure_logging``, closed with its sink.
+_opened: TextIO | None = None
+
+
+def _close_sink() -> None:
+    global _background, _opened
+    if _background is not None:
+        _background.stop()
+        _background = None
+    if _opened is not None:
+        _opened.close()
+        _opened = None
+
+
+atexit.register(_close_sink)
+
+
+def configure_logging(
+    level: str = ACTION,
+    json: bool = False,
+    background: bool = True,
+    action_sample: float = 1.0,
+    sink: Path | TextIO | None = None,
+) -> None:
+    """
+    Replace loguru's handlers with one sink at ``level``.
+
+    ``background`` moves writes onto a ``BackgroundSink`` thread, ``json``
+    writes one serialized record per line, and ``action_sample`` keeps only
+    that fraction of ``ACTION`` lines.
+    """
+    global _background, _opened
+    logger.remove()
+    _close_sink()
+
+    stream = sink if sink is not None else sys.stderr
+    if isinstance(stream, Path):
+        stream = _opened = open(stream, "a")
+    if background:
+        _background = BackgroundSink(stream)
+        stream = _background
+    logger.add(
+        stream,  # pyright: ignore
+        level=level,
+        serialize=json,
+        colorize=False if background else None,
+        backtrace=False,
+        diagnose=False,
+    )
+    _sampler.stride = (
+        max(1, round(1 / action_sample)) if action_sample > 0 else sys.maxsize
+    )
+    _sampler.count = 0
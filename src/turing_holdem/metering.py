@@ -0,0 +1,100 @@
+import threading
+from typing import Any
+
+import dspy
+from loguru import logger
+from pydantic import BaseModel
+
+from .logs import log_action
+
+
+class PromptUsage(BaseModel):
+    requests: int = 0
+    # Requests answered from DSPy's cache, which report no usage.
+    cache_hits: int = 0
+    prompt_tokens: int = 0
+    # Prompt tokens the server reused from its prefix cache, when it
+    # reports them (vLLM with --enable-prompt-tokens-details).
+    cached_prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+def total_usage(usages: list[PromptUsage]) -> PromptUsage:
+    return PromptUsage(
+        **{
+            field: sum(getattr(usage, field) for usage in usages)
+            for field in PromptUsage.model_fields
+        }
+    )
+
+
+class PromptMeter:
+    """
+    Token usage of every completion an LM returns, logged per request at
+    the ``ACTION`` level and summed.
+    """
+
+    def __init__(self):
+        self.usage = PromptUsage()
+        self._lock = threading.Lock()
+
+    def record(self, response: Any) -> None:
+        usage = dict(getattr(response, "usage", None) or {})
+        details = usage.get("prompt_tokens_details")
+        cached = getattr(details, "cached_tokens", None) or 0
+        prompt_tokens = usage.get("prompt_tokens") or 0
+        completion_tokens = usage.get("completion_tokens") or 0
+        cache_hit = getattr(response, "cache_hit", False)
+        with self._lock:
+            self.usage.requests += 1
+            self.usage.cache_hits += cache_hit
+            self.usage.prompt_tokens += prompt_tokens
+            self.usage.cached_prompt_tokens += cached
+            self.usage.completion_tokens += completion_tokens
+        log_action(
+            "LM request: {prompt_tokens} prompt tokens ({cached_tokens} cached), "
+            "{completion_tokens} completion tokens",
+            prompt_tokens=prompt_tokens,
+            cached_tokens=cached,
+            completion_tokens=completion_tokens,
+            cache_hit=cache_hit,
+        )
+
+    def __deepcopy__(self, memo) -> "PromptMeter":
+        # DSPy deep-copies LMs; a copy counts its own requests.
+        return PromptMeter()
+
+    def snapshot(self) -> PromptUsage:
+        with self._lock:
+            return self.usage.model_copy()
+
+
+def log_prompt_usage(usage: PromptUsage) -> None:
+    served = usage.requests - usage.cache_hits
+    logger.info(
+        f"LM requests: {usage.requests} ({usage.cache_hits} from cache), "
+        f"{usage.prompt_tokens / max(served, 1):.0f} prompt tokens per request, "
+        f"{usage.cached_prompt_tokens / max(usage.prompt_tokens, 1):.0%} of prompt "
+        f"tokens from the server's prefix cache, {usage.completion_tokens} "
+        "completion tokens"
+    )
+
+
+class MeteredLM(dspy.LM):
+    """
+    A ``dspy.LM`` that records the usage of every response in ``meter``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.meter = PromptMeter()
+
+    def forward(self, prompt=None, messages=None, **kwargs):
+        response = super().forward(prompt, messages, **kwargs)
+        self.meter.record(response)
+        return response
+
+    async def aforward(self, prompt=None, messages=None, **kwargs):
+        response = await super().aforward(prompt, messages, **kwargs)
+        self.meter.record(response)
+        return response
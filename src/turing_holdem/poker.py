@@ -1,17 +1,44 @@
+from collections import deque
 from pathlib import Path
+from typing import Any, Callable, Sequence
+
 import dspy
 from pydantic import BaseModel, ConfigDict, Field
 
 from pokerkit import Automation, NoLimitTexasHoldem, State
 from loguru import logger
 
-from turing_holdem.dspy_modules import PokerModule, load_dspy_program, get_dspy_lm
+from turing_holdem.dspy_modules import (
+    InferenceMode,
+    PokerModule,
+    get_dspy_lm,
+)
+from .cards import decode, encode, format_cards
+from .decision_service import Decision, DecisionClient
+from .hedging import HedgePolicy, HedgeStats, Hedger, log_hedge_stats
+from .lm_pool import LMPool
+from .metering import PromptUsage, log_prompt_usage, total_usage
+from .logs import log_action
+from .policy import range_action, rule_action
+from .ranges import preflop_tables
+from .registry import ProgramRegistry, default_registry
+from .routing import Router, RoutingTable
+from .stats import (
+    Interval,
+    StoppingRule,
+    Stopping,
+    StopReason,
+    duplicate_intervals,
+    leader,
+    win_rate_intervals,
+)
 from .utils import (
     Action,
     Personalities,
     Personality,
     random_name,
 )
+import random
 import uuid
 
 
@@ -20,7 +47,9 @@ class Player(BaseModel):
 
     name: str = Field(default_factory=lambda: random_name())
     personality: Personality
-    program: PokerModule
+    # Seats without a program play the personality's rule policy.
+    program: PokerModule | None = None
+    program_path: Path | None = None
     idx: int
 
 
@@ -31,7 +60,7 @@ class Poker(BaseModel):
     game: NoLimitTexasHoldem
     over: bool = False
     current_round: int = 1
-    lm: dspy.LM = Field(default_factory=lambda: get_dspy_lm())
+    lm: dspy.BaseLM | None = Field(default_factory=lambda: get_dspy_lm())
     board_index: int = 0
     starting_stacks: dict[int, int] = {
         0: 1000,
@@ -43,102 +72,317 @@ class Poker(BaseModel):
     }
     player_count: int = 6
     winners: list[str] = []
+    # Seat ``idx`` is played by ``players[(idx + rotation) % player_count]``.
+    rotation: int = 0
+    # Per personality, the share of each duplicate deck's rotations it won.
+    duplicate_shares: dict[str, list[float]] = {}
+    win_rates: dict[str, Interval] = {}
+    stopping: Stopping | None = None
+    registry: ProgramRegistry | None = None
+    modes: dict[str, InferenceMode] | None = None
+    # Asks a shared decision server instead of the seats' programs.
+    decisions: DecisionClient | None = None
+    # Per street or personality LMs, in place of ``lm``.
+    router: Router | None = None
+    # Deadlines and hedged requests for LM decisions, falling back to the
+    # personality's rule policy.
+    hedger: Hedger | None = None
+    hedging: HedgeStats | None = None
+    # Fall back on equity against the remaining players' ranges instead.
+    range_fallback: bool = False
+    prompt_usage: PromptUsage | None = None
 
     @classmethod
-    def new_game(cls, programs: list[Path]) -> "Poker":
-        return Poker(
+    def new_game(
+        cls,
+        programs: list[Path] | None = None,
+        modes: dict[str, InferenceMode] | None = None,
+        endpoints: list[str] | None = None,
+        registry: ProgramRegistry | None = None,
+        decision_server: str | None = None,
+        routes: RoutingTable | None = None,
+        hedging: HedgePolicy | None = None,
+        prefix_cache: bool = False,
+        range_fallback: bool = False,
+    ) -> "Poker":
+        """
+        Seat every personality with its optimised program, taken from
+        ``programs`` by its ``gepa_<personality>.json`` file name or else
+        from the registry's directory. With ``decision_server``, every
+        decision is asked of that server instead, which hosts the programs.
+        """
+        if range_fallback:
+            # Loaded (or built, once) now rather than inside the first
+            # preflop fallback, which must answer within the deadline.
+            preflop_tables()
+        if decision_server is not None:
+            return Poker(
+                players={
+                    idx: Player(personality=personality, idx=idx)
+                    for idx, personality in enumerate(Personalities().personalities)
+                },
+                game=new_table(),
+                lm=None,
+                decisions=DecisionClient(decision_server),
+                hedger=Hedger(hedging) if hedging is not None else None,
+                range_fallback=range_fallback,
+            )
+
+        registry = registry or default_registry()
+        by_name = {
+            Path(program).stem.removeprefix("gepa_"): Path(program)
+            for program in programs or []
+        }
+        poker = Poker(
             players={
                 idx: Player(
                     personality=personality,
                     idx=idx,
-                    program=load_dspy_program(program),
-                )
-                for idx, (personality, program) in enumerate(
-                    zip(Personalities().personalities, programs)
+                    program_path=by_name.get(
+                        personality.name, registry.path_for(personality.name)
+                    ),
                 )
+                for idx, personality in enumerate(Personalities().personalities)
+            },
+            game=new_table(),
+            lm=get_dspy_lm(endpoints=endpoints, prefix_cache=prefix_cache),
+            registry=registry,
+            modes=modes,
+            router=Router(routes, endpoints) if routes is not None else None,
+            hedger=Hedger(hedging) if hedging is not None else None,
+            range_fallback=range_fallback,
+        )
+        poker.load_programs()
+        return poker
+
+    def load_programs(self) -> None:
+        """
+        Point every seat at the registry's current program, picking up any
+        program that was re-optimised since the last hand.
+        """
+        if self.registry is None:
+            return
+        self.registry.refresh()
+        for player in self.players.values():
+            if player.program_path is not None:
+                player.program = self.registry.get(player.program_path, self.modes)
+
+    @classmethod
+    def new_rule_game(cls) -> "Poker":
+        return Poker(
+            players={
+                idx: Player(personality=personality, idx=idx)
+                for idx, personality in enumerate(Personalities().personalities)
             },
-            game=NoLimitTexasHoldem(
-                automations=(  # pyright: ignore
-                    Automation.ANTE_POSTING,
-                    Automation.BET_COLLECTION,
-                    Automation.BLIND_OR_STRADDLE_POSTING,
-                    Automation.CARD_BURNING,
-                    Automation.HOLE_DEALING,
-                    Automation.BOARD_DEALING,
-                    Automation.HOLE_CARDS_SHOWING_OR_MUCKING,
-                    Automation.HAND_KILLING,
-                    Automation.CHIPS_PUSHING,
-                    Automation.CHIPS_PULLING,
-                    Automation.RUNOUT_COUNT_SELECTION,  # Cash-game only
-                ),
-                ante_trimming_status=True,  # Uniform antes?
-                raw_antes=0,  # Antes
-                raw_blinds_or_straddles=(25, 50),  # Blinds or straddles
-                min_bet=50,  # Min-bet
-            ),
+            game=new_table(),
+            lm=None,
         )
 
-    def new_state(self) -> State:
-        return self.game(self.starting_stacks, self.player_count)
+    def new_state(self, deck: Sequence[int] | None = None) -> State:
+        """
+        Start a hand, dealt from ``deck`` (codec card indices, top first)
+        when given and from a fresh shuffle otherwise.
+        """
+        state = self.game(self.starting_stacks, self.player_count)
+        if deck is not None:
+            state.deck_cards = deque(decode(deck))
+        while state.can_deal_hole():
+            state.deal_hole()
+        return state
 
-    def play(self, hands: int = 100) -> None:
-        for idx in range(hands):
-            logger.info(f"Hand {idx + 1}")
-            self.hand()
+    def play(
+        self,
+        hands: int = 100,
+        duplicate: bool = False,
+        rule: StoppingRule | None = None,
+    ) -> None:
+        """
+        Play up to ``hands`` hands. With a stopping rule, the run ends as
+        soon as the rule is met and the reason is written to the report.
+        """
+        z = rule.z if rule is not None else 1.96
+        reason = StopReason.BUDGET
+        if duplicate:
+            for deck_idx in range(hands // self.player_count):
+                self.play_deck(deck_idx)
+                self.win_rates = duplicate_intervals(self.duplicate_shares, z)
+                if rule is not None and (stop := rule.check(self.win_rates)):
+                    reason = stop
+                    break
+        else:
+            for idx in range(hands):
+                logger.info("Hand {hand}", hand=idx + 1)
+                self.hand()
+                self.win_rates = win_rate_intervals(self.winners, self._names(), z)
+                if rule is not None and (stop := rule.check(self.win_rates)):
+                    reason = stop
+                    break
+
+        if rule is not None:
+            self.stopping = Stopping(
+                reason=reason,
+                hands=len(self.winners),
+                leader=leader(self.win_rates),
+                confidence=rule.confidence,
+            )
+            logger.info(
+                f"Stopped after {self.stopping.hands} hands: {self.stopping.reason.value}"
+            )
         self.report()
 
-    def hand(self) -> None:
-        state = self.new_state()
+    def play_batch(
+        self,
+        hands: int,
+        duplicate: bool = False,
+        heartbeat: Callable[[], Any] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Play a batch of hands for a distributed run and return its raw
+        results, calling ``heartbeat`` after every hand or deck.
+        """
+        self.winners = []
+        self.duplicate_shares = {}
+        before = self.hedger.snapshot().model_dump() if self.hedger is not None else {}
+        for idx in range(hands // self.player_count if duplicate else hands):
+            if duplicate:
+                self.play_deck(idx)
+            else:
+                logger.info("Hand {hand}", hand=idx + 1)
+                self.hand()
+            if heartbeat is not None:
+                heartbeat()
+        result = self.model_dump(include={"winners", "duplicate_shares"})
+        if self.hedger is not None:
+            # The game is reused across batches, so report this batch's share.
+            result["hedging"] = {
+                name: count - before[name]
+                for name, count in self.hedger.snapshot().model_dump().items()
+            }
+        return result
+
+    def merge(self, results: list[dict[str, Any]], duplicate: bool = False) -> None:
+        """
+        Combine ``play_batch`` results from every worker into this game's
+        winners and win-rate intervals.
+        """
+        for result in results:
+            self.winners.extend(result["winners"])
+            for name, shares in result["duplicate_shares"].items():
+                self.duplicate_shares.setdefault(name, []).extend(shares)
+            if "hedging" in result:
+                totals = (self.hedging or HedgeStats()).model_dump()
+                self.hedging = HedgeStats(
+                    **{
+                        name: totals[name] + count
+                        for name, count in result["hedging"].items()
+                    }
+                )
+        self.win_rates = (
+            duplicate_intervals(self.duplicate_shares)
+            if duplicate
+            else win_rate_intervals(self.winners, self._names())
+        )
+
+    def play_deck(self, deck_idx: int = 0) -> None:
+        """
+        Deal one deck once per seat rotation, so every personality plays
+        every seat's cards against the same opponents.
+        """
+        names = self._names()
+        deck = random.sample(range(52), 52)
+        wins = dict.fromkeys(names, 0)
+        for rotation in range(self.player_count):
+            logger.info(
+                "Deck {deck}, rotation {rotation}/{rotations}",
+                deck=deck_idx + 1,
+                rotation=rotation + 1,
+                rotations=self.player_count,
+            )
+            self.hand(deck, rotation)
+            wins[self.winners[-1]] += 1
+        for name in names:
+            self.duplicate_shares.setdefault(name, []).append(
+                wins[name] / self.player_count
+            )
+
+    def hand(self, deck: Sequence[int] | None = None, rotation: int = 0) -> State:
+        self.load_programs()
+        self.rotation = rotation
+        state = self.new_state(deck)
 
         for street in ["Preflop", "Flop", "Turn", "River"]:
-            logger.info(f"Street: {street}")
+            log_action("Street: {street}", street=street)
             for _ in range(state.player_count):
-                if state.actor_index:
+                if state.actor_index is not None:
+                    idx = state.actor_index
                     name = self._current_player(state).name
-                    match self._get_action(state, state.actor_index):
+                    action = self._get_action(state, idx)
+                    fields = {
+                        "name": name,
+                        "seat": idx,
+                        "street": street,
+                        "action": action.value,
+                    }
+                    match action:
                         case Action.ALL_IN:
-                            logger.info(f"Player {name} went all in.")
-                            state.complete_bet_or_raise_to(
-                                state.get_effective_stack(state.actor_index)
-                            )
+                            all_in = state.bets[idx] + state.get_effective_stack(idx)
+                            if state.can_complete_bet_or_raise_to(all_in):
+                                log_action("Player {name} went all in.", **fields)
+                                state.complete_bet_or_raise_to(all_in)
+                            else:
+                                log_action(
+                                    "Player {name} could not go all in, so they called",
+                                    **fields,
+                                )
+                                state.check_or_call()
                         case Action.RAISE:
                             if state.can_complete_bet_or_raise_to(
                                 state.min_completion_betting_or_raising_to_amount
                             ):
-                                logger.info(f"Player {name} raised.")
+                                log_action("Player {name} raised.", **fields)
                                 state.complete_bet_or_raise_to(
                                     state.min_completion_betting_or_raising_to_amount
                                 )
-                            else:
-                                logger.info(
-                                    f"Player {name} could not raise, so they folded"
+                            elif state.can_fold():
+                                log_action(
+                                    "Player {name} could not raise, so they folded",
+                                    **fields,
                                 )
                                 state.fold()
+                            else:
+                                log_action(
+                                    "Player {name} could not raise, so they checked",
+                                    **fields,
+                                )
+                                state.check_or_call()
                         case Action.CALL:
                             if state.can_check_or_call():
-                                logger.info(f"Player {name} called.")
+                                log_action("Player {name} called.", **fields)
                                 state.check_or_call()
                             else:
-                                logger.info(
-                                    f"Player {name} could not call, so they folded"
+                                log_action(
+                                    "Player {name} could not call, so they folded",
+                                    **fields,
                                 )
                                 state.fold()
                         case Action.CHECK:
                             if state.can_check_or_call():
-                                logger.info(f"Player {name} checked.")
+                                log_action("Player {name} checked.", **fields)
                                 state.check_or_call()
                             else:
-                                logger.info(
-                                    f"Player {name} could not check, so they folded"
+                                log_action(
+                                    "Player {name} could not check, so they folded",
+                                    **fields,
                                 )
                                 state.fold()
                         case Action.FOLD:
-                            try:
-                                logger.info(f"Player {name} folded.")
+                            if state.can_fold():
+                                log_action("Player {name} folded.", **fields)
                                 state.fold()
-                            except Exception as e:
-                                logger.warning(
-                                    f"Player {name} wanted to fold, but checks prevented it: {e}."
+                            else:
+                                log_action(
+                                    "Player {name} wanted to fold, but checked instead.",
+                                    **fields,
                                 )
                                 state.check_or_call()
 
@@ -148,75 +392,158 @@ class Poker(BaseModel):
                 if state.can_check_or_call()
             ]
         winner = state.stacks.index(max(state.stacks))
-        self.winners.append(self.players[winner].personality.name)
+        self.winners.append(self._seat(winner).personality.name)
+        return state
 
     def report(self) -> None:
         reports_dir = Path("reports")
         reports_dir.mkdir(parents=True, exist_ok=True)
         id = str(uuid.uuid4())[:10]
+        if self.hedger is not None:
+            self.hedging = self.hedger.snapshot()
+        # Decisions asked of a decision server are metered there, not here.
+        lms = [self.lm, *(self.router.lms() if self.router is not None else [])]
+        usages = [lm.meter.snapshot() for lm in lms if hasattr(lm, "meter")]
+        if usages:
+            self.prompt_usage = total_usage(usages)
         with open(f"{reports_dir}/data_{id}.json", "w") as file:
-            file.write(self.model_dump_json(include={"winners"}))
+            file.write(
+                self.model_dump_json(
+                    include={
+                        "winners",
+                        "duplicate_shares",
+                        "win_rates",
+                        "stopping",
+                        "hedging",
+                        "prompt_usage",
+                    }
+                )
+            )
+        for name, interval in self.win_rates.items():
+            logger.info(
+                f"{name}: {interval.estimate:.1%} "
+                f"[{interval.low:.1%}, {interval.high:.1%}]"
+            )
+        if isinstance(self.lm, LMPool):
+            self.lm.log_stats()
+        if self.hedging is not None:
+            log_hedge_stats(self.hedging)
+        if self.prompt_usage is not None:
+            log_prompt_usage(self.prompt_usage)
 
     def _get_action(self, state: State, idx: int) -> Action:
-        personality = self.players[idx].personality.name
-        hole_cards = hole_cards = tuple(state.get_down_cards(idx))
-        board = tuple(state.get_board_cards(self.board_index))
+        player = self._seat(idx)
+        hole_cards = encode(state.get_down_cards(idx))
+        board = encode(state.get_board_cards(self.board_index))
+        if self.decisions is None and player.program is None:
+            return rule_action(player.personality, hole_cards, board)
+
         street = self._get_street(state)
+        if self.hedger is None:
+            return self._decide(player, hole_cards, board, street)
+        return self.hedger.call(
+            lambda: self._decide(player, hole_cards, board, street),
+            lambda: self._fallback(state, idx, hole_cards, board),
+        )
 
+    def _fallback(
+        self, state: State, idx: int, hole_cards: Sequence[int], board: Sequence[int]
+    ) -> Action:
+        personality = self._seat(idx).personality
+        if not self.range_fallback:
+            return rule_action(personality, hole_cards, board)
+        opponents = [
+            self._seat(seat).personality
+            for seat, active in enumerate(state.statuses)
+            if active and seat != idx
+        ]
+        return range_action(personality, hole_cards, board, opponents)
+
+    def _decide(
+        self,
+        player: Player,
+        hole_cards: Sequence[int],
+        board: Sequence[int],
+        street: str,
+    ) -> Action:
+        personality = player.personality.name
+        if self.decisions is not None:
+            return self.decisions.decide(
+                Decision(
+                    personality=personality,
+                    hole_cards=format_cards(hole_cards),
+                    street=street,
+                    board=format_cards(board),
+                )
+            ).action
+
+        program: PokerModule = player.program  # pyright: ignore
+        args = (program, personality, format_cards(hole_cards), format_cards(board))
+        if self.router is not None:
+            with self.router.context(personality, street):
+                return self._predict(*args, street)
+        return self._predict(*args, street)
+
+    def _predict(
+        self,
+        program: PokerModule,
+        personality: str,
+        hole_cards: str,
+        board: str,
+        street: str,
+    ) -> Action:
         match street:
             case "Preflop":
                 return Action.from_str(
-                    self.players[idx]
-                    .program.preflop_module(
+                    program.preflop_module(
                         personality=personality,
                         hole_cards=hole_cards,
                         board=board,
                         street=street,
-                    )
-                    .action
+                    ).action
                 )
             case "Flop":
                 return Action.from_str(
-                    self.players[idx]
-                    .program.flop_module(
+                    program.flop_module(
                         personality=personality,
                         hole_cards=hole_cards,
                         board=board,
                         street=street,
-                    )
-                    .action
+                    ).action
                 )
             case "Turn":
                 return Action.from_str(
-                    self.players[idx]
-                    .program.turn_module(
+                    program.turn_module(
                         personality=personality,
                         hole_cards=hole_cards,
                         board=board,
                         street=street,
-                    )
-                    .action
+                    ).action
                 )
             case "River":
                 return Action.from_str(
-                    self.players[idx]
-                    .program.river_module(
+                    program.river_module(
                         personality=personality,
                         hole_cards=hole_cards,
                         board=board,
                         street=street,
-                    )
-                    .action
+                    ).action
                 )
             case _:
-                raise ValueError(f"Invalid Steet: {state.street_index}")
+                raise ValueError(f"Invalid Steet: {street}")
 
     def _current_player(self, state: State) -> Player:
         try:
-            return self.players[state.actor_index]  # pyright: ignore
+            return self._seat(state.actor_index)  # pyright: ignore
         except Exception as e:
             raise ValueError(e)
 
+    def _seat(self, idx: int) -> Player:
+        return self.players[(idx + self.rotation) % self.player_count]
+
+    def _names(self) -> list[str]:
+        return [player.personality.name for player in self.players.values()]
+
     def _get_street(self, state: State) -> str:
         match state.street_index:
             case 0:
@@ -229,3 +556,26 @@ class Poker(BaseModel):
                 return "River"
             case _:
                 raise ValueError(f"Invalid Steet: {state.street_index}")
+
+
+def new_table() -> NoLimitTexasHoldem:
+    # Hole cards are dealt by ``Poker.new_state`` so a hand can be replayed
+    # from a given deck.
+    return NoLimitTexasHoldem(
+        automations=(  # pyright: ignore
+            Automation.ANTE_POSTING,
+            Automation.BET_COLLECTION,
+            Automation.BLIND_OR_STRADDLE_POSTING,
+            Automation.CARD_BURNING,
+            Automation.BOARD_DEALING,
+            Automation.HOLE_CARDS_SHOWING_OR_MUCKING,
+            Automation.HAND_KILLING,
+            Automation.CHIPS_PUSHING,
+            Automation.CHIPS_PULLING,
+            Automation.RUNOUT_COUNT_SELECTION,  # Cash-game only
+        ),
+        ante_trimming_status=True,  # Uniform antes?
+        raw_antes=0,  # Antes
+        raw_blinds_or_straddles=(25, 50),  # Blinds or straddles
+        min_bet=50,  # Min-bet
+    )
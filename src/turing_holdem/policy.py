@@ -0,0 +1,120 @@
+from typing import Sequence
+
+import numpy as np
+
+from .cards import CARD_INDEX
+from .evaluator import evaluate
+from .ranges import cached_range_weights, range_equity
+from .utils import ACTION_THRESHOLDS, Action, Personality
+
+# Rule-driven seats read their preflop strength off the personality's
+# opening ranges and their postflop strength off the made hand category.
+PREFLOP_STRENGTH = {"strong": 0.6, "middle": 0.4, "speculative": 0.25}
+# An opponent still in the hand holds its stronger hands more often, so
+# opponent ranges weight each label by its strength relative to "strong".
+RANGE_LABEL_WEIGHTS = {
+    label: strength / PREFLOP_STRENGTH["strong"]
+    for label, strength in PREFLOP_STRENGTH.items()
+}
+UNRANGED_STRENGTH = 0.1
+POSTFLOP_STRENGTH = np.array([0.1, 0.35, 0.55, 0.65, 0.72, 0.75, 0.85, 0.95, 1.0])
+
+ACTIONS: list[Action] = [
+    Action.FOLD,
+    Action.CHECK,
+    Action.CALL,
+    Action.RAISE,
+    Action.ALL_IN,
+]
+
+
+def preflop_table(personality: Personality) -> np.ndarray:
+    """
+    A symmetric 52x52 table of preflop strength by hole card indices.
+    """
+    table = np.full((52, 52), UNRANGED_STRENGTH)
+    # Later ranges win, so a combo listed twice gets its strongest label.
+    for label in ("speculative", "middle", "strong"):
+        for combo in getattr(personality, label):
+            first, second = (CARD_INDEX[card] for card in combo)
+            table[first, second] = table[second, first] = PREFLOP_STRENGTH[label]
+    return table
+
+
+_PREFLOP_TABLES: dict[str, np.ndarray] = {}
+
+
+def cached_preflop_table(personality: Personality) -> np.ndarray:
+    if personality.name not in _PREFLOP_TABLES:
+        _PREFLOP_TABLES[personality.name] = preflop_table(personality)
+    return _PREFLOP_TABLES[personality.name]
+
+
+def rule_strengths(
+    preflop: np.ndarray,
+    personalities: np.ndarray,
+    hole_cards: np.ndarray,
+    board_cards: np.ndarray,
+) -> np.ndarray:
+    """
+    Rule strength, without bias, for rows of hole cards (n, 2) and boards
+    (n, 5) padded with -1. ``personalities`` indexes each row into the
+    stacked preflop tables (p, 52, 52).
+    """
+    hole_cards = np.asarray(hole_cards, dtype=np.int64)
+    board_cards = np.asarray(board_cards, dtype=np.int64)
+    postflop = (board_cards >= 0).any(axis=1)
+
+    strength = np.empty(len(hole_cards))
+    pre = ~postflop
+    strength[pre] = preflop[personalities[pre], hole_cards[pre, 0], hole_cards[pre, 1]]
+    strength[postflop] = POSTFLOP_STRENGTH[
+        evaluate(np.concatenate([hole_cards[postflop], board_cards[postflop]], axis=1))
+        >> 20
+    ]
+    return strength
+
+
+def action_codes(strength: np.ndarray) -> np.ndarray:
+    """
+    Vectorised ``Personality.act``, returning indices into ``ACTIONS``.
+    """
+    return np.select(
+        [strength > threshold for threshold, _ in ACTION_THRESHOLDS],
+        [ACTIONS.index(action) for _, action in ACTION_THRESHOLDS],
+        ACTIONS.index(Action.FOLD),
+    )
+
+
+def rule_action(
+    personality: Personality,
+    hole_cards: Sequence[int],
+    board_cards: Sequence[int],
+) -> Action:
+    board = np.full((1, 5), -1)
+    board[0, : len(board_cards)] = board_cards
+    strength = rule_strengths(
+        cached_preflop_table(personality)[None],
+        np.zeros(1, dtype=np.int64),
+        np.array([hole_cards]),
+        board,
+    )[0]
+    return personality.act(strength + personality.bias)
+
+
+def range_action(
+    personality: Personality,
+    hole_cards: Sequence[int],
+    board_cards: Sequence[int],
+    opponents: Sequence[Personality],
+) -> Action:
+    """
+    The personality's action on its equity against the ranges of the
+    ``opponents`` still in the hand, rather than the rule strengths.
+    """
+    strength = range_equity(
+        hole_cards,
+        board_cards,
+        [cached_range_weights(opponent, RANGE_LABEL_WEIGHTS) for opponent in opponents],
+    )
+    return personality.act(strength + personality.bias)
@@ -0,0 +1,295 @@
+import hashlib
+import os
+from functools import cache
+from itertools import combinations
+from math import comb
+from pathlib import Path
+from typing import Mapping, Sequence
+
+import numpy as np
+from loguru import logger
+
+from . import evaluator
+from .cards import CARD_INDEX
+from .evaluator import evaluate
+from .utils import Personality
+
+# Every two-card hand, as card index pairs in increasing order.
+COMBOS = np.array(list(combinations(range(52), 2)), dtype=np.int64)
+COMBO_INDEX = np.full((52, 52), -1, dtype=np.int64)
+COMBO_INDEX[COMBOS[:, 0], COMBOS[:, 1]] = np.arange(len(COMBOS))
+COMBO_INDEX[COMBOS[:, 1], COMBOS[:, 0]] = np.arange(len(COMBOS))
+# BLOCKED[card] marks the combos holding ``card``.
+BLOCKED = np.zeros((52, len(COMBOS)), dtype=bool)
+BLOCKED[COMBOS[:, 0], np.arange(len(COMBOS))] = True
+BLOCKED[COMBOS[:, 1], np.arange(len(COMBOS))] = True
+# Combos sharing a card cannot face each other.
+OVERLAP = BLOCKED[COMBOS[:, 0]] | BLOCKED[COMBOS[:, 1]]
+
+DEFAULT_TABLES_PATH = Path(".cache/preflop_equity.npz")
+PREFLOP_RUNOUTS = 2048
+RUNOUTS = 256
+
+
+def range_weights(
+    personality: Personality, labels: Mapping[str, float] | None = None
+) -> np.ndarray:
+    """
+    Weights over the 1326 combos of the hands a personality plays: one for
+    every combo in its ranges, or ``labels`` per range label to play e.g.
+    its speculative hands less often.
+    """
+    labels = labels or {}
+    weights = np.zeros(len(COMBOS))
+    # Later ranges win, as in the rule policy's preflop table.
+    for label in ("speculative", "middle", "strong"):
+        for combo in getattr(personality, label):
+            first, second = (CARD_INDEX[card] for card in combo)
+            weights[COMBO_INDEX[first, second]] = labels.get(label, 1.0)
+    return weights
+
+
+_RANGE_WEIGHTS: dict[tuple, np.ndarray] = {}
+
+
+def cached_range_weights(
+    personality: Personality, labels: Mapping[str, float] | None = None
+) -> np.ndarray:
+    key = (personality.name, *sorted((labels or {}).items()))
+    if key not in _RANGE_WEIGHTS:
+        _RANGE_WEIGHTS[key] = range_weights(personality, labels)
+    return _RANGE_WEIGHTS[key]
+
+
+def runouts(
+    board: Sequence[int],
+    dead: Sequence[int],
+    count: int,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """
+    Five-card boards (n, 5) completing ``board`` without ``dead`` cards:
+    every one of them when there are at most ``count``, else ``count``
+    drawn at random.
+    """
+    missing = 5 - len(board)
+    deck = np.setdiff1d(np.arange(52), [*board, *dead])
+    if comb(len(deck), missing) <= count:
+        drawn = np.array(list(combinations(deck, missing)), dtype=np.int64)
+    else:
+        order = np.argsort(rng.random((count, len(deck))), axis=1)
+        drawn = deck[order[:, :missing]]
+    drawn = drawn.reshape(len(drawn), missing)
+    return np.concatenate(
+        [
+            np.broadcast_to(
+                np.asarray(board, dtype=np.int64), (len(drawn), 5 - missing)
+            ),
+            drawn,
+        ],
+        axis=1,
+    )
+
+
+def combo_scores(boards: np.ndarray) -> np.ndarray:
+    """
+    Scores (n, 1326) of every combo on each of ``n`` five-card boards, -1
+    for combos holding a board card.
+    """
+    cards = np.concatenate(
+        [
+            np.broadcast_to(COMBOS, (len(boards), len(COMBOS), 2)),
+            np.broadcast_to(boards[:, None], (len(boards), len(COMBOS), 5)),
+        ],
+        axis=2,
+    )
+    scores = evaluate(cards.reshape(-1, 7)).reshape(len(boards), len(COMBOS))
+    return np.where(BLOCKED[boards].any(axis=1), -1, scores).astype(np.int32)
+
+
+def board_scores(boards: np.ndarray, chunk: int = 256) -> np.ndarray:
+    """
+    ``combo_scores`` for any number of boards, scored a chunk at a time.
+    """
+    return np.concatenate(
+        [
+            combo_scores(boards[start : start + chunk])
+            for start in range(0, len(boards), chunk)
+        ]
+    )
+
+
+def pairwise_equity(scores: np.ndarray, chunk: int = 256) -> np.ndarray:
+    """
+    The range-vs-range matrix (1326, 1326) over boards scored by
+    ``combo_scores``: the pot share of the row combo against the column
+    combo. Pairs that never meet (sharing a card, or a board card) are NaN.
+    """
+    net = np.zeros((len(COMBOS), len(COMBOS)), dtype=np.int32)
+    # int16 keeps the pairwise pass cheap; it is summed per chunk of boards,
+    # well below overflow.
+    outcome = np.empty((len(COMBOS), len(COMBOS)), dtype=np.int16)
+    for start in range(0, len(scores), chunk):
+        partial = np.zeros((len(COMBOS), len(COMBOS)), dtype=np.int16)
+        for row in scores[start : start + chunk]:
+            # Scores as ranks, so they fit in int16.
+            ranks = np.unique(row, return_inverse=True)[1].astype(np.int16)
+            # +1 where the row combo wins on this board, -1 where it loses.
+            np.subtract.outer(ranks, ranks, out=outcome)
+            np.sign(outcome, out=outcome)
+            outcome[row < 0] = 0
+            outcome[:, row < 0] = 0
+            partial += outcome
+        net += partial
+    # The boards on which both combos were live.
+    live = (scores >= 0).astype(np.float32)
+    counts = live.T @ live
+    with np.errstate(invalid="ignore", divide="ignore"):
+        matrix = (counts + net) / (2 * counts)
+    matrix[OVERLAP | (counts == 0)] = np.nan
+    return matrix.astype(np.float32)
+
+
+def equity_matrix(
+    board: Sequence[int] = (), count: int = PREFLOP_RUNOUTS, seed: int = 0
+) -> np.ndarray:
+    """
+    The range-vs-range matrix on ``board``, over its runouts (every one of
+    them when there are at most ``count``).
+    """
+    boards = runouts(board, (), count, np.random.default_rng(seed))
+    return pairwise_equity(board_scores(boards))
+
+
+def build_preflop_tables(
+    count: int = PREFLOP_RUNOUTS, seed: int = 0
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The preflop range-vs-range matrix, and the combo scores on the boards
+    it was built from.
+    """
+    scores = board_scores(runouts((), (), count, np.random.default_rng(seed)))
+    return pairwise_equity(scores), scores
+
+
+def tables_key(count: int = PREFLOP_RUNOUTS, seed: int = 0) -> str:
+    """
+    What the preflop tables were built from: the runouts, their seed and
+    the hand evaluator's source.
+    """
+    digest = hashlib.sha256(Path(evaluator.__file__).read_bytes()).hexdigest()
+    return f"runouts={count},seed={seed},evaluator={digest[:12]}"
+
+
+@cache
+def preflop_tables(path: Path = DEFAULT_TABLES_PATH) -> tuple[np.ndarray, np.ndarray]:
+    """
+    ``build_preflop_tables``, computed once (several seconds) and kept in
+    ``path`` for every later process. Tables built from other runouts or
+    by another evaluator are rebuilt.
+    """
+    path = Path(path)
+    key = tables_key()
+    if path.exists():
+        with np.load(path) as tables:
+            if "key" in tables.files and str(tables["key"]) == key:
+                return tables["matrix"], tables["scores"]
+        logger.info(f"Rebuilding the preflop tables in {path} for {key}")
+    matrix, scores = build_preflop_tables()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Written under a temporary name, so concurrent processes never read
+    # a partial file.
+    partial = path.with_suffix(f".{os.getpid()}.npz")
+    np.savez(partial, matrix=matrix, scores=scores, key=np.array(key))
+    os.replace(partial, path)
+    return matrix, scores
+
+
+def board_shares(
+    hole_cards: Sequence[int],
+    board_cards: Sequence[int],
+    count: int = RUNOUTS,
+    rng: np.random.Generator | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The pot share (n, 1326) of ``hole_cards`` against each opponent combo
+    on each runout of the board, and whether the combo could be held there.
+    Preflop uses the boards of the preflop tables that miss the hole cards;
+    later, every runout is scored on the turn and river, and ``count``
+    sampled ones on the flop.
+    """
+    hole = list(hole_cards)
+    if len(board_cards) == 0:
+        _, scores = preflop_tables()
+        hero = scores[:, COMBO_INDEX[hole[0], hole[1]]]
+        scores = scores[hero >= 0]
+        hero = hero[hero >= 0]
+    else:
+        boards = runouts(board_cards, hole, count, rng or np.random.default_rng())
+        hero = evaluate(
+            np.concatenate([np.tile(hole, (len(boards), 1)), boards], axis=1)
+        )
+        scores = combo_scores(boards)
+    live = (scores >= 0) & ~BLOCKED[hole].any(axis=0)
+    share = np.where(live, (np.sign(hero[:, None] - scores) + 1) / 2, 0.0)
+    return share, live
+
+
+def hand_equities(
+    hole_cards: Sequence[int],
+    board_cards: Sequence[int],
+    count: int = RUNOUTS,
+    rng: np.random.Generator | None = None,
+) -> np.ndarray:
+    """
+    The heads-up pot share (1326,) of ``hole_cards`` against each opponent
+    combo, NaN for combos that cannot be held. Preflop reads the
+    precomputed matrix.
+    """
+    hole = list(hole_cards)
+    if len(board_cards) == 0:
+        matrix, _ = preflop_tables()
+        return matrix[COMBO_INDEX[hole[0], hole[1]]]
+    share, live = board_shares(hole, board_cards, count, rng)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return share.sum(axis=0) / live.sum(axis=0)
+
+
+def range_equity(
+    hole_cards: Sequence[int],
+    board_cards: Sequence[int],
+    ranges: Sequence[np.ndarray],
+    count: int = RUNOUTS,
+    rng: np.random.Generator | None = None,
+) -> float:
+    """
+    Equity of ``hole_cards`` against one opponent per weighted range.
+
+    Heads up, it is the range-weighted row of ``hand_equities``. Against
+    several opponents, the shares of each range beaten are multiplied per
+    runout and averaged over runouts: multiplying the heads-up equities
+    instead would treat opponents as independent when they all face the
+    same board, and understate a hand's equity (a random hand against five
+    random hands would get 1/32 rather than 1/6). Opponents' cards are not
+    removed from each other's ranges.
+    """
+    weights = np.stack(ranges, axis=1)
+    if len(ranges) == 1:
+        equities = hand_equities(hole_cards, board_cards, count, rng)
+        live = ~np.isnan(equities)
+        total = weights[live, 0].sum()
+        # A range the known cards block entirely is treated as random.
+        if total == 0:
+            return float(equities[live].mean())
+        return float(equities[live] @ weights[live, 0] / total)
+
+    share, live = board_shares(hole_cards, board_cards, count, rng)
+    beaten = share @ weights
+    held = live @ weights
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shares = np.where(
+            held > 0,
+            beaten / held,
+            share.sum(axis=1, keepdims=True) / live.sum(axis=1, keepdims=True),
+        )
+    return float(shares.prod(axis=1).mean())
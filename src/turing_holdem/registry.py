@@ -0,0 +1,86 @@
+import threading
+import time
+from pathlib import Path
+
+from loguru import logger
+
+from .dspy_modules import InferenceMode, PokerModule, load_dspy_program
+
+DEFAULT_PROGRAMS_DIR = Path("programs")
+
+Modes = dict[str, InferenceMode] | None
+
+
+class ProgramRegistry:
+    """
+    Optimised programs loaded once per file and inference modes and shared
+    by every table and thread that asks for them. Callers must treat the
+    programs as read-only.
+
+    ``refresh`` reloads any file whose modification time has changed, so a
+    newly optimised program replaces the old one between hands. A file that
+    fails to load (e.g. while it is still being written) keeps the
+    previous program until a later refresh succeeds.
+    """
+
+    def __init__(self, directory: Path = DEFAULT_PROGRAMS_DIR, interval: float = 5.0):
+        self.directory = directory
+        # Minimum seconds between two looks at the files.
+        self.interval = interval
+        self._programs: dict[tuple[Path, tuple], tuple[float, PokerModule]] = {}
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def path_for(self, personality: str) -> Path:
+        return self.directory / f"gepa_{personality}.json"
+
+    def get(self, path: Path, modes: Modes = None) -> PokerModule:
+        key = self._key(path, modes)
+        with self._lock:
+            if key not in self._programs:
+                mtime = key[0].stat().st_mtime
+                self._programs[key] = (mtime, load_dspy_program(key[0], modes))
+                logger.info(f"Loaded program {key[0]}")
+            return self._programs[key][1]
+
+    def refresh(self, force: bool = False) -> list[Path]:
+        """
+        Reload programs whose files changed and return their paths.
+        """
+        now = time.monotonic()
+        if not force and now - self._checked < self.interval:
+            return []
+        self._checked = now
+
+        reloaded = []
+        with self._lock:
+            for key, (mtime, _) in list(self._programs.items()):
+                path, modes = key
+                try:
+                    current = path.stat().st_mtime
+                    if current == mtime:
+                        continue
+                    program = load_dspy_program(path, dict(modes) or None)
+                except Exception as e:
+                    logger.warning(f"Keeping the loaded {path}, reload failed: {e}")
+                    continue
+                self._programs[key] = (current, program)
+                reloaded.append(path)
+                logger.info(f"Reloaded program {path}")
+        return reloaded
+
+    def _key(self, path: Path, modes: Modes) -> tuple[Path, tuple]:
+        return Path(path).resolve(), tuple(sorted((modes or {}).items()))
+
+
+_default: ProgramRegistry | None = None
+
+
+def default_registry() -> ProgramRegistry:
+    """
+    The process-wide registry over ``programs/``.
+    """
+    global _default
+    if _default is None:
+        _default = ProgramRegistry()
+    return _default
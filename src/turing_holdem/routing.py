@@ -0,0 +1,116 @@
+import contextlib
+import threading
+from pathlib import Path
+from typing import ContextManager
+
+import dspy
+from pydantic import BaseModel, ConfigDict
+
+from .dspy_modules import DEFAULT_MODEL, new_dspy_lm
+from .utils import STREETS, Personalities
+
+
+class Route(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    model: str = DEFAULT_MODEL
+    # The router's endpoints when unset.
+    endpoints: tuple[str, ...] = ()
+
+    @property
+    def name(self) -> str:
+        if not self.endpoints:
+            return self.model
+        return f"{self.model}@{'|'.join(self.endpoints)}"
+
+
+class RoutingTable(BaseModel):
+    """
+    LMs per street, personality or ``personality.street``. The most
+    specific key wins, a street before a personality; decisions without a
+    route use the globally configured LM.
+    """
+
+    routes: dict[str, Route] = {}
+
+    def route(self, personality: str, street: str) -> Route | None:
+        street = street.lower()
+        for key in (f"{personality}.{street}", street, personality):
+            if key in self.routes:
+                return self.routes[key]
+        return None
+
+
+def parse_route(text: str) -> Route:
+    """
+    Parse ``model`` or ``model@api_base``, with several API bases to pool
+    separated by ``|``.
+    """
+    model, _, endpoints = text.partition("@")
+    return Route(
+        model=model or DEFAULT_MODEL,
+        endpoints=tuple(endpoints.split("|")) if endpoints else (),
+    )
+
+
+def parse_routes(text: str) -> RoutingTable:
+    """
+    Parse a JSON routing table file, or routes such as
+    ``"preflop=small-model@http://gpu1:8000/v1,river=large-model"``.
+    """
+    if Path(text).is_file():
+        table = RoutingTable.model_validate_json(Path(text).read_text())
+    else:
+        table = RoutingTable(
+            routes={
+                key: parse_route(route)
+                for key, route in (item.split("=", 1) for item in text.split(","))
+            }
+        )
+
+    personalities = {p.name for p in Personalities().personalities}
+    for key in table.routes:
+        personality, _, street = key.rpartition(".")
+        if personality:
+            valid = personality in personalities and street in STREETS
+        else:
+            valid = street in STREETS or street in personalities
+        if not valid:
+            raise ValueError(f"Invalid route: {key}")
+    return table
+
+
+class Router:
+    """
+    Builds one LM per distinct route, on first use, and shares it between
+    every table and thread. Routes without endpoints go to ``endpoints``,
+    the API bases the rest of the game uses.
+    """
+
+    def __init__(self, table: RoutingTable, endpoints: list[str] | None = None):
+        self.table = table
+        self.endpoints = endpoints
+        self._lms: dict[Route, dspy.BaseLM] = {}
+        self._lock = threading.Lock()
+
+    def lm_for(self, personality: str, street: str) -> dspy.BaseLM | None:
+        route = self.table.route(personality, street)
+        if route is None:
+            return None
+        with self._lock:
+            if route not in self._lms:
+                self._lms[route] = new_dspy_lm(
+                    route.model, list(route.endpoints) or self.endpoints
+                )
+            return self._lms[route]
+
+    def lms(self) -> list[dspy.BaseLM]:
+        with self._lock:
+            return list(self._lms.values())
+
+    def context(self, personality: str, street: str) -> ContextManager:
+        """
+        A context in which DSPy calls use the decision's route.
+        """
+        lm = self.lm_for(personality, street)
+        return dspy.context(lm=lm) if lm is not None else contextlib.nullcontext()
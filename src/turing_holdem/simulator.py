@@ -0,0 +1,435 @@
+import time
+
+import numpy as np
+from loguru import logger
+from pydantic import BaseModel
+
+from .evaluator import evaluate
+from .policy import ACTIONS, action_codes, cached_preflop_table, rule_strengths
+from .stats import Interval, duplicate_intervals, wilson_interval
+from .utils import Action, Personalities, Personality
+
+PLAYER_COUNT = 6
+STARTING_STACK = 1000
+BLINDS = (25, 50)
+MIN_BET = 50
+
+# Hole cards go round the table twice, then burn, flop, burn, turn, burn,
+# river, which is the order pokerkit deals from the top of the deck.
+HOLE_POSITIONS = np.array([[seat, seat + PLAYER_COUNT] for seat in range(PLAYER_COUNT)])
+BOARD_POSITIONS = np.array([13, 14, 15, 17, 19])
+VISIBLE_BOARD = np.array([0, 3, 4, 5])
+
+FOLD, CHECK, CALL, RAISE, ALL_IN = (
+    ACTIONS.index(action)
+    for action in (Action.FOLD, Action.CHECK, Action.CALL, Action.RAISE, Action.ALL_IN)
+)
+
+
+class SimulationReport(BaseModel):
+    hands: int
+    seconds: float
+    wins: dict[str, int]
+    win_rates: dict[str, float]
+    intervals: dict[str, Interval]
+
+
+def deal_decks(count: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    ``count`` shuffled decks of codec card indices, one per row.
+    """
+    return np.argsort(rng.random((count, 52)), axis=1)
+
+
+class TableBatch:
+    """
+    A batch of six-handed tables played in lockstep with NumPy, every seat
+    driven by its personality's rule policy.
+
+    The betting rules mirror pokerkit's no-limit hold'em state with the
+    blinds and min bet of ``Poker``, and ``play`` follows the action loop of
+    ``Poker.hand``, so for the same deck both paths end with the same
+    stacks.
+    """
+
+    def __init__(
+        self,
+        decks: np.ndarray,
+        personalities: list[Personality],
+        seats: np.ndarray | None = None,
+    ):
+        self.decks = np.asarray(decks, dtype=np.int64)
+        self.count = len(self.decks)
+        self.rows = np.arange(self.count)
+        self.personalities = personalities
+        # Personality index sitting in each seat of each table.
+        self.seats = (
+            np.tile(np.arange(PLAYER_COUNT), (self.count, 1))
+            if seats is None
+            else np.asarray(seats, dtype=np.int64)
+        )
+        self.hole = self.decks[:, HOLE_POSITIONS]
+        self.board = self.decks[:, BOARD_POSITIONS]
+        self.preflop = np.stack(
+            [cached_preflop_table(personality) for personality in personalities]
+        )
+        self.bias = np.array([personality.bias for personality in personalities])
+
+        shape = (self.count, PLAYER_COUNT)
+        self.stacks = np.full(shape, STARTING_STACK, dtype=np.int64)
+        self.bets = np.zeros(shape, dtype=np.int64)
+        for seat, blind in enumerate(BLINDS):
+            self.stacks[:, seat] -= blind
+            self.bets[:, seat] = blind
+        self.statuses = np.ones(shape, dtype=bool)
+        self.pending = np.zeros(shape, dtype=bool)
+        self.acted = np.zeros(shape, dtype=bool)
+        self.pointer = np.zeros(self.count, dtype=np.int64)
+        self.completion = np.zeros(self.count, dtype=np.int64)
+        self.short_sum = np.zeros(self.count, dtype=np.int64)
+        self.short_count = np.zeros(self.count, dtype=np.int64)
+        self.street = np.zeros(self.count, dtype=np.int64)
+        self.all_in = np.zeros(self.count, dtype=bool)
+        self.done = np.zeros(self.count, dtype=bool)
+
+        self._end_betting(self._begin_betting(self.rows, len(BLINDS)))
+
+    def play(self) -> np.ndarray:
+        """
+        Play every hand to the end and return the winning seat of each
+        table, the first seat with the largest stack as in ``Poker.hand``.
+        """
+        for _ in range(4):
+            for _ in range(PLAYER_COUNT):
+                self._decide()
+            for _ in range(PLAYER_COUNT):
+                rows, seats = self._actors()
+                self._check_or_call(rows, seats)
+        assert self.done.all()
+        return self.stacks.argmax(axis=1)
+
+    def _actors(self) -> tuple[np.ndarray, np.ndarray]:
+        order = (self.pointer[:, None] + np.arange(PLAYER_COUNT)) % PLAYER_COUNT
+        pending = np.take_along_axis(self.pending, order, axis=1)
+        rows = np.flatnonzero(pending.any(axis=1))
+        return rows, order[rows, pending[rows].argmax(axis=1)]
+
+    def _decide(self) -> None:
+        rows, seats = self._actors()
+        if not rows.size:
+            return
+
+        visible = np.arange(5)[None, :] < VISIBLE_BOARD[self.street[rows]][:, None]
+        personalities = self.seats[rows, seats]
+        strength = rule_strengths(
+            self.preflop,
+            personalities,
+            self.hole[rows, seats],
+            np.where(visible, self.board[rows], -1),
+        )
+        actions = action_codes(strength + self.bias[personalities])
+
+        can_raise, min_to, all_in_to = self._raise_options(rows, seats)
+        can_fold = self.bets[rows, seats] < self.bets[rows].max(axis=1)
+        all_in = (actions == ALL_IN) & can_raise & (all_in_to >= min_to)
+        raised = (actions == RAISE) & can_raise
+        folded = ((actions == FOLD) | ((actions == RAISE) & ~can_raise)) & can_fold
+        called = ~(all_in | raised | folded)
+
+        self._raise(rows[all_in], seats[all_in], all_in_to[all_in])
+        self._raise(rows[raised], seats[raised], min_to[raised])
+        self._fold(rows[folded], seats[folded])
+        self._check_or_call(rows[called], seats[called])
+
+    def _raise_options(
+        self, rows: np.ndarray, seats: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Whether each actor may bet or raise at all, the minimum raise-to
+        amount and the raise-to amount that puts in their effective stack.
+        """
+        idx = np.arange(len(rows))
+        bets, stacks, statuses = self.bets[rows], self.stacks[rows], self.statuses[rows]
+        bet, stack = bets[idx, seats], stacks[idx, seats]
+        max_bet = bets.max(axis=1)
+        completion = self.completion[rows]
+
+        covering = statuses & (stacks + bets > max_bet[:, None])
+        covering[idx, seats] = False
+        can_raise = (
+            (np.minimum(stack, max_bet - bet) >= completion)
+            & ~(
+                (self.short_count[rows] > 0)
+                & (self.short_sum[rows] < completion)
+                & self.acted[rows, seats]
+            )
+            & (stack > max_bet - bet)
+            & covering.any(axis=1)
+        )
+        min_to = np.minimum(stack + bet, np.maximum(completion, MIN_BET) + max_bet)
+        totals = np.sort(np.where(statuses, bets + stacks, -1), axis=1)[:, -2]
+        effective = np.minimum(stack, np.maximum(0, totals - bet))
+        return can_raise, min_to, bet + effective
+
+    def _pop(self, rows: np.ndarray, seats: np.ndarray) -> None:
+        self.pending[rows, seats] = False
+        self.acted[rows, seats] = True
+        self.pointer[rows] = (seats + 1) % PLAYER_COUNT
+
+    def _check_or_call(self, rows: np.ndarray, seats: np.ndarray) -> None:
+        amount = np.minimum(
+            self.stacks[rows, seats],
+            self.bets[rows].max(axis=1) - self.bets[rows, seats],
+        )
+        self._pop(rows, seats)
+        self.bets[rows, seats] += amount
+        self.stacks[rows, seats] -= amount
+        self._update_betting(rows)
+
+    def _fold(self, rows: np.ndarray, seats: np.ndarray) -> None:
+        self._pop(rows, seats)
+        self.statuses[rows, seats] = False
+        self._update_betting(rows)
+
+    def _raise(self, rows: np.ndarray, seats: np.ndarray, amounts: np.ndarray) -> None:
+        idx = np.arange(len(rows))
+        raised_by = amounts - self.bets[rows].max(axis=1)
+        self._pop(rows, seats)
+        self.stacks[rows, seats] -= amounts - self.bets[rows, seats]
+        self.bets[rows, seats] = amounts
+
+        pending = self.statuses[rows] & (self.stacks[rows] > 0)
+        pending[idx, seats] = False
+        self.pending[rows] = pending
+        self.pointer[rows] = (seats + 1) % PLAYER_COUNT
+
+        full = raised_by >= self.completion[rows]
+        acted = self.acted[rows]
+        acted[full] = False
+        acted[idx[full], seats[full]] = True
+        self.acted[rows] = acted
+        self.completion[rows] = np.maximum(self.completion[rows], raised_by)
+
+        # Consecutive short all-ins only reopen the action once they add up
+        # to a full raise.
+        short = self.stacks[rows, seats] == 0
+        short_sum = np.where(short, self.short_sum[rows] + raised_by, 0)
+        short_count = np.where(short, self.short_count[rows] + 1, 0)
+        settled = short_sum >= self.completion[rows]
+        self.short_sum[rows] = np.where(settled, 0, short_sum)
+        self.short_count[rows] = np.where(settled, 0, short_count)
+
+        self._update_betting(rows)
+
+    def _update_betting(self, rows: np.ndarray) -> None:
+        ended = ~self.pending[rows].any(axis=1) | (self.statuses[rows].sum(axis=1) <= 1)
+        self._end_betting(rows[ended])
+
+    def _begin_betting(self, rows: np.ndarray, opener: int) -> np.ndarray:
+        """
+        Open a betting round and return the rows where it is already over.
+        """
+        bets, stacks, statuses = self.bets[rows], self.stacks[rows], self.statuses[rows]
+        totals = np.sort(np.where(statuses, bets + stacks, -1), axis=1)[:, -2]
+        effective = np.minimum(stacks, np.maximum(0, totals[:, None] - bets))
+        pending = statuses & (stacks > 0) & (effective > 0)
+
+        self.pending[rows] = pending
+        self.acted[rows] = False
+        self.pointer[rows] = opener
+        self.completion[rows] = 0
+        self.short_sum[rows] = 0
+        self.short_count[rows] = 0
+
+        first = pending.argmax(axis=1)
+        lone = (pending.sum(axis=1) == 1) & (
+            bets[np.arange(len(rows)), first] >= bets.max(axis=1)
+        )
+        return rows[lone | ~pending.any(axis=1) | (statuses.sum(axis=1) <= 1)]
+
+    def _end_betting(self, rows: np.ndarray) -> None:
+        while rows.size:
+            self.pending[rows] = False
+            statuses = self.statuses[rows]
+            active = statuses.sum(axis=1)
+            with_chips = (statuses & (self.stacks[rows] > 0)).sum(axis=1)
+            self.all_in[rows] |= (active > 1) & (with_chips <= 1)
+
+            # Chips above the second largest bet were never called.
+            bets = self.bets[rows]
+            cutoff = np.sort(bets, axis=1)[:, -2]
+            self.stacks[rows] += np.maximum(bets - cutoff[:, None], 0)
+            self.bets[rows] = 0
+
+            over = (active <= 1) | (self.street[rows] == 3) | self.all_in[rows]
+            self._showdown(rows[over])
+            rows = rows[~over]
+            self.street[rows] += 1
+            rows = self._begin_betting(rows, 0)
+
+    def _showdown(self, rows: np.ndarray) -> None:
+        """
+        Split the main and side pots between the best eligible hands, with
+        odd chips going to the first winning seat as pokerkit does.
+        """
+        if not rows.size:
+            return
+        self.done[rows] = True
+
+        statuses = self.statuses[rows]
+        contributions = STARTING_STACK - self.stacks[rows]
+        scores = evaluate(
+            np.concatenate(
+                [
+                    self.hole[rows].reshape(-1, 2),
+                    np.repeat(self.board[rows], PLAYER_COUNT, axis=0),
+                ],
+                axis=1,
+            )
+        ).reshape(-1, PLAYER_COUNT)
+
+        pot = np.zeros(len(rows), dtype=np.int64)
+        eligible = np.zeros_like(statuses)
+        previous = np.zeros(len(rows), dtype=np.int64)
+        for level in np.sort(contributions, axis=1).T:
+            amount = np.minimum(contributions, level[:, None]).sum(axis=1) - np.minimum(
+                contributions, previous[:, None]
+            ).sum(axis=1)
+            level_eligible = statuses & (contributions >= level[:, None])
+            # Adjacent pots with the same players are merged into one.
+            same = (level_eligible == eligible).all(axis=1)
+            self._award(rows, ~same, pot, eligible, scores)
+            pot = np.where(same, pot + amount, amount)
+            eligible = level_eligible
+            previous = level
+        self._award(rows, np.ones(len(rows), dtype=bool), pot, eligible, scores)
+
+    def _award(
+        self,
+        rows: np.ndarray,
+        mask: np.ndarray,
+        pot: np.ndarray,
+        eligible: np.ndarray,
+        scores: np.ndarray,
+    ) -> None:
+        best = np.where(eligible, scores, -1).max(axis=1)
+        winners = eligible & (scores == best[:, None])
+        share, remainder = np.divmod(pot, np.maximum(winners.sum(axis=1), 1))
+        gains = winners * share[:, None]
+        gains[np.arange(len(rows)), winners.argmax(axis=1)] += np.where(
+            winners.any(axis=1), remainder, 0
+        )
+        self.stacks[rows[mask]] += gains[mask]
+
+
+def rotated_seats(decks: int) -> np.ndarray:
+    """
+    Seat assignments for duplicate play: each deck's row is repeated once
+    per rotation, with personality ``(seat + rotation) % 6`` in each seat.
+    """
+    rotations = (np.arange(PLAYER_COUNT)[:, None] + np.arange(PLAYER_COUNT)) % (
+        PLAYER_COUNT
+    )
+    return np.tile(rotations, (decks, 1))
+
+
+def whole_decks(hands: int, batch_size: int) -> tuple[int, int]:
+    """
+    Round a duplicate run's ``hands`` and ``batch_size`` down to whole
+    decks, one hand per seat rotation each, with at least one deck a batch.
+    """
+    if hands % PLAYER_COUNT:
+        logger.warning(
+            f"Playing {hands - hands % PLAYER_COUNT} of {hands} hands, "
+            f"as whole decks of {PLAYER_COUNT}"
+        )
+    return (
+        hands - hands % PLAYER_COUNT,
+        max(PLAYER_COUNT, batch_size - batch_size % PLAYER_COUNT),
+    )
+
+
+def simulate(
+    hands: int,
+    batch_size: int = 100_000,
+    seed: int | None = None,
+    personalities: list[Personality] | None = None,
+    duplicate: bool = False,
+) -> SimulationReport:
+    """
+    Play ``hands`` rule-policy hands in batches and count wins per
+    personality, seated in ``Personalities`` order as in ``Poker.new_game``.
+
+    With ``duplicate``, ``hands // 6`` decks are each replayed from every
+    seat rotation and the intervals come from the per-deck win shares.
+    """
+    personalities = personalities or Personalities().personalities
+    rng = np.random.default_rng(seed)
+    wins = np.zeros(len(personalities), dtype=np.int64)
+    shares = []
+
+    if duplicate:
+        hands, batch_size = whole_decks(hands, batch_size)
+    start = time.perf_counter()
+    for offset in range(0, hands, batch_size):
+        count = min(batch_size, hands - offset)
+        if duplicate:
+            decks = count // PLAYER_COUNT
+            batch = TableBatch(
+                np.repeat(deal_decks(decks, rng), PLAYER_COUNT, axis=0),
+                personalities,
+                rotated_seats(decks),
+            )
+        else:
+            batch = TableBatch(deal_decks(count, rng), personalities)
+        winners = batch.seats[batch.rows, batch.play()]
+        wins += np.bincount(winners, minlength=len(personalities))
+        if duplicate:
+            won = winners.reshape(-1, PLAYER_COUNT)[:, :, None] == np.arange(
+                len(personalities)
+            )
+            shares.append(won.mean(axis=1))
+    seconds = time.perf_counter() - start
+
+    names = [personality.name for personality in personalities]
+    if duplicate:
+        stacked = np.concatenate(shares)
+        intervals = duplicate_intervals(
+            {name: stacked[:, idx].tolist() for idx, name in enumerate(names)}
+        )
+    else:
+        intervals = {
+            name: wilson_interval(int(count), hands) for name, count in zip(names, wins)
+        }
+
+    return SimulationReport(
+        hands=hands,
+        seconds=seconds,
+        wins={name: int(count) for name, count in zip(names, wins)},
+        win_rates={name: float(count / hands) for name, count in zip(names, wins)},
+        intervals=intervals,
+    )
+
+
+def check_against_pokerkit(hands: int = 100, seed: int | None = None) -> list[int]:
+    """
+    Replay sampled decks through ``Poker.hand`` with rule-driven seats and
+    return the indices of decks whose final stacks differ from the batch.
+    """
+    from .poker import Poker
+
+    decks = deal_decks(hands, np.random.default_rng(seed))
+    batch = TableBatch(decks, Personalities().personalities)
+    batch.play()
+
+    poker = Poker.new_rule_game()
+    mismatches = []
+    logger.disable("turing_holdem")
+    try:
+        for idx, deck in enumerate(decks):
+            state = poker.hand(deck=deck.tolist())
+            if list(state.stacks) != batch.stacks[idx].tolist():
+                mismatches.append(idx)
+    finally:
+        logger.enable("turing_holdem")
+    return mismatches
@@ -0,0 +1,137 @@
+from enum import Enum
+from math import sqrt
+from statistics import NormalDist
+from typing import Iterable
+
+import numpy as np
+from pydantic import BaseModel
+
+
+class Interval(BaseModel):
+    estimate: float
+    stderr: float
+    low: float
+    high: float
+    samples: int
+
+
+def wilson_interval(wins: int, hands: int, z: float = 1.96) -> Interval:
+    """
+    Wilson score interval for a win rate from independent hands.
+    """
+    if hands == 0:
+        return Interval(estimate=0.0, stderr=0.5, low=0.0, high=1.0, samples=0)
+    rate = wins / hands
+    denominator = 1 + z**2 / hands
+    centre = (rate + z**2 / (2 * hands)) / denominator
+    spread = z * sqrt(rate * (1 - rate) / hands + z**2 / (4 * hands**2)) / denominator
+    return Interval(
+        estimate=rate,
+        stderr=sqrt(rate * (1 - rate) / hands),
+        low=max(0.0, centre - spread),
+        high=min(1.0, centre + spread),
+        samples=hands,
+    )
+
+
+def mean_interval(values: Iterable[float], z: float = 1.96) -> Interval:
+    """
+    Normal interval for the mean of independent per-deck values.
+    """
+    values = np.asarray(list(values), dtype=float)
+    if len(values) < 2:
+        estimate = float(values.mean()) if len(values) else 0.0
+        return Interval(
+            estimate=estimate, stderr=0.5, low=0.0, high=1.0, samples=len(values)
+        )
+    estimate = float(values.mean())
+    stderr = float(values.std(ddof=1) / sqrt(len(values)))
+    return Interval(
+        estimate=estimate,
+        stderr=stderr,
+        low=max(0.0, estimate - z * stderr),
+        high=min(1.0, estimate + z * stderr),
+        samples=len(values),
+    )
+
+
+def win_rate_intervals(
+    winners: list[str], names: Iterable[str], z: float = 1.96
+) -> dict[str, Interval]:
+    return {
+        name: wilson_interval(winners.count(name), len(winners), z) for name in names
+    }
+
+
+def duplicate_intervals(
+    shares: dict[str, list[float]], z: float = 1.96
+) -> dict[str, Interval]:
+    """
+    Win-rate intervals from duplicate play, where each value is the share of
+    one deck's rotations a personality won. Every personality saw the same
+    cards from every seat, so card luck cancels within a deck and the
+    per-deck shares vary far less than single hands do.
+    """
+    return {name: mean_interval(values, z) for name, values in shares.items()}
+
+
+class StopReason(str, Enum):
+    SEPARATED = "separated"
+    PRECISION = "precision"
+    BUDGET = "budget"
+
+
+def leader(intervals: dict[str, Interval]) -> str:
+    return max(intervals, key=lambda name: intervals[name].estimate)
+
+
+def is_separated(intervals: dict[str, Interval]) -> bool:
+    """
+    True when the leader's interval lies entirely above everyone else's.
+    """
+    best = leader(intervals)
+    return all(
+        intervals[best].low > interval.high
+        for name, interval in intervals.items()
+        if name != best
+    )
+
+
+class StoppingRule(BaseModel):
+    """
+    When to end an evaluation run before its hand budget: once the leading
+    personality's interval clears every other interval, or, with
+    ``half_width`` set, once every interval is at least that narrow.
+
+    Intervals are rechecked after every hand (or duplicate deck), and
+    repeated looks make a fixed-level interval optimistic, so the default
+    confidence is higher than a one-off comparison would use.
+    """
+
+    confidence: float = 0.99
+    half_width: float | None = None
+    # Hands, or decks in duplicate mode, before the first check.
+    min_samples: int = 30
+
+    @property
+    def z(self) -> float:
+        return NormalDist().inv_cdf(0.5 + self.confidence / 2)
+
+    def check(self, intervals: dict[str, Interval]) -> StopReason | None:
+        if min(interval.samples for interval in intervals.values()) < self.min_samples:
+            return None
+        if is_separated(intervals):
+            return StopReason.SEPARATED
+        if self.half_width is not None and all(
+            (interval.high - interval.low) / 2 <= self.half_width
+            for interval in intervals.values()
+        ):
+            return StopReason.PRECISION
+        return None
+
+
+class Stopping(BaseModel):
+    reason: StopReason
+    hands: int
+    leader: str
+    confidence: float
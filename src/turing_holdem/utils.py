@@ -1,11 +1,16 @@
+import contextvars
 import random
+from concurrent.futures import Executor, Future
 from enum import Enum
+from typing import Any, Callable
 
 from loguru import logger
 import pokerkit
 from pydantic import BaseModel, ConfigDict, computed_field
 from pokerkit import parse_range
 
+STREETS = ("preflop", "flop", "turn", "river")
+
 
 class Action(str, Enum):
     CHECK = "check"
@@ -31,6 +36,16 @@ class Action(str, Enum):
             return Action.FOLD
 
 
+# Hand strengths above each threshold map to the paired action; anything at or
+# below the lowest threshold folds.
+ACTION_THRESHOLDS: list[tuple[float, Action]] = [
+    (0.7, Action.ALL_IN),
+    (0.5, Action.RAISE),
+    (0.3, Action.CALL),
+    (0.2, Action.CHECK),
+]
+
+
 class Personality(BaseModel):
     model_config = ConfigDict(frozen=True)
 
@@ -46,16 +61,10 @@ class Personality(BaseModel):
         return self.strong | self.middle | self.speculative
 
     def act(self, hand_strength: float) -> Action:
-        if hand_strength > 0.7:
-            return Action.ALL_IN
-        elif hand_strength > 0.5:
-            return Action.RAISE
-        elif hand_strength > 0.3:
-            return Action.CALL
-        elif hand_strength > 0.2:
-            return Action.CHECK
-        else:
-            return Action.FOLD
+        for threshold, action in ACTION_THRESHOLDS:
+            if hand_strength > threshold:
+                return action
+        return Action.FOLD
 
 
 NinePercent: Personality = Personality(
@@ -154,3 +163,11 @@ def random_name():
     last_name = random.choice(last_names)
 
     return f"{first_name} {last_name}"
+
+
+def submit_in_context(executor: Executor, fn: Callable, *args: Any) -> Future:
+    """
+    Submit ``fn`` to run in a copy of the caller's context, so any
+    ``dspy.context`` around the call still applies on the worker thread.
+    """
+    return executor.submit(contextvars.copy_context().run, fn, *args)
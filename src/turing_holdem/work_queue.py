@@ -0,0 +1,240 @@
+import json
+import os
+import socket
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from loguru import logger
+from pydantic import BaseModel
+
+DEFAULT_QUEUE_PATH = Path("runs/queue.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    job TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_job_status ON tasks (job, status);
+"""
+
+# A handler runs one task's payload and may call ``heartbeat`` to extend its
+# lease while it works.
+Handler = Callable[[dict[str, Any], Callable[[], None]], Any]
+
+
+class Task(BaseModel):
+    id: int
+    job: str
+    kind: str
+    payload: dict[str, Any]
+    attempts: int
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkQueue:
+    """
+    A durable task queue in one SQLite file, so coordinators and workers
+    need nothing but a path they can all open.
+
+    Workers claim a task with a lease, extend it with heartbeats while they
+    work, and acknowledge it with a JSON result. A task whose lease runs out
+    (its worker died or lost the node) goes back to being claimable, until
+    it has been attempted ``max_attempts`` times and is marked failed.
+    Workers on other nodes need the file on a filesystem with working
+    locks.
+    """
+
+    def __init__(self, path: Path = DEFAULT_QUEUE_PATH, max_attempts: int = 3):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        self.connection = sqlite3.connect(self.path, timeout=60.0, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self) -> "WorkQueue":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def submit(self, job: str, kind: str, payloads: list[dict[str, Any]]) -> None:
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.connection.executemany(
+                "INSERT INTO tasks (job, kind, payload) VALUES (?, ?, ?)",
+                [(job, kind, json.dumps(payload)) for payload in payloads],
+            )
+
+    def claim(
+        self,
+        worker: str,
+        lease_seconds: float = 600.0,
+        kinds: list[str] | None = None,
+    ) -> Task | None:
+        """
+        Lease the oldest pending task, or one whose lease has expired.
+        """
+        now = time.time()
+        kinds = kinds or []
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.connection.execute(
+                "UPDATE tasks SET status = 'failed', error = 'lease expired' "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, self.max_attempts),
+            )
+            row = self.connection.execute(
+                "SELECT id, job, kind, payload, attempts FROM tasks "
+                "WHERE (status = 'pending' OR (status = 'leased' AND lease_expires < ?)) "
+                + (f"AND kind IN ({', '.join('?' * len(kinds))}) " if kinds else "")
+                + "ORDER BY id LIMIT 1",
+                (now, *kinds),
+            ).fetchone()
+            if row is None:
+                return None
+            idx, job, kind, payload, attempts = row
+            self.connection.execute(
+                "UPDATE tasks SET status = 'leased', worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                (worker, now + lease_seconds, idx),
+            )
+        return Task(
+            id=idx,
+            job=job,
+            kind=kind,
+            payload=json.loads(payload),
+            attempts=attempts + 1,
+        )
+
+    def heartbeat(self, task: Task, worker: str, lease_seconds: float = 600.0) -> bool:
+        """
+        Extend a lease. False means the task was reclaimed by someone else.
+        """
+        with self.connection:
+            cursor = self.connection.execute(
+                "UPDATE tasks SET lease_expires = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (time.time() + lease_seconds, task.id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def ack(self, task: Task, worker: str, result: Any) -> bool:
+        """
+        Store a task's result. Only the current lease holder can ack, so a
+        worker that lost its lease cannot overwrite the retry's result.
+        """
+        with self.connection:
+            cursor = self.connection.execute(
+                "UPDATE tasks SET status = 'done', result = ?, lease_expires = NULL "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (json.dumps(result), task.id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, task: Task, worker: str, error: str) -> None:
+        status = "failed" if task.attempts >= self.max_attempts else "pending"
+        with self.connection:
+            self.connection.execute(
+                "UPDATE tasks SET status = ?, error = ?, lease_expires = NULL "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (status, error, task.id, worker),
+            )
+
+    def progress(self, job: str) -> dict[str, int]:
+        rows = self.connection.execute(
+            "SELECT status, COUNT(*) FROM tasks WHERE job = ? GROUP BY status", (job,)
+        ).fetchall()
+        return dict(rows)
+
+    def outstanding(self, kinds: list[str] | None = None) -> int:
+        """
+        Tasks of any job still pending or leased.
+        """
+        kinds = kinds or []
+        (count,) = self.connection.execute(
+            "SELECT COUNT(*) FROM tasks WHERE status IN ('pending', 'leased') "
+            + (f"AND kind IN ({', '.join('?' * len(kinds))})" if kinds else ""),
+            kinds,
+        ).fetchone()
+        return count
+
+    def payloads(self, job: str) -> list[dict[str, Any]]:
+        rows = self.connection.execute(
+            "SELECT payload FROM tasks WHERE job = ? ORDER BY id", (job,)
+        ).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def results(self, job: str) -> list[Any]:
+        rows = self.connection.execute(
+            "SELECT result FROM tasks WHERE job = ? AND status = 'done' ORDER BY id",
+            (job,),
+        ).fetchall()
+        return [json.loads(result) for (result,) in rows]
+
+    def wait(self, job: str, poll_seconds: float = 5.0) -> dict[str, int]:
+        """
+        Block until no task of ``job`` is pending or leased.
+        """
+        while True:
+            progress = self.progress(job)
+            if not progress.get("pending") and not progress.get("leased"):
+                return progress
+            logger.info(f"Job {job}: {progress}")
+            time.sleep(poll_seconds)
+
+
+def run_worker(
+    queue: WorkQueue,
+    handlers: dict[str, Handler],
+    worker: str | None = None,
+    lease_seconds: float = 600.0,
+    poll_seconds: float = 5.0,
+    exit_when_idle: bool = True,
+) -> int:
+    """
+    Claim, run and acknowledge tasks until the queue is drained (or
+    forever, without ``exit_when_idle``). A worker with nothing to claim
+    keeps polling while other workers hold leases, in case one of them
+    dies and its task has to be retried. Returns the number of tasks
+    completed.
+    """
+    worker = worker or worker_name()
+    completed = 0
+    while True:
+        task = queue.claim(worker, lease_seconds, list(handlers))
+        if task is None:
+            if exit_when_idle and not queue.outstanding(list(handlers)):
+                return completed
+            time.sleep(poll_seconds)
+            continue
+
+        logger.info(f"Worker {worker} running task {task.id} ({task.kind})")
+        try:
+            result = handlers[task.kind](
+                task.payload, lambda: queue.heartbeat(task, worker, lease_seconds)
+            )
+        except Exception as e:
+            logger.exception(f"Task {task.id} failed: {e}")
+            queue.fail(task, worker, repr(e))
+            continue
+        if queue.ack(task, worker, result):
+            completed += 1
+        else:
+            logger.warning(f"Task {task.id} was reclaimed before it finished")
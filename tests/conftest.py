@@ -0,0 +1,102 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import dspy
+import pytest
+
+# The stand-in servers answer every prompt alike, and a response cached by
+# an earlier test or run would skip their delay.
+dspy.configure_cache(enable_disk_cache=False, enable_memory_cache=False)
+
+REPLY = "[[ ## action ## ]]\nfold\n\n[[ ## completed ## ]]"
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    A local OpenAI-compatible chat completions server that answers every
+    request with ``reply`` after ``delay`` seconds, or fails with a 500
+    while ``failing`` is set.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, delay: float = 0.0, reply: str = REPLY):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.delay = delay
+        self.reply = reply
+        self.failing = False
+        self.requests: list[dict] = []
+        self.connections: set[tuple[str, int]] = set()
+        self.lock = threading.Lock()
+
+    @property
+    def api_base(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: StandInServer
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.server.lock:
+            self.server.requests.append(body)
+            self.server.connections.add(self.client_address)
+        time.sleep(self.server.delay)
+
+        if self.server.failing:
+            self._send(500, {"error": {"message": "stand-in failure"}})
+            return
+        self._send(
+            200,
+            {
+                "id": "stand-in",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": self.server.reply},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": 1,
+                    "completion_tokens": 1,
+                    "total_tokens": 2,
+                    "prompt_tokens_details": {"cached_tokens": 1},
+                },
+            },
+        )
+
+    def _send(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def stand_in_servers():
+    servers: list[StandInServer] = []
+
+    def start(count: int, delay: float = 0.0) -> list[StandInServer]:
+        for _ in range(count):
+            server = StandInServer(delay)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            servers.append(server)
+        return servers[-count:]
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
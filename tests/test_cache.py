@@ -0,0 +1,46 @@
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pytest
+from pokerkit import Card
+
+from turing_holdem.cache import EquityCache, canonical_key
+
+
+def _fill(cache: EquityCache, start: int) -> None:
+    for idx in range(start, start + 50):
+        cache.add(idx.to_bytes(16, "little"), 0.5, 10)
+
+
+def test_suit_isomorphic_keys() -> None:
+    assert canonical_key(
+        Card.parse("AsKs"), Card.parse("2h3d4c"), 6, 2, 5
+    ) == canonical_key(Card.parse("KhAh"), Card.parse("4d2s3c"), 6, 2, 5)
+    assert canonical_key(Card.parse("AsKs"), Card.parse(""), 6, 2, 5) != canonical_key(
+        Card.parse("AsKh"), Card.parse(""), 6, 2, 5
+    )
+
+
+def test_merge_and_persist(tmp_path: Path) -> None:
+    key = canonical_key(Card.parse("AsKs"), Card.parse(""), 6, 2, 5)
+    with EquityCache(tmp_path / "equity.bin", slots=64) as cache:
+        assert cache.get(key) is None
+        cache.add(key, 0.2, 100)
+        assert cache.add(key, 0.4, 100) == (pytest.approx(0.3), 200)
+
+    with EquityCache(tmp_path / "equity.bin") as cache:
+        assert cache.get(key) == (pytest.approx(0.3), 200)
+
+
+def test_bounded_size(tmp_path: Path) -> None:
+    with EquityCache(tmp_path / "equity.bin", slots=64) as cache:
+        _fill(cache, 0)
+        _fill(cache, 50)
+        assert len(cache) <= 64
+
+
+def test_shared_between_processes(tmp_path: Path) -> None:
+    with EquityCache(tmp_path / "equity.bin", slots=1024) as cache:
+        with ProcessPoolExecutor(2) as executor:
+            list(executor.map(_fill, [cache, cache], [0, 50]))
+        assert len(cache) == 100
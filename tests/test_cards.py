@@ -0,0 +1,32 @@
+from pokerkit import Card
+
+from turing_holdem.cards import (
+    CARDS,
+    canonicalize,
+    decode,
+    encode,
+    format_cards,
+    from_mask,
+    parse_cards,
+    to_mask,
+)
+
+
+def test_round_trip() -> None:
+    assert len(set(CARDS)) == 52
+    cards = encode(Card.parse("Kh9h"))
+    assert decode(cards) == tuple(Card.parse("Kh9h"))
+    assert from_mask(to_mask(cards)) == tuple(sorted(cards))
+
+
+def test_dataset_format() -> None:
+    assert format_cards(parse_cards("(Kh, 9h)")) == "(Kh, 9h)"
+    assert format_cards(parse_cards("()")) == "()"
+    assert parse_cards("2c") == (0,)
+    assert parse_cards("As") == (51,)
+
+
+def test_canonicalize() -> None:
+    assert canonicalize(parse_cards("AsKs"), parse_cards("2h")) == canonicalize(
+        parse_cards("KdAd"), parse_cards("2c")
+    )
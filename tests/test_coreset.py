@@ -0,0 +1,67 @@
+import json
+from pathlib import Path
+
+from turing_holdem.coreset import (
+    canonical_spot,
+    coreset,
+    deduplicate,
+    simulation_spot,
+    stratum,
+)
+
+DATA = Path("data/nine_percent.json")
+
+
+def simulation(hole: str, board: str, actions: str, strength: float = 0.5) -> dict:
+    boards = {"preflop": "()", "flop": board[:6], "turn": board[:8], "river": board}
+    return {
+        "personality": "nine_percent",
+        "hole_cards": hole,
+        **{
+            street: {
+                "street": street.title(),
+                "board": boards[street],
+                "hand_strength": strength,
+                "action": action,
+            }
+            for street, action in zip(boards, actions.split("/"))
+        },
+    }
+
+
+def test_canonical_spot() -> None:
+    spot = canonical_spot("(Kh, 9h)", ["2c2d3s", "2c2d3s4h", "2c2d3s4h5h"])
+    assert spot == canonical_spot("9sKs", ["3h2c2d", "4s3h2c2d", "5s4s3h2d2c"])
+    # Suits are relabelled together across streets.
+    assert spot != canonical_spot("KhQh", ["2c2d3s", "2c2d3s4d", "2c2d3s4h5h"])
+
+
+def test_deduplicate() -> None:
+    simulations = [
+        simulation("AhKh", "2c3c4d5d6s", "raise/raise/call/call", 0.6),
+        simulation("AsKs", "2d3d4c5c6h", "raise/raise/call/call", 0.8),
+        simulation("AsKs", "2d3d4c5c6h", "raise/raise/call/fold"),
+        simulation("AsKd", "2d3d4c5c6h", "raise/raise/call/call"),
+    ]
+    unique = deduplicate(simulations)
+    assert [item.weight for item in unique] == [2, 1, 1]
+    assert unique[0].simulation["hole_cards"] == "AhKh"
+    assert unique[0].simulation["flop"]["hand_strength"] == 0.7
+    assert simulation_spot(simulations[0]) == simulation_spot(simulations[1])
+
+
+def test_coreset() -> None:
+    simulations = json.loads(DATA.read_text())["simulations"]
+    strata = {stratum(s) for s in simulations}
+
+    picked, summary = coreset(simulations, 64, seed=1)
+    assert summary.size == len(picked) == 64
+    assert summary.covered == 64 < summary.strata == len(strata)
+
+    picked, summary = coreset(simulations, 300, seed=1)
+    assert summary.size == 300 and summary.covered == len(strata)
+    assert abs(sum(item.weight for item in picked) - len(simulations)) < 1e-6
+    assert picked == coreset(simulations, 300, seed=1)[0]
+
+    picked, summary = coreset(simulations, 5000)
+    assert summary.size == summary.unique
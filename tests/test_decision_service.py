@@ -0,0 +1,109 @@
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import dspy
+import pytest
+
+from turing_holdem.decision_service import (
+    Decision,
+    DecisionClient,
+    DecisionServer,
+    DecisionService,
+)
+from turing_holdem.dspy_modules import parse_modes
+from turing_holdem.poker import Poker
+from turing_holdem.registry import ProgramRegistry
+from turing_holdem.utils import Action
+
+PROGRAMS = Path("programs")
+
+
+@pytest.fixture
+def serve(tmp_path):
+    servers: list[DecisionServer] = []
+
+    def start(api_base: str, **kwargs) -> DecisionServer:
+        for path in PROGRAMS.glob("gepa_*.json"):
+            shutil.copy(path, tmp_path / path.name)
+        lm = dspy.LM(
+            "openai/stand-in",
+            api_base=api_base,
+            api_key="NONE",
+            cache=False,
+            num_retries=0,
+        )
+        service = DecisionService(
+            lm, ProgramRegistry(tmp_path), parse_modes("direct"), **kwargs
+        )
+        server = DecisionServer(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def decision(board: str = "(2h, 7c, Jd)") -> Decision:
+    return Decision(
+        personality="nine_percent", hole_cards="(Kh, 9h)", street="Flop", board=board
+    )
+
+
+def test_coalesces_and_caches(stand_in_servers, serve) -> None:
+    lm_server = stand_in_servers(1, delay=0.3)[0]
+    client = DecisionClient(serve(lm_server.api_base).url)
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda _: client.decide(decision()), range(8)))
+    assert {result.action for result in results} == {Action.FOLD}
+    assert sorted(result.source for result in results) == ["coalesced"] * 7 + ["lm"]
+    assert len(lm_server.requests) == 1
+
+    # Card strings are normalised before they are matched.
+    assert client.decide(decision("2h7cJd")).source == "cache"
+    assert client.decide(decision("(2h, 7c, Jd, 4s)")).source == "lm"
+    stats = client.stats()
+    assert (stats.requests, stats.lm_calls, stats.cache_hits) == (10, 2, 1)
+    assert stats.coalesced == 7 and stats.in_flight == 0
+
+
+def test_bounded_concurrency(stand_in_servers, serve) -> None:
+    lm_server = stand_in_servers(1, delay=0.2)[0]
+    client = DecisionClient(serve(lm_server.api_base, max_concurrency=2).url)
+    boards = [f"(2h, 7c, {rank}d)" for rank in "3456"]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(4) as executor:
+        list(executor.map(lambda board: client.decide(decision(board)), boards))
+    # Two at a time, so two rounds of the stand-in's delay.
+    assert time.perf_counter() - start >= 0.4
+    assert len(lm_server.requests) == 4
+
+
+def test_errors(stand_in_servers, serve) -> None:
+    lm_server = stand_in_servers(1)[0]
+    client = DecisionClient(serve(lm_server.api_base).url)
+    with pytest.raises(RuntimeError, match="Unknown street"):
+        client.decide(decision().model_copy(update={"street": "Showdown"}))
+
+    lm_server.failing = True
+    with pytest.raises(RuntimeError):
+        client.decide(decision("(8h, 7c, Jd)"))
+    lm_server.failing = False
+    # A failed decision is not cached.
+    assert client.decide(decision("(8h, 7c, Jd)")).source == "lm"
+    assert client.stats().errors == 1
+
+
+def test_poker_uses_server(stand_in_servers, serve) -> None:
+    lm_server = stand_in_servers(1)[0]
+    server = serve(lm_server.api_base)
+    poker = Poker.new_game(decision_server=server.url)
+    poker.hand()
+    assert poker.winners
+    assert server.service.stats().requests > 0
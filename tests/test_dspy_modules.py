@@ -0,0 +1,53 @@
+import dspy
+import pytest
+from dspy.utils.dummies import DummyLM
+
+from turing_holdem.dspy_modules import (
+    ACTION_PATTERN,
+    ANSWER_TOKENS,
+    InferenceMode,
+    PokerModule,
+    StreetModule,
+    parse_modes,
+)
+
+INPUTS = {
+    "personality": "nine_percent",
+    "hole_cards": "(As, Ah)",
+    "board": "()",
+    "street": "Preflop",
+}
+
+
+def test_parse_modes() -> None:
+    assert parse_modes("direct")["river"] is InferenceMode.DIRECT
+    assert parse_modes("preflop=direct,flop=capped") == {
+        "preflop": InferenceMode.DIRECT,
+        "flop": InferenceMode.CAPPED,
+    }
+    with pytest.raises(ValueError):
+        parse_modes("showdown=direct")
+
+
+def test_modes_share_saved_state() -> None:
+    names = [name for name, _ in PokerModule().named_predictors()]
+    direct = PokerModule(parse_modes("direct"))
+    assert [name for name, _ in direct.named_predictors()] == names
+
+
+def test_direct_mode() -> None:
+    lm = DummyLM([{"action": "raise"}])
+    with dspy.context(lm=lm):
+        prediction = StreetModule(InferenceMode.DIRECT)(**INPUTS)
+    assert prediction.action == "raise"
+    assert "reasoning" not in prediction
+    assert lm.history[-1]["kwargs"]["extra_body"] == {"guided_regex": ACTION_PATTERN}
+
+
+def test_capped_mode_falls_back_to_direct() -> None:
+    lm = DummyLM([{"reasoning": "Aces are"}, {"action": "all_in"}])
+    with dspy.context(lm=lm):
+        prediction = StreetModule(InferenceMode.CAPPED, reasoning_tokens=8)(**INPUTS)
+    assert prediction.action == "all_in"
+    assert lm.history[0]["kwargs"]["max_tokens"] == 8 + ANSWER_TOKENS
+    assert len(lm.history) == 2
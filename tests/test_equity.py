@@ -0,0 +1,32 @@
+from pokerkit import Card
+
+from turing_holdem.equity import (
+    StopReason,
+    adaptive_hand_strength,
+    is_decided,
+    standard_error,
+)
+
+
+def test_standard_error_shrinks() -> None:
+    assert standard_error(0.5, 400) < standard_error(0.5, 100)
+    assert standard_error(0.0, 50) > 0.0
+
+
+def test_is_decided() -> None:
+    assert is_decided(0.9, 0.05, [0.2, 0.3, 0.5, 0.7])
+    assert not is_decided(0.52, 0.05, [0.2, 0.3, 0.5, 0.7])
+
+
+def test_nuts_stop_early() -> None:
+    estimate = adaptive_hand_strength(
+        6,
+        Card.parse("AsKs"),
+        Card.parse("QsJsTs"),
+        2,
+        5,
+        max_samples=1000,
+    )
+    assert estimate.strength == 1.0
+    assert estimate.reason is StopReason.DECIDED
+    assert estimate.samples < 1000
@@ -0,0 +1,67 @@
+import threading
+
+import dspy
+
+from turing_holdem.evaluation import ResultStore, evaluate, example_key, program_key
+
+
+class Echo(dspy.Module):
+    """
+    Answers each hand's gold action, failing on the hands in ``failing``.
+    """
+
+    def __init__(self, failing: set[str] | None = None):
+        self.failing = failing or set()
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def forward(self, hand: str):
+        with self.lock:
+            self.calls += 1
+        if hand in self.failing:
+            raise RuntimeError("stand-in failure")
+        return dspy.Prediction(action="fold" if int(hand) % 2 else "call")
+
+
+def metric(example, pred, trace=None):
+    return float(example.action == pred.action)
+
+
+EXAMPLES = [
+    dspy.Example(hand=str(idx), action="fold").with_inputs("hand") for idx in range(10)
+]
+
+
+def test_resumes_from_the_store(tmp_path) -> None:
+    path = tmp_path / "results.db"
+    flaky, steady = Echo({"3"}), Echo()
+    with ResultStore(path) as store:
+        first = evaluate(store, {"flaky": flaky, "steady": steady}, EXAMPLES, metric, 4)
+    assert [score.examples for score in first] == [10, 10]
+    assert first[0].errors == 1 and first[0].score == 0.4
+    assert first[1].score == 0.5
+
+    with ResultStore(path) as store:
+        # Only the failed pair, and the new program, are run again.
+        flaky.failing = set()
+        again = evaluate(
+            store,
+            {"flaky": flaky, "steady": steady, "fresh": Echo()},
+            EXAMPLES,
+            metric,
+        )
+        stored = store.results("flaky")
+    assert (flaky.calls, steady.calls) == (11, 10)
+    assert again[0].errors == 0 and again[0].score == 0.5
+    assert again[2].examples == 10
+    assert stored[-1].example == example_key(EXAMPLES[3])
+    assert stored[-1].prediction == {"action": "fold"}
+
+
+def test_program_key_tracks_contents(tmp_path) -> None:
+    path = tmp_path / "gepa_nine_percent.json"
+    path.write_text("{}")
+    before = program_key(path, "cot")
+    assert before.startswith("gepa_nine_percent@") and before.endswith("/cot")
+    path.write_text('{"changed": true}')
+    assert program_key(path, "cot") != before
@@ -0,0 +1,116 @@
+import itertools
+import time
+
+from turing_holdem.dspy_modules import parse_modes
+from turing_holdem.hedging import HedgePolicy, Hedger
+from turing_holdem import poker as poker_module, ranges
+from turing_holdem.poker import Poker
+from turing_holdem.registry import ProgramRegistry
+
+
+def slow_then_fast(first_seconds: float):
+    calls = itertools.count()
+
+    def decide() -> str:
+        if next(calls) == 0:
+            time.sleep(first_seconds)
+            return "first"
+        return "hedge"
+
+    return decide
+
+
+def test_hedge_answers_slow_request() -> None:
+    hedger = Hedger(HedgePolicy(hedge_percentile=0.95, initial_hedge=0.05))
+    start = time.perf_counter()
+    assert hedger.call(slow_then_fast(1.0), lambda: "fallback") == "hedge"
+    assert time.perf_counter() - start < 0.5
+    assert (hedger.stats.hedges, hedger.stats.hedge_wins) == (1, 1)
+
+
+def test_no_hedge_before_delay() -> None:
+    hedger = Hedger(HedgePolicy(hedge_percentile=0.95, initial_hedge=0.5))
+    assert hedger.call(slow_then_fast(0.01), lambda: "fallback") == "first"
+    assert hedger.stats.hedges == 0 and hedger.stats.decisions == 1
+
+
+def test_deadline_falls_back() -> None:
+    hedger = Hedger(HedgePolicy(deadline=0.1))
+    start = time.perf_counter()
+    assert hedger.call(lambda: time.sleep(1.0), lambda: "fallback") == "fallback"
+    assert time.perf_counter() - start < 0.5
+    assert (hedger.stats.timeouts, hedger.stats.fallbacks) == (1, 1)
+
+
+def test_failures_retry_then_fall_back() -> None:
+    calls = itertools.count()
+
+    def flaky() -> str:
+        if next(calls) == 0:
+            raise RuntimeError("stand-in failure")
+        return "retried"
+
+    hedger = Hedger(HedgePolicy(deadline=1.0))
+    assert hedger.call(flaky, lambda: "fallback") == "retried"
+    assert hedger.stats.hedges == 1
+
+    def broken() -> str:
+        raise RuntimeError("stand-in failure")
+
+    assert hedger.call(broken, lambda: "fallback") == "fallback"
+    assert (hedger.stats.errors, hedger.stats.fallbacks) == (1, 1)
+
+
+def test_timeouts_count_as_latencies() -> None:
+    hedger = Hedger(HedgePolicy(deadline=0.1, hedge_percentile=0.9))
+    assert hedger.call(lambda: time.sleep(1.0), lambda: "fallback") == "fallback"
+    assert len(hedger._latencies) == 1 and hedger._latencies[0] >= 0.1
+
+
+def test_hedge_delay_tracks_latency() -> None:
+    hedger = Hedger(HedgePolicy(hedge_percentile=0.9, min_samples=10))
+    assert hedger.hedge_delay() is None
+    for idx in range(10):
+        hedger._record(idx / 10, False)
+    assert hedger.hedge_delay() == 0.9
+
+
+def test_poker_falls_back_to_rules(stand_in_servers) -> None:
+    server = stand_in_servers(1, delay=1.0)[0]
+    poker = Poker.new_game(
+        modes=parse_modes("direct"),
+        endpoints=[server.api_base],
+        registry=ProgramRegistry(),
+        hedging=HedgePolicy(deadline=0.1),
+    )
+    start = time.perf_counter()
+    poker.hand()
+    stats = poker.hedger.snapshot()  # pyright: ignore
+    assert stats.fallbacks == stats.timeouts == stats.decisions > 0
+    assert time.perf_counter() - start < 0.5 * stats.decisions
+
+
+def test_poker_falls_back_to_ranges(stand_in_servers, monkeypatch) -> None:
+    # Coarse preflop tables, instead of building the full ones.
+    tables = ranges.build_preflop_tables(count=16)
+    loads = []
+
+    def preflop_tables():
+        loads.append(time.perf_counter())
+        return tables
+
+    monkeypatch.setattr(ranges, "preflop_tables", preflop_tables)
+    monkeypatch.setattr(poker_module, "preflop_tables", preflop_tables)
+    server = stand_in_servers(1, delay=1.0)[0]
+    poker = Poker.new_game(
+        modes=parse_modes("direct"),
+        endpoints=[server.api_base],
+        registry=ProgramRegistry(),
+        hedging=HedgePolicy(deadline=0.1),
+        range_fallback=True,
+    )
+    # The tables are loaded with the game, before any fallback needs them.
+    assert len(loads) == 1
+    poker.hand()
+    stats = poker.hedger.snapshot()  # pyright: ignore
+    assert stats.fallbacks == stats.decisions > 0
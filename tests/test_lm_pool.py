@@ -0,0 +1,83 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from turing_holdem.lm_pool import LMPool
+
+MODEL = "openai/stand-in"
+
+
+def new_pool(servers, **kwargs) -> LMPool:
+    return LMPool(
+        MODEL,
+        [server.api_base for server in servers],
+        api_key="NONE",
+        cache=False,
+        **kwargs,
+    )
+
+
+def test_spreads_sequential_requests(stand_in_servers) -> None:
+    servers = stand_in_servers(3)
+    pool = new_pool(servers)
+    for idx in range(9):
+        assert pool(f"hand {idx}")[0].startswith("[[ ## action ## ]]")
+    assert [len(server.requests) for server in servers] == [3, 3, 3]
+    assert [stats.requests for stats in pool.stats()] == [3, 3, 3]
+    # Keep-alive: each replica sees far fewer connections than requests.
+    assert all(len(server.connections) < 3 for server in servers)
+
+
+def test_least_outstanding_requests(stand_in_servers) -> None:
+    slow = stand_in_servers(1, delay=0.3)[0]
+    fast = stand_in_servers(1)[0]
+    pool = new_pool([slow, fast])
+    with ThreadPoolExecutor(4) as executor:
+        list(executor.map(lambda idx: pool(f"hand {idx}"), range(20)))
+    assert len(fast.requests) > 3 * len(slow.requests)
+
+
+def test_ejects_and_readmits(stand_in_servers) -> None:
+    broken, healthy = stand_in_servers(2)
+    broken.failing = True
+    pool = new_pool([broken, healthy], max_failures=2, cooldown=0.5)
+
+    # Failed requests fail over, so every call still succeeds.
+    for idx in range(6):
+        pool(f"hand {idx}")
+    assert len(broken.requests) == 2
+    assert not pool.stats()[0].healthy
+    assert pool.stats()[0].errors == 2
+
+    broken.failing = False
+    time.sleep(0.6)
+    for idx in range(4):
+        pool(f"hand {idx}")
+    assert pool.stats()[0].healthy
+    assert len(broken.requests) > 2
+
+
+def test_retries_on_another_endpoint(stand_in_servers) -> None:
+    broken = stand_in_servers(1)[0]
+    busy = stand_in_servers(1, delay=0.5)[0]
+    broken.failing = True
+    pool = new_pool([broken, busy], max_failures=10)
+    with ThreadPoolExecutor(1) as executor:
+        # Keep a request in flight on the busy endpoint, so the broken one
+        # has fewer outstanding requests when the next request is retried.
+        background = executor.submit(pool, "hand 0")
+        time.sleep(0.2)
+        pool("hand 1")
+        background.result()
+    # One failure per request: neither was retried on the endpoint that failed.
+    assert len(broken.requests) == 2
+    assert len(busy.requests) == 2
+
+
+def test_all_endpoints_down(stand_in_servers) -> None:
+    servers = stand_in_servers(2)
+    for server in servers:
+        server.failing = True
+    with pytest.raises(Exception):
+        new_pool(servers)("hand")
@@ -0,0 +1,59 @@
+import io
+import json
+
+import pytest
+from loguru import logger
+
+from turing_holdem import logs
+from turing_holdem.logs import BackgroundSink, configure_logging, log_action
+
+
+@pytest.fixture
+def stream():
+    stream = io.StringIO()
+    yield stream
+    configure_logging()
+
+
+def test_json_keeps_fields(stream) -> None:
+    configure_logging(json=True, background=False, sink=stream)
+    log_action("Player {name} {action}", name="Ada", action="fold")
+    record = json.loads(stream.getvalue())["record"]
+    assert record["message"] == "Player Ada fold"
+    assert record["level"]["name"] == "ACTION"
+    assert record["extra"] == {"name": "Ada", "action": "fold"}
+
+
+def test_sampling(stream) -> None:
+    configure_logging(background=False, action_sample=0.1, sink=stream)
+    for idx in range(100):
+        log_action("Action {idx}", idx=idx)
+    logger.info("Hand")
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 11
+    assert lines[-1].endswith("Hand")
+
+
+def test_level_hides_actions(stream) -> None:
+    configure_logging("INFO", background=False, sink=stream)
+    log_action("Street: {street}", street="Flop")
+    logger.info("Hand")
+    assert stream.getvalue().count("\n") == 1
+
+
+def test_background_flushes_on_stop() -> None:
+    stream = io.StringIO()
+    sink = BackgroundSink(stream, batch=3)
+    for idx in range(10):
+        sink(f"{idx}\n")
+    sink.stop()
+    assert stream.getvalue().split() == [str(idx) for idx in range(10)]
+
+
+def test_file_sink_closed_when_replaced(tmp_path, stream) -> None:
+    configure_logging("INFO", sink=tmp_path / "poker.log")
+    opened = logs._opened
+    logger.info("Hand")
+    configure_logging("INFO", background=False, sink=stream)
+    assert opened is not None and opened.closed
+    assert (tmp_path / "poker.log").read_text().endswith("Hand\n")
@@ -0,0 +1,60 @@
+import dspy
+
+from turing_holdem.dspy_modules import (
+    PrefixCacheChatAdapter,
+    PokerAnalyzer,
+    new_dspy_lm,
+)
+from turing_holdem.metering import MeteredLM
+
+SIGNATURE = dspy.ChainOfThought(PokerAnalyzer).predict.signature
+
+
+def _format(adapter: dspy.ChatAdapter, street: str, board: str) -> list[dict]:
+    return adapter.format(
+        SIGNATURE,
+        [],
+        {
+            "personality": "nine_percent",
+            "hole_cards": "(As, Ah)",
+            "board": board,
+            "street": street,
+        },
+    )
+
+
+def test_prefix_layout_puts_varying_inputs_last() -> None:
+    flop = _format(PrefixCacheChatAdapter(), "Flop", "(2c, As, 5c)")
+    turn = _format(PrefixCacheChatAdapter(), "Turn", "(2c, As, 5c, Kd)")
+    assert flop[0]["content"] == turn[0]["content"]
+    assert "Respond with the corresponding output fields" in flop[0]["content"]
+
+    user = flop[-1]["content"]
+    positions = [
+        user.index(f"[[ ## {name} ## ]]")
+        for name in ("personality", "street", "board", "hole_cards")
+    ]
+    assert positions == sorted(positions)
+    assert user.rstrip().endswith("(As, Ah)")
+    # The saved field order is unchanged.
+    assert list(SIGNATURE.input_fields)[0] == "personality"
+
+
+def test_prefix_layout_parses_replies() -> None:
+    reply = "[[ ## reasoning ## ]]\nAces.\n\n[[ ## action ## ]]\nraise"
+    parsed = PrefixCacheChatAdapter().parse(SIGNATURE, reply)
+    assert parsed == {"reasoning": "Aces.", "action": "raise"}
+
+
+def test_meter_counts_prompt_tokens(stand_in_servers) -> None:
+    (server,) = stand_in_servers(1)
+    lm = new_dspy_lm("stand-in", [server.api_base])
+    assert isinstance(lm, MeteredLM)
+    for idx in range(3):
+        lm(messages=[{"role": "user", "content": f"hand {idx}"}], cache=False)
+
+    usage = lm.meter.snapshot()
+    assert usage.requests == 3
+    assert usage.prompt_tokens == 3
+    assert usage.cached_prompt_tokens == 3
+    assert usage.completion_tokens == 3
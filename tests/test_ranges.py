@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from turing_holdem import ranges
+from turing_holdem.cards import parse_cards
+from turing_holdem.policy import RANGE_LABEL_WEIGHTS, range_action
+from turing_holdem.ranges import (
+    COMBO_INDEX,
+    COMBOS,
+    OVERLAP,
+    cached_range_weights,
+    equity_matrix,
+    hand_equities,
+    range_equity,
+    range_weights,
+)
+from turing_holdem.utils import Action, FiftyPercent, NinePercent
+
+RANDOM = np.ones(len(COMBOS))
+
+
+def combo(text: str) -> int:
+    first, second = parse_cards(text)
+    return COMBO_INDEX[first, second]
+
+
+def test_combos() -> None:
+    assert len(COMBOS) == 1326
+    assert combo("AsAh") == combo("AhAs")
+    # Each combo shares a card with 100 others and itself.
+    assert (OVERLAP.sum(axis=1) == 101).all()
+
+
+def test_range_weights() -> None:
+    # 66+ (54), AJs+ and KQs (16), AJo+ and KQo (48).
+    assert range_weights(NinePercent).sum() == 118
+    weights = range_weights(NinePercent, {"speculative": 0.5})
+    assert weights[combo("AsKh")] == 0.5 and weights[combo("AsKs")] == 1.0
+    weights = cached_range_weights(NinePercent, RANGE_LABEL_WEIGHTS)
+    assert weights[combo("AsKh")] == pytest.approx(0.25 / 0.6)
+    assert weights[combo("AsKs")] == pytest.approx(0.4 / 0.6)
+
+
+def test_stale_tables_are_rebuilt(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "preflop_equity.npz"
+    np.savez(path, matrix=np.zeros(1), scores=np.zeros(1))
+    built = (np.ones(1), np.ones(1))
+    monkeypatch.setattr(ranges, "build_preflop_tables", lambda: built)
+    # Uncached, to read the file afresh each time.
+    preflop_tables = ranges.preflop_tables.__wrapped__
+    assert preflop_tables(path) == built
+    monkeypatch.setattr(ranges, "build_preflop_tables", None)
+    matrix, _ = preflop_tables(path)
+    assert matrix[0] == 1.0
+
+
+def test_river_is_exact() -> None:
+    board = parse_cards("2c7d9hJsQc")
+    equities = hand_equities(parse_cards("KsKh"), board)
+    assert equities[combo("AsAh")] == 0.0
+    assert equities[combo("KdKc")] == 0.5
+    assert equities[combo("3c4d")] == 1.0
+    assert np.isnan(equities[combo("Ks2d")]) and np.isnan(equities[combo("2c3c")])
+
+    # Two opponents on a known board: the product of the heads-up shares.
+    heads_up = range_equity(parse_cards("KsKh"), board, [RANDOM])
+    assert range_equity(parse_cards("KsKh"), board, [RANDOM, RANDOM]) == (
+        pytest.approx(heads_up**2)
+    )
+
+
+def test_equity_matrix_matches_rows() -> None:
+    board = parse_cards("2c7d9hJs")
+    matrix = equity_matrix(board)
+    live = ~np.isnan(matrix)
+    assert np.allclose(matrix[live] + matrix.T[live], 1.0)
+    row = hand_equities(parse_cards("KsKh"), board)
+    assert np.allclose(matrix[combo("KsKh")], row, equal_nan=True)
+
+
+def test_tight_ranges_lower_equity() -> None:
+    hole, board = parse_cards("Tc9c"), parse_cards("2c7d9h")
+    rng = np.random.default_rng(0)
+    loose = range_equity(hole, board, [range_weights(FiftyPercent)] * 3, rng=rng)
+    tight = range_equity(hole, board, [range_weights(NinePercent)] * 3, rng=rng)
+    assert tight < loose
+    assert range_action(NinePercent, parse_cards("AsAh"), board, [FiftyPercent]) in (
+        Action.RAISE,
+        Action.ALL_IN,
+    )
@@ -0,0 +1,64 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+from turing_holdem.dspy_modules import parse_modes
+from turing_holdem.poker import Poker
+from turing_holdem.registry import ProgramRegistry
+
+PROGRAMS = Path("programs")
+
+
+def copy_programs(tmp_path: Path) -> ProgramRegistry:
+    for path in PROGRAMS.glob("gepa_*.json"):
+        shutil.copy(path, tmp_path / path.name)
+    return ProgramRegistry(tmp_path)
+
+
+def rewrite_instructions(path: Path, instructions: str) -> None:
+    state = json.loads(path.read_text())
+    state["preflop_module.predict"]["signature"]["instructions"] = instructions
+    path.write_text(json.dumps(state))
+    mtime = path.stat().st_mtime + 10
+    os.utime(path, (mtime, mtime))
+
+
+def test_loads_once(tmp_path) -> None:
+    registry = copy_programs(tmp_path)
+    path = registry.path_for("nine_percent")
+    assert registry.get(path) is registry.get(path)
+    assert registry.get(path) is not registry.get(path, parse_modes("direct"))
+
+
+def test_tables_share_programs(tmp_path) -> None:
+    registry = copy_programs(tmp_path)
+    first = Poker.new_game(registry=registry)
+    second = Poker.new_game(registry=registry)
+    for idx, player in first.players.items():
+        assert player.program_path == registry.path_for(player.personality.name)
+        assert player.program is second.players[idx].program
+
+
+def test_hot_reload(tmp_path) -> None:
+    registry = copy_programs(tmp_path)
+    path = registry.path_for("nine_percent")
+    old = registry.get(path)
+
+    rewrite_instructions(path, "Always fold.")
+    assert registry.refresh(force=True) == [path.resolve()]
+    new = registry.get(path)
+    assert new is not old
+    assert new.preflop_module.predict.signature.instructions == "Always fold."
+
+
+def test_failed_reload_keeps_program(tmp_path) -> None:
+    registry = copy_programs(tmp_path)
+    path = registry.path_for("nine_percent")
+    old = registry.get(path)
+
+    path.write_text("{")
+    mtime = path.stat().st_mtime + 10
+    os.utime(path, (mtime, mtime))
+    assert registry.refresh(force=True) == []
+    assert registry.get(path) is old
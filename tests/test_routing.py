@@ -0,0 +1,82 @@
+import pytest
+
+from turing_holdem.dspy_modules import DEFAULT_MODEL, parse_modes
+from turing_holdem.poker import Poker
+from turing_holdem.registry import ProgramRegistry
+from turing_holdem.routing import Route, Router, RoutingTable, parse_routes
+
+
+def test_parse_routes(tmp_path) -> None:
+    table = parse_routes(
+        "preflop=small@http://a:8000/v1,river=large@http://b:8000/v1|http://c:8000/v1,"
+        "nine_percent.river=@http://d:8000/v1"
+    )
+    assert table.routes["preflop"] == Route(
+        model="small", endpoints=("http://a:8000/v1",)
+    )
+    assert table.routes["river"].name == "large@http://b:8000/v1|http://c:8000/v1"
+    assert table.routes["nine_percent.river"].model == DEFAULT_MODEL
+
+    path = tmp_path / "routes.json"
+    path.write_text(table.model_dump_json())
+    assert parse_routes(str(path)) == table
+
+    for text in ("showdown=small", "nobody.river=small", "nine_percent.showdown=small"):
+        with pytest.raises(ValueError):
+            parse_routes(text)
+
+
+def test_most_specific_route() -> None:
+    table = parse_routes("river=large,nine_percent=small,nine_percent.flop=tiny")
+    assert table.route("nine_percent", "Flop").model == "tiny"
+    assert table.route("nine_percent", "River").model == "large"
+    assert table.route("nine_percent", "Turn").model == "small"
+    assert table.route("fifty_percent", "Turn") is None
+
+
+def test_router_shares_lms() -> None:
+    router = Router(parse_routes("preflop=small,flop=small,river=large"))
+    assert router.lm_for("nine_percent", "Preflop") is router.lm_for(
+        "fifty_percent", "Flop"
+    )
+    assert router.lm_for("nine_percent", "River") is not router.lm_for(
+        "nine_percent", "Flop"
+    )
+    assert router.lm_for("nine_percent", "Turn") is None
+
+
+def test_routes_default_to_game_endpoints() -> None:
+    router = Router(
+        parse_routes("preflop=small@http://a:8000/v1,river=large"),
+        ["http://b:8000/v1"],
+    )
+    preflop = router.lm_for("nine_percent", "Preflop")
+    river = router.lm_for("nine_percent", "River")
+    assert preflop is not None and preflop.kwargs["api_base"] == "http://a:8000/v1"
+    assert river is not None and river.kwargs["api_base"] == "http://b:8000/v1"
+
+
+def test_poker_routes_streets(stand_in_servers, tmp_path, monkeypatch) -> None:
+    preflop, rest = stand_in_servers(2)
+    # Everyone calls preflop, so the later streets are played.
+    preflop.reply = "[[ ## action ## ]]\ncall\n\n[[ ## completed ## ]]"
+    poker = Poker.new_game(
+        modes=parse_modes("direct"),
+        endpoints=[rest.api_base],
+        registry=ProgramRegistry(),
+        routes=RoutingTable(
+            routes={"preflop": Route(model="stand-in", endpoints=(preflop.api_base,))}
+        ),
+    )
+    poker.hand()
+    assert preflop.requests and rest.requests
+    for server, streets in ((preflop, {"Preflop"}), (rest, {"Flop", "Turn", "River"})):
+        for request in server.requests:
+            prompt = request["messages"][-1]["content"]
+            assert prompt.split("[[ ## street ## ]]\n")[1].split("\n")[0] in streets
+
+    # The routed LM's requests are counted in the report too.
+    monkeypatch.chdir(tmp_path)
+    poker.report()
+    assert poker.prompt_usage is not None
+    assert poker.prompt_usage.requests == len(preflop.requests) + len(rest.requests)
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from pokerkit import StandardHighHand
+
+from turing_holdem.cards import CARD_STRINGS, parse_cards
+from turing_holdem.evaluator import Category, evaluate
+from turing_holdem.policy import rule_action
+from turing_holdem.simulator import check_against_pokerkit, simulate, whole_decks
+from turing_holdem.utils import Action, NinePercent
+
+
+def test_evaluate_matches_pokerkit() -> None:
+    rng = np.random.default_rng(0)
+    hands = np.argsort(rng.random((2000, 52)), axis=1)[:, :7]
+    scores = evaluate(hands)
+    expected = [
+        StandardHighHand.from_game(
+            "".join(CARD_STRINGS[card] for card in hand[:2]),
+            "".join(CARD_STRINGS[card] for card in hand[2:]),
+        )
+        for hand in hands
+    ]
+    for i in range(len(hands) - 1):
+        assert (scores[i] > scores[i + 1]) == (expected[i] > expected[i + 1])
+        assert (scores[i] == scores[i + 1]) == (expected[i] == expected[i + 1])
+
+
+def test_evaluate_wheel_and_padding() -> None:
+    wheel = [CARD_STRINGS.index(card) for card in ("Ac", "2d", "3h", "4s", "5c")]
+    score = evaluate(np.array([wheel + [-1, -1]]))[0]
+    assert score >> 20 == Category.STRAIGHT
+
+
+def test_rule_action() -> None:
+    assert rule_action(NinePercent, parse_cards("AsAh"), ()) is Action.RAISE
+    assert rule_action(NinePercent, parse_cards("2c7d"), ()) is Action.FOLD
+    # Quads on the board clear the all-in threshold for anyone.
+    assert (
+        rule_action(NinePercent, parse_cards("2c7d"), parse_cards("AsAhAdAc3s"))
+        is Action.ALL_IN
+    )
+
+
+def test_simulator_matches_pokerkit() -> None:
+    assert check_against_pokerkit(200, seed=0) == []
+
+
+def test_simulate() -> None:
+    report = simulate(1000, batch_size=300, seed=0)
+    assert sum(report.wins.values()) == 1000
+    assert report.wins == simulate(1000, batch_size=1000, seed=0).wins
+
+
+def test_duplicate_reduces_variance() -> None:
+    independent = simulate(12_000, seed=0)
+    duplicate = simulate(12_000, seed=0, duplicate=True)
+    assert duplicate.hands == 12_000
+    name = "twenty_five_percent"
+    assert duplicate.intervals[name].stderr < independent.intervals[name].stderr
+
+
+def test_duplicate_counts_hands_played() -> None:
+    for hands, batch_size in ((1000, 100), (20, 4)):
+        report = simulate(hands, batch_size=batch_size, seed=1, duplicate=True)
+        assert report.hands == hands - hands % 6
+        assert sum(report.wins.values()) == report.hands
+        assert sum(report.win_rates.values()) == pytest.approx(1.0)
+
+
+def test_whole_decks() -> None:
+    assert whole_decks(1000, 60) == (996, 60)
+    assert whole_decks(20, 4) == (18, 6)
@@ -0,0 +1,59 @@
+from turing_holdem.poker import Poker
+from turing_holdem.stats import (
+    Interval,
+    StoppingRule,
+    StopReason,
+    mean_interval,
+    wilson_interval,
+)
+
+
+def test_wilson_interval() -> None:
+    interval = wilson_interval(30, 100)
+    assert interval.low < 0.3 < interval.high
+    assert wilson_interval(0, 50).low == 0.0
+    assert wilson_interval(0, 50).high > 0.0
+
+
+def test_mean_interval() -> None:
+    interval = mean_interval([0.5, 0.5, 0.5])
+    assert interval.estimate == 0.5
+    assert interval.stderr == 0.0
+
+
+def test_play_deck() -> None:
+    poker = Poker.new_rule_game()
+    poker.play_deck()
+    poker.play_deck()
+    assert len(poker.winners) == 12
+    assert all(len(shares) == 2 for shares in poker.duplicate_shares.values())
+    for deck in range(2):
+        assert sum(shares[deck] for shares in poker.duplicate_shares.values()) == 1
+
+
+def test_stopping_rule() -> None:
+    rule = StoppingRule(min_samples=10)
+    clear = {
+        "a": Interval(estimate=0.8, stderr=0.01, low=0.7, high=0.9, samples=50),
+        "b": Interval(estimate=0.2, stderr=0.01, low=0.1, high=0.3, samples=50),
+    }
+    assert rule.check(clear) is StopReason.SEPARATED
+    close = {
+        "a": Interval(estimate=0.5, stderr=0.1, low=0.3, high=0.7, samples=50),
+        "b": Interval(estimate=0.5, stderr=0.1, low=0.3, high=0.7, samples=50),
+    }
+    assert rule.check(close) is None
+    assert StoppingRule(min_samples=10, half_width=0.2).check(close) is (
+        StopReason.PRECISION
+    )
+    assert StoppingRule(min_samples=100).check(clear) is None
+
+
+def test_play_stops_early(monkeypatch, tmp_path) -> None:
+    monkeypatch.chdir(tmp_path)
+    poker = Poker.new_rule_game()
+    poker.play(1000, rule=StoppingRule(confidence=0.9, half_width=0.2, min_samples=20))
+    assert poker.stopping is not None
+    assert poker.stopping.reason is not StopReason.BUDGET
+    assert poker.stopping.hands == len(poker.winners) < 1000
+    assert list(tmp_path.glob("reports/*.json"))
@@ -0,0 +1,79 @@
+import multiprocessing
+
+from turing_holdem.poker import Poker
+from turing_holdem.work_queue import WorkQueue, run_worker
+
+
+def square(payload, heartbeat) -> int:
+    heartbeat()
+    return payload["value"] ** 2
+
+
+def drain(path) -> None:
+    with WorkQueue(path) as queue:
+        run_worker(queue, {"square": square})
+
+
+def test_claim_and_ack(tmp_path) -> None:
+    with WorkQueue(tmp_path / "queue.db") as queue:
+        queue.submit("job", "square", [{"value": 2}, {"value": 3}])
+        task = queue.claim("worker")
+        assert task is not None and task.payload == {"value": 2}
+        assert queue.ack(task, "worker", 4)
+        assert queue.progress("job") == {"done": 1, "pending": 1}
+        assert queue.results("job") == [4]
+        assert queue.payloads("job") == [{"value": 2}, {"value": 3}]
+
+
+def test_abandoned_lease_is_retried(tmp_path) -> None:
+    with WorkQueue(tmp_path / "queue.db", max_attempts=2) as queue:
+        queue.submit("job", "square", [{"value": 2}])
+        abandoned = queue.claim("dead", lease_seconds=-1)
+        retry = queue.claim("alive")
+        assert abandoned is not None and retry is not None
+        assert retry.id == abandoned.id and retry.attempts == 2
+        # The first worker lost its lease, so it can no longer ack.
+        assert not queue.ack(abandoned, "dead", 0)
+        assert queue.ack(retry, "alive", 4)
+        assert queue.results("job") == [4]
+
+
+def test_gives_up_after_max_attempts(tmp_path) -> None:
+    with WorkQueue(tmp_path / "queue.db", max_attempts=2) as queue:
+        queue.submit("job", "square", [{"value": 2}])
+        for worker in ("first", "second"):
+            task = queue.claim(worker)
+            assert task is not None
+            queue.fail(task, worker, "boom")
+        assert queue.claim("third") is None
+        assert queue.progress("job") == {"failed": 1}
+
+
+def test_workers_in_processes(tmp_path) -> None:
+    path = tmp_path / "queue.db"
+    with WorkQueue(path) as queue:
+        queue.submit("job", "square", [{"value": value} for value in range(40)])
+    workers = [multiprocessing.Process(target=drain, args=(path,)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    with WorkQueue(path) as queue:
+        assert queue.results("job") == [value**2 for value in range(40)]
+
+
+def test_merge_play_batches(tmp_path) -> None:
+    with WorkQueue(tmp_path / "queue.db") as queue:
+        queue.submit("job", "hands", [{"hands": 12}, {"hands": 12}])
+        run_worker(
+            queue,
+            {
+                "hands": lambda payload, heartbeat: Poker.new_rule_game().play_batch(
+                    payload["hands"], duplicate=True, heartbeat=heartbeat
+                )
+            },
+        )
+        poker = Poker.new_rule_game()
+        poker.merge(queue.results("job"), duplicate=True)
+    assert len(poker.winners) == 24
+    assert all(interval.samples == 4 for interval in poker.win_rates.values())